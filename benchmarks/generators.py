@@ -0,0 +1,405 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+"""
+Generators of synthetic q2-ms files of arbitrary size. All generators are
+deterministic for a given `seed` and produce files that pass validation at
+both levels.
+"""
+
+import base64
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from q2_ms.types._tables import write_xcms_table
+
+MZML_HEADER = """\
+<?xml version="1.0" encoding="utf-8"?>
+<indexedmzML xmlns="http://psi.hupo.org/ms/mzml" \
+xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" \
+xsi:schemaLocation="http://psi.hupo.org/ms/mzml \
+http://psidev.info/files/ms/mzML/xsd/mzML1.1.2_idx.xsd">
+  <mzML xmlns="http://psi.hupo.org/ms/mzml" id="synthetic" version="1.1.0">
+    <cvList count="2">
+      <cv id="MS" fullName="Proteomics Standards Initiative Mass Spectrometry \
+Ontology" version="4.1.0" URI="https://raw.githubusercontent.com/HUPO-PSI/\
+psi-ms-CV/master/psi-ms.obo"/>
+      <cv id="UO" fullName="Unit Ontology" version="09:04:2014" \
+URI="https://raw.githubusercontent.com/bio-ontology-research-group/\
+unit-ontology/master/unit.obo"/>
+    </cvList>
+    <fileDescription>
+      <fileContent>
+        <cvParam cvRef="MS" accession="MS:1000579" name="MS1 spectrum" value=""/>
+        <cvParam cvRef="MS" accession="MS:1000580" name="MSn spectrum" value=""/>
+      </fileContent>
+    </fileDescription>
+    <softwareList count="1">
+      <software id="q2_ms_benchmarks" version="1.0">
+        <cvParam cvRef="MS" accession="MS:1000799" \
+name="custom unreleased software tool" value="q2-ms benchmarks"/>
+      </software>
+    </softwareList>
+    <instrumentConfigurationList count="1">
+      <instrumentConfiguration id="IC1">
+        <cvParam cvRef="MS" accession="MS:1000554" name="LCQ Deca" value=""/>
+      </instrumentConfiguration>
+    </instrumentConfigurationList>
+    <dataProcessingList count="1">
+      <dataProcessing id="synthetic">
+        <processingMethod order="1" softwareRef="q2_ms_benchmarks">
+          <cvParam cvRef="MS" accession="MS:1000544" \
+name="Conversion to mzML" value=""/>
+        </processingMethod>
+      </dataProcessing>
+    </dataProcessingList>
+    <run id="synthetic" defaultInstrumentConfigurationRef="IC1">
+      <spectrumList count="{count}" defaultDataProcessingRef="synthetic">
+"""
+
+MZML_SPECTRUM = """\
+        <spectrum index="{index}" id="scan={scan}" defaultArrayLength="{length}">
+          <cvParam cvRef="MS" accession="MS:1000511" name="ms level" \
+value="{ms_level}"/>
+          <cvParam cvRef="MS" accession="MS:1000127" name="centroid spectrum" \
+value=""/>
+          <scanList count="1">
+            <cvParam cvRef="MS" accession="MS:1000795" name="no combination" \
+value=""/>
+            <scan>
+              <cvParam cvRef="MS" accession="MS:1000016" name="scan start time" \
+value="{rt:.4f}" unitCvRef="UO" unitAccession="UO:0000010" unitName="second"/>
+            </scan>
+          </scanList>
+{precursor}\
+          <binaryDataArrayList count="2">
+{mz}\
+{intensity}\
+          </binaryDataArrayList>
+        </spectrum>
+"""
+
+MZML_PRECURSOR = """\
+          <precursorList count="1">
+            <precursor spectrumRef="scan={parent}">
+              <selectedIonList count="1">
+                <selectedIon>
+                  <cvParam cvRef="MS" accession="MS:1000744" \
+name="selected ion m/z" value="{mz:.5f}" unitCvRef="MS" \
+unitAccession="MS:1000040" unitName="m/z"/>
+                </selectedIon>
+              </selectedIonList>
+              <activation>
+                <cvParam cvRef="MS" accession="MS:1000422" \
+name="beam-type collision-induced dissociation" value=""/>
+              </activation>
+            </precursor>
+          </precursorList>
+"""
+
+MZML_ARRAY = """\
+            <binaryDataArray encodedLength="{length}">
+              <cvParam cvRef="MS" accession="MS:1000523" name="64-bit float" \
+value=""/>
+              <cvParam cvRef="MS" accession="MS:1000576" name="no compression" \
+value=""/>
+              <cvParam cvRef="MS" accession="{accession}" name="{name}" value=""/>
+              <binary>{binary}</binary>
+            </binaryDataArray>
+"""
+
+
+def _peaks(rng, n_peaks, max_mz=1000.0):
+    mz = np.sort(rng.uniform(50.0, max_mz, n_peaks))
+    intensity = rng.lognormal(8.0, 2.0, n_peaks).round(1)
+    return mz, intensity
+
+
+def _mzml_array(values, accession, name):
+    binary = base64.b64encode(values.astype("<f8").tobytes()).decode("ascii")
+    return MZML_ARRAY.format(
+        length=len(binary), accession=accession, name=name, binary=binary
+    )
+
+
+def write_mzml(path, n_spectra, n_peaks=100, ms2_per_ms1=9, seed=0):
+    """
+    Writes an indexed mzML file with `n_spectra` spectra of `n_peaks` peaks.
+    Each MS1 spectrum is followed by `ms2_per_ms1` MS2 spectra.
+    """
+    rng = np.random.default_rng(seed)
+    offsets = []
+
+    with open(path, "wb") as file:
+        file.write(MZML_HEADER.format(count=n_spectra).encode())
+        parent = 1
+        for index in range(n_spectra):
+            scan = index + 1
+            ms_level = 1 if index % (ms2_per_ms1 + 1) == 0 else 2
+            precursor = ""
+            if ms_level == 1:
+                parent = scan
+            else:
+                precursor = MZML_PRECURSOR.format(
+                    parent=parent, mz=rng.uniform(100.0, 1000.0)
+                )
+
+            mz, intensity = _peaks(rng, n_peaks)
+            # Offsets point to the opening tag, after the indentation
+            offsets.append((scan, file.tell() + 8))
+            file.write(
+                MZML_SPECTRUM.format(
+                    index=index,
+                    scan=scan,
+                    length=n_peaks,
+                    ms_level=ms_level,
+                    rt=index * 0.5,
+                    precursor=precursor,
+                    mz=_mzml_array(mz, "MS:1000514", "m/z array"),
+                    intensity=_mzml_array(intensity, "MS:1000515", "intensity array"),
+                ).encode()
+            )
+
+        file.write(b"      </spectrumList>\n    </run>\n  </mzML>\n")
+        index_offset = file.tell()
+        file.write(b'  <indexList count="1">\n    <index name="spectrum">\n')
+        file.writelines(
+            f'      <offset idRef="scan={scan}">{offset}</offset>\n'.encode()
+            for scan, offset in offsets
+        )
+        file.write(
+            b"    </index>\n  </indexList>\n"
+            + f"  <indexListOffset>{index_offset}</indexListOffset>\n".encode()
+            + b"  <fileChecksum>"
+        )
+
+    # The checksum covers the file up to and including the opening tag
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as file:
+        while chunk := file.read(1024**2):
+            sha1.update(chunk)
+    with open(path, "ab") as file:
+        file.write(f"{sha1.hexdigest()}</fileChecksum>\n</indexedmzML>\n".encode())
+
+
+def write_mzml_dir(path, n_samples, n_spectra, **kwargs):
+    """Writes `n_samples` mzML files of `n_spectra` spectra to a directory."""
+    os.makedirs(path, exist_ok=True)
+    for sample in range(n_samples):
+        write_mzml(
+            os.path.join(path, f"sample{sample + 1}.mzML"),
+            n_spectra,
+            seed=sample,
+            **kwargs,
+        )
+
+
+def write_msp(path, n_spectra, n_peaks=20, seed=0):
+    """Writes an MSP file with `n_spectra` MS2 spectra of `n_peaks` peaks."""
+    rng = np.random.default_rng(seed)
+    ion_modes = ("POSITIVE", "NEGATIVE")
+
+    with open(path, "w", encoding="utf-8") as file:
+        for i in range(n_spectra):
+            mz, intensity = _peaks(rng, n_peaks)
+            file.write(
+                f"Name: Compound {i}\n"
+                f"DB#: SYN{i:08d}\n"
+                "InChIKey: AAAAAAAAAAAAAA-AAAAAAAAAA-N\n"
+                "Precursor_type: [M+H]+\n"
+                "Spectrum_type: MS2\n"
+                f"PrecursorMZ: {rng.uniform(100.0, 1000.0):.4f}\n"
+                f"Ion_mode: {ion_modes[i % 2]}\n"
+                "Collision_energy: 30(NCE)\n"
+                f"Num Peaks: {n_peaks}\n"
+            )
+            file.writelines(f"{m:.4f} {x:g}\n" for m, x in zip(mz, intensity))
+            file.write("\n")
+
+
+def write_matched_spectra(path, n_rows, n_queries=None, n_targets=10_000, seed=0):
+    """
+    Writes a matched_spectra.txt file with `n_rows` matches, sorted by query
+    and descending score as written by match_spectra.
+    """
+    rng = np.random.default_rng(seed)
+    n_queries = n_queries or max(1, n_rows // 10)
+    query = np.sort(rng.integers(1, n_queries + 1, n_rows))
+    target = rng.integers(0, n_targets, n_rows)
+    score = rng.random(n_rows)
+    score = score[np.lexsort((-score, query))]
+
+    with open(path, "w") as file:
+        file.write(".original_query_index\ttarget_spectrum_id\tscore\n")
+        file.writelines(
+            f"{q}\tSYN{t:08d}\t{s:.6g}\n"
+            for q, t, s in zip(query.tolist(), target.tolist(), score.tolist())
+        )
+
+
+def write_matched_spectra_dir(path, n_rows, **kwargs):
+    os.makedirs(path, exist_ok=True)
+    write_matched_spectra(os.path.join(path, "matched_spectra.txt"), n_rows, **kwargs)
+
+
+def _r_json(value):
+    # Objects serialized by R's jsonlite::serializeJSON, wrapped in a list
+    return json.dumps([json.dumps(value, separators=(",", ":"))])
+
+
+def write_xcms_experiment(
+    path, n_samples=4, n_spectra=1000, n_peaks=10_000, n_features=1000, seed=0
+):
+    """
+    Writes an XCMSExperiment directory with `n_samples` samples of `n_spectra`
+    spectra each, `n_peaks` chromatographic peaks and `n_features` features.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(path, exist_ok=True)
+
+    def write(name, df, comment=None):
+        write_xcms_table(df, os.path.join(path, f"{name}.txt"), comment=comment)
+
+    origins = [f"/data/sample{i + 1}.mzML" for i in range(n_samples)]
+    write(
+        "ms_experiment_sample_data",
+        pd.DataFrame(
+            {
+                "sample_name": [f"sample{i + 1}" for i in range(n_samples)],
+                "spectraOrigin": origins,
+            },
+            index=range(1, n_samples + 1),
+        ),
+    )
+
+    n_total = n_samples * n_spectra
+    samples = np.repeat(np.arange(n_samples), n_spectra)
+    scans = np.tile(np.arange(1, n_spectra + 1), n_samples)
+    peaks_count = rng.integers(100, 1000, n_total)
+    origin = pd.Categorical.from_codes(samples, categories=origins)
+    na_int = pd.array([pd.NA] * n_total, dtype="Int32")
+    write(
+        "ms_backend_data",
+        pd.DataFrame(
+            {
+                "msLevel": pd.array(np.ones(n_total, dtype=int), dtype="Int8"),
+                "rtime": scans * 0.5,
+                "acquisitionNum": pd.array(scans, dtype="Int32"),
+                "dataOrigin": origin,
+                "polarity": pd.array(np.ones(n_total, dtype=int), dtype="Int8"),
+                "precScanNum": na_int,
+                "precursorMz": np.full(n_total, np.nan),
+                "precursorIntensity": np.full(n_total, np.nan),
+                "precursorCharge": pd.array([pd.NA] * n_total, dtype="Int8"),
+                "collisionEnergy": np.full(n_total, np.nan),
+                "peaksCount": pd.array(peaks_count, dtype="Int32"),
+                "totIonCurrent": rng.lognormal(14.0, 1.0, n_total).round(),
+                "basePeakMZ": rng.uniform(200.0, 600.0, n_total).round(4),
+                "basePeakIntensity": rng.lognormal(11.0, 1.0, n_total).round(),
+                "ionisationEnergy": np.full(n_total, np.nan),
+                "lowMZ": np.full(n_total, 200.0),
+                "highMZ": np.full(n_total, 600.0),
+                "mergedScan": na_int,
+                "mergedResultScanNum": na_int,
+                "mergedResultStartScanNum": na_int,
+                "mergedResultEndScanNum": na_int,
+                "injectionTime": np.full(n_total, np.nan),
+                "spectrumId": [f"scan={scan}" for scan in scans],
+                "ionMobilityDriftTime": np.full(n_total, np.nan),
+                "dataStorage": origin,
+                "scanIndex": pd.array(scans, dtype="Int32"),
+            },
+            index=range(1, n_total + 1),
+        ),
+        comment="# MsBackendMzR",
+    )
+
+    with open(
+        os.path.join(path, "ms_experiment_sample_data_links_spectra.txt"), "w"
+    ) as f:
+        f.writelines(f"{s + 1}\t{i + 1}\n" for i, s in enumerate(samples.tolist()))
+    with open(os.path.join(path, "ms_experiment_link_mcols.txt"), "w") as f:
+        f.write('"subsetBy"\n"1"\t1\n')
+    with open(os.path.join(path, "spectra_slots.txt"), "w") as f:
+        f.write(
+            "processingQueueVariables = \nprocessing = \n"
+            "processingChunkSize = Inf\nbackend = MsBackendMzR\n"
+        )
+    empty_list = {"type": "list", "attributes": {}, "value": []}
+    for name in ("spectra_processing_queue", "xcms_experiment_process_history"):
+        with open(os.path.join(path, f"{name}.json"), "w") as f:
+            f.write(_r_json(empty_list))
+
+    peak_names = [f"CP{i + 1:0{len(str(n_peaks))}d}" for i in range(n_peaks)]
+    mz = rng.uniform(200.0, 600.0, n_peaks).round(4)
+    rt = rng.uniform(2500.0, 4500.0, n_peaks).round(3)
+    maxo = rng.lognormal(9.0, 1.5, n_peaks).round()
+    write(
+        "xcms_experiment_chrom_peaks",
+        pd.DataFrame(
+            {
+                "mz": mz,
+                "mzmin": mz - 0.001,
+                "mzmax": mz + 0.001,
+                "rt": rt,
+                "rtmin": rt - 20.0,
+                "rtmax": rt + 20.0,
+                "into": maxo * rng.uniform(10.0, 40.0, n_peaks),
+                "intb": maxo * rng.uniform(5.0, 10.0, n_peaks),
+                "maxo": maxo,
+                "sn": rng.integers(3, 500, n_peaks),
+                "sample": rng.integers(1, n_samples + 1, n_peaks),
+            },
+            index=peak_names,
+        ),
+    )
+    write(
+        "xcms_experiment_chrom_peak_data",
+        pd.DataFrame(
+            {"ms_level": np.ones(n_peaks, dtype=int), "is_filled": False},
+            index=peak_names,
+        ),
+    )
+
+    # Each peak belongs to at most one feature
+    feature_of_peak = rng.integers(0, n_features, n_peaks)
+    assigned = np.flatnonzero(rng.random(n_peaks) < 0.8)
+    assigned = assigned[np.argsort(feature_of_peak[assigned], kind="stable")]
+    npeaks = np.bincount(feature_of_peak[assigned], minlength=n_features)
+    feature_mz = rng.uniform(200.0, 600.0, n_features).round(4)
+    feature_rt = rng.uniform(2500.0, 4500.0, n_features).round(3)
+    write(
+        "xcms_experiment_feature_definitions",
+        pd.DataFrame(
+            {
+                "mzmed": feature_mz,
+                "mzmin": feature_mz - 0.002,
+                "mzmax": feature_mz + 0.002,
+                "rtmed": feature_rt,
+                "rtmin": feature_rt - 10.0,
+                "rtmax": feature_rt + 10.0,
+                "npeaks": npeaks,
+                "peakidx": pd.array([pd.NA] * n_features, dtype="Int32"),
+                "ms_level": np.ones(n_features, dtype=int),
+            },
+            index=[f"FT{i + 1:0{len(str(n_features))}d}" for i in range(n_features)],
+        ),
+    )
+    write(
+        "xcms_experiment_feature_peak_index",
+        pd.DataFrame(
+            {
+                "feature_index": feature_of_peak[assigned] + 1,
+                "peak_index": assigned + 1,
+            },
+            index=range(1, len(assigned) + 1),
+        ),
+    )
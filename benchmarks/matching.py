@@ -0,0 +1,81 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+"""
+Time of matching query spectra against libraries of increasing size with the
+exact and the approximate (LSH) search, and the recall of the approximate
+search, the fraction of the exact matches it reports. Queries are noisy copies
+of library spectra.
+"""
+
+import os
+
+import numpy as np
+
+from q2_ms.spectra.matching import match_spectra
+from q2_ms.types import LSHIndex, SpectralLibrary
+from q2_ms.types._matched import open_matches
+
+from .generators import write_msp
+from .validation import DATA_DIR
+
+N_QUERIES = 1000
+
+
+def _noisy_copies(library, n_spectra, seed=0):
+    """Returns a library of `n_spectra` library spectra with m/z and intensity noise."""
+    rng = np.random.default_rng(seed)
+    indices = np.sort(rng.choice(len(library), n_spectra, replace=False))
+    peaks = [library.peaks(i) for i in indices]
+    mz = np.concatenate([mz for mz, _ in peaks])
+    intensity = np.concatenate([intensity for _, intensity in peaks])
+    return SpectralLibrary(
+        mz=mz + rng.normal(0, 0.002, len(mz)),
+        intensity=(intensity * rng.uniform(0.8, 1.2, len(mz))).astype(np.float32),
+        offsets=np.concatenate(([0], np.cumsum([len(mz) for mz, _ in peaks]))),
+        name=library.name[indices],
+        precursor_mz=library.precursor_mz[indices],
+        ion_mode=library.ion_mode[indices],
+        spectrum_type=library.spectrum_type[indices],
+        inchikey=library.inchikey[indices],
+        db_id=library.db_id[indices],
+    )
+
+
+def _matches(matched_spectra):
+    query, target, _, target_ids = open_matches(str(matched_spectra))
+    return set(zip(query.tolist(), target_ids[target].tolist()))
+
+
+class Matching:
+    params = ([10_000, 100_000], ["exact", "approximate"])
+    param_names = ["n_library", "search"]
+    timeout = 1200
+
+    def setup(self, n_library, search):
+        path = os.path.join(DATA_DIR, f"Matching_{n_library}.msp")
+        if not os.path.exists(path):
+            os.makedirs(DATA_DIR, exist_ok=True)
+            write_msp(path, n_spectra=n_library)
+
+        self.library = SpectralLibrary.from_msp(path)
+        self.query = _noisy_copies(self.library, N_QUERIES)
+        if search == "approximate":
+            # The index is built once per library version, not per run
+            self.library.lsh = LSHIndex.build(self.library)
+
+    def time_match_spectra(self, n_library, search):
+        match_spectra(self.query, self.library, min_score=0.7, search=search)
+
+    def track_recall(self, n_library, search):
+        exact = _matches(match_spectra(self.query, self.library, min_score=0.7))
+        found = _matches(
+            match_spectra(self.query, self.library, min_score=0.7, search=search)
+        )
+        return len(exact & found) / max(len(exact), 1)
+
+    track_recall.unit = "fraction"
@@ -0,0 +1,170 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+"""
+Time and peak memory of validating each format at both levels, across input
+sizes. The synthetic inputs are generated once into DATA_DIR and reused by
+later runs.
+"""
+
+import abc
+import os
+import resource
+import shutil
+import tempfile
+
+from q2_ms.types import (
+    MatchedSpectraDirFmt,
+    MatchedSpectraFormat,
+    MSPDirFmt,
+    MSPFormat,
+    XCMSExperimentDirFmt,
+    mzMLDirFmt,
+    mzMLFormat,
+)
+from q2_ms.types._validation import VALIDATION_CACHE_ENV
+
+from .generators import (
+    write_matched_spectra_dir,
+    write_msp,
+    write_mzml_dir,
+    write_xcms_experiment,
+)
+
+LEVELS = ["min", "max"]
+DATA_DIR = os.environ.get(
+    "Q2_MS_BENCHMARK_DATA", os.path.join(tempfile.gettempdir(), "q2-ms-benchmarks")
+)
+
+
+class _Validation(abc.ABC):
+    # Format validated and sizes of the generated inputs
+    fmt = None
+    sizes = []
+    timeout = 600
+
+    @abc.abstractmethod
+    def write(self, path, size):
+        """Writes the input of the given size to `path`."""
+
+    def setup(self, size, level):
+        # setup_cache is not used, as asv would share it between subclasses
+        self.path = os.path.join(DATA_DIR, f"{type(self).__name__}_{size}")
+        if not os.path.exists(f"{self.path}.complete"):
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.write(self.path, size)
+            open(f"{self.path}.complete", "w").close()
+        # Cached validations would be measured otherwise
+        os.environ.pop(VALIDATION_CACHE_ENV, None)
+
+    def time_validate(self, size, level):
+        self.fmt(self.path, mode="r").validate(level=level)
+
+
+class _InProcessValidation(_Validation):
+    # asv's peakmem only measures the benchmark process, so it is limited to
+    # formats validated without worker processes
+    def peakmem_validate(self, size, level):
+        self.fmt(self.path, mode="r").validate(level=level)
+
+
+def _file_in(path, extension):
+    return next(
+        os.path.join(path, name)
+        for name in sorted(os.listdir(path))
+        if name.endswith(extension)
+    )
+
+
+class MzMLValidation(_InProcessValidation):
+    fmt = mzMLFormat
+    sizes = [100, 1000, 10_000]
+    params = (sizes, LEVELS)
+    param_names = ["n_spectra", "level"]
+
+    def write(self, path, size):
+        write_mzml_dir(path, n_samples=1, n_spectra=size)
+
+    def time_validate(self, size, level):
+        mzMLFormat(_file_in(self.path, ".mzML"), mode="r").validate(level=level)
+
+    def peakmem_validate(self, size, level):
+        mzMLFormat(_file_in(self.path, ".mzML"), mode="r").validate(level=level)
+
+
+class MzMLDirValidation(_Validation):
+    fmt = mzMLDirFmt
+    sizes = [1, 4, 16]
+    params = (sizes, LEVELS)
+    param_names = ["n_samples", "level"]
+
+    def write(self, path, size):
+        write_mzml_dir(path, n_samples=size, n_spectra=1000)
+
+    def track_peakmem_validate(self, size, level):
+        # The samples are validated in worker processes, so the largest of them
+        # is reported if it exceeds the benchmark process (ru_maxrss is in KiB)
+        self.fmt(self.path, mode="r").validate(level=level)
+        return 1024 * max(
+            resource.getrusage(who).ru_maxrss
+            for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)
+        )
+
+    track_peakmem_validate.unit = "bytes"
+
+
+class MSPValidation(_InProcessValidation):
+    fmt = MSPDirFmt
+    sizes = [1000, 10_000, 100_000]
+    params = (sizes, LEVELS)
+    param_names = ["n_spectra", "level"]
+
+    def write(self, path, size):
+        os.makedirs(path, exist_ok=True)
+        write_msp(os.path.join(path, "library.msp"), n_spectra=size)
+
+    def time_validate_file(self, size, level):
+        MSPFormat(_file_in(self.path, ".msp"), mode="r").validate(level=level)
+
+    def peakmem_validate_file(self, size, level):
+        MSPFormat(_file_in(self.path, ".msp"), mode="r").validate(level=level)
+
+
+class MatchedSpectraValidation(_InProcessValidation):
+    fmt = MatchedSpectraDirFmt
+    sizes = [10_000, 100_000, 1_000_000]
+    params = (sizes, LEVELS)
+    param_names = ["n_rows", "level"]
+
+    def write(self, path, size):
+        write_matched_spectra_dir(path, n_rows=size)
+
+    def time_validate_file(self, size, level):
+        MatchedSpectraFormat(_file_in(self.path, ".txt"), mode="r").validate(
+            level=level
+        )
+
+    def peakmem_validate_file(self, size, level):
+        MatchedSpectraFormat(_file_in(self.path, ".txt"), mode="r").validate(
+            level=level
+        )
+
+
+class XCMSExperimentValidation(_InProcessValidation):
+    fmt = XCMSExperimentDirFmt
+    sizes = [1000, 10_000, 100_000]
+    params = (sizes, LEVELS)
+    param_names = ["n_chrom_peaks", "level"]
+
+    def write(self, path, size):
+        write_xcms_experiment(
+            path,
+            n_samples=4,
+            n_spectra=size // 10,
+            n_peaks=size,
+            n_features=size // 10,
+        )
@@ -0,0 +1,139 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# "log" emits the metrics as records of the q2_ms.metrics logger, any other value
+# is the path of a file the metrics are appended to as JSON lines.
+METRICS_ENV = "Q2_MS_METRICS"
+
+logger = logging.getLogger("q2_ms.metrics")
+
+# Metrics of the innermost running measurement
+_CURRENT = contextvars.ContextVar("q2_ms_metrics", default=None)
+
+# Number of running measurements across threads and whether they started
+# tracemalloc, which is stopped again when the last of them exits
+_TRACING_LOCK = threading.Lock()
+_TRACING = {"active": 0, "started": False}
+
+
+def metrics_enabled():
+    return bool(os.environ.get(METRICS_ENV))
+
+
+def _bytes_read():
+    """Returns the bytes this process has read so far, None if unknown."""
+    try:
+        with open("/proc/self/io") as file:
+            for line in file:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _emit(record):
+    target = os.environ.get(METRICS_ENV, "")
+    if target.lower() in ("log", "1", "true"):
+        logger.info(json.dumps(record), extra={"q2_ms_metrics": record})
+        return
+
+    # Single appends of a line are atomic, so worker processes can share the file
+    with open(target, "a") as file:
+        file.write(json.dumps(record) + "\n")
+
+
+def count(**counts):
+    """Adds `counts` (e.g. rows=10) to the innermost running measurement."""
+    metrics = _CURRENT.get()
+    if metrics is not None:
+        metrics["counts"].update(counts)
+
+
+def _start_tracing():
+    with _TRACING_LOCK:
+        if _TRACING["active"] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _TRACING["started"] = True
+        _TRACING["active"] += 1
+
+
+def _stop_tracing():
+    # Tracing slows down every allocation, so it only runs while measuring
+    with _TRACING_LOCK:
+        _TRACING["active"] -= 1
+        if _TRACING["active"] == 0 and _TRACING["started"]:
+            tracemalloc.stop()
+            _TRACING["started"] = False
+
+
+@contextlib.contextmanager
+def measure(name, **fields):
+    """
+    Measures the enclosed block if enabled by Q2_MS_METRICS and emits a record
+    with its `name`, `fields`, wall time, bytes read by the process, peak
+    memory allocated above the memory at the start (traced by tracemalloc,
+    which is stopped again when the outermost measurement exits),
+    any counts added by `count` and the error raised, if any. Yields the dict
+    of `fields`, which the block may extend.
+    """
+    if not metrics_enabled():
+        yield fields
+        return
+
+    _start_tracing()
+    parent = _CURRENT.get()
+    if parent is not None:
+        # Keep the peak of the enclosing measurement before resetting it
+        parent["_peak"] = max(parent["_peak"], tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    start_memory = tracemalloc.get_traced_memory()[0]
+
+    metrics = {"counts": Counter(), "_peak": 0}
+    token = _CURRENT.set(metrics)
+    start_read, start = _bytes_read(), time.perf_counter()
+    error = None
+    try:
+        yield fields
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        wall_time = time.perf_counter() - start
+        end_read = _bytes_read()
+        peak = max(metrics["_peak"], tracemalloc.get_traced_memory()[1])
+        _CURRENT.reset(token)
+        if parent is not None:
+            parent["_peak"] = max(parent["_peak"], peak)
+            parent["counts"].update(metrics["counts"])
+        tracemalloc.reset_peak()
+        _stop_tracing()
+
+        _emit(
+            {
+                "name": name,
+                **fields,
+                "wall_time": wall_time,
+                "bytes_read": (
+                    end_read - start_read if start_read is not None else None
+                ),
+                "peak_memory": max(peak - start_memory, 0),
+                "counts": dict(metrics["counts"]),
+                "error": error,
+                "pid": os.getpid(),
+            }
+        )
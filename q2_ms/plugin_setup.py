@@ -5,25 +5,75 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+import importlib
+
+from q2_types.feature_table import FeatureTable, Frequency
+from q2_types.metadata import ImmutableMetadata
 from q2_types.sample_data import SampleData
-from qiime2.plugin import Citations, Plugin
+from qiime2.plugin import (
+    Bool,
+    Choices,
+    Citations,
+    Float,
+    Int,
+    Metadata,
+    Plugin,
+    Range,
+    Str,
+    TypeMap,
+    TypeMatch,
+)
 
 from q2_ms import __version__
+from q2_ms.spectra.chromatograms import extract_chromatograms
+from q2_ms.spectra.filtering import filter_matched_spectra
+from q2_ms.spectra.indexing import index_mzml, store_peaks
+from q2_ms.spectra.matching import (
+    bin_library,
+    convert_library,
+    index_library,
+    match_spectra,
+)
+from q2_ms.spectra.preprocessing import filter_library_peaks
+from q2_ms.spectra.xic import extract_ion_chromatograms
 from q2_ms.types import (
     MSP,
+    BinnedSpectralLibrary,
+    BinnedSpectralLibraryDirFmt,
+    BinnedSpectralLibraryMetadataFormat,
+    Chromatograms,
+    ChromatogramsDirFmt,
+    ChromatogramsFormat,
+    ColumnarSpectralLibrary,
+    ColumnarTableSchemaFormat,
+    ColumnarXCMSExperiment,
+    CompactMatchedSpectra,
+    CompressedPeaksFormat,
+    IndexedSpectralLibrary,
+    IndexedSpectralLibraryDirFmt,
+    IonChromatograms,
+    IonChromatogramsDirFmt,
+    IonChromatogramsFormat,
+    LSHIndexMetadataFormat,
     MatchedSpectra,
+    MatchedSpectraBinaryDirFmt,
     MatchedSpectraDirFmt,
     MatchedSpectraFormat,
+    MS1PeakIndexDirFmt,
+    MS1PeakIndexMetadataFormat,
     MSBackendDataFormat,
     MSExperimentLinkMColsFormat,
     MSExperimentSampleDataFormat,
     MSExperimentSampleDataLinksSpectra,
     MSPDirFmt,
     MSPFormat,
+    NumpyArrayFormat,
+    SpectralLibraryDirFmt,
     SpectraSlotsFormat,
     XCMSExperiment,
     XCMSExperimentChromPeakDataFormat,
     XCMSExperimentChromPeaksFormat,
+    XCMSExperimentColumnarDirFmt,
     XCMSExperimentDirFmt,
     XCMSExperimentFeatureDefinitionsFormat,
     XCMSExperimentFeaturePeakIndexFormat,
@@ -31,8 +81,15 @@ from q2_ms.types import (
     mzML,
     mzMLDirFmt,
     mzMLFormat,
+    mzMLOffsetIndexFormat,
+    mzMLPeaks,
+    mzMLPeaksDirFmt,
+    mzMLSampleFormat,
 )
-from q2_ms.xcms.database import fetch_massbank
+from q2_ms.xcms.columnar import convert_xcms_experiment
+from q2_ms.xcms.database import fetch_massbank, update_massbank
+from q2_ms.xcms.feature_table import build_feature_table
+from q2_ms.xcms.indexing import index_xcms_experiment
 
 citations = Citations.load("citations.bib", package="q2_ms")
 
@@ -49,14 +106,482 @@ plugin.methods.register_function(
     function=fetch_massbank,
     inputs={},
     outputs=[("massbank", MSP)],
-    parameters={},
+    parameters={"offline": Bool},
     input_descriptions={},
     output_descriptions={"massbank": "MassBank spectral library in NIST MSP format."},
-    parameter_descriptions={},
+    parameter_descriptions={
+        "offline": (
+            "Use the cached copy of the most recently fetched release without "
+            "accessing the network."
+        )
+    },
     name="Fetch MassBank spectral library",
     description=(
         "Fetch the latest MassBank spectral library in NIST MSP format. It is "
-        "downloaded from github.com/MassBank/MassBank-data."
+        "downloaded from github.com/MassBank/MassBank-data. Interrupted downloads "
+        "are resumed and the file is verified against the release checksum. "
+        "Releases are cached locally (in the directory set by Q2_MS_CACHE_DIR, "
+        "limited to Q2_MS_CACHE_SIZE bytes) and only downloaded again if a new "
+        "release was published."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=update_massbank,
+    inputs={"library": MSP},
+    outputs=[("massbank", MSP), ("changes", ImmutableMetadata)],
+    parameters={"offline": Bool},
+    input_descriptions={"library": "Previously fetched MassBank spectral library."},
+    output_descriptions={
+        "massbank": "MassBank spectral library of the latest release.",
+        "changes": (
+            "Change of each record between the two libraries, by DB# accession: "
+            "'added', 'removed', 'spectrum' if its peaks (Splash) changed, "
+            "'metadata' if only other fields changed, or 'unchanged'."
+        ),
+    },
+    parameter_descriptions={
+        "offline": (
+            "Use the cached copy of the most recently fetched release without "
+            "accessing the network."
+        )
+    },
+    name="Update MassBank spectral library",
+    description=(
+        "Fetch the latest MassBank release like fetch-massbank and compare it "
+        "with an existing library record by record, using the DB# accession "
+        "and Splash hash. The change summary allows results derived from the "
+        "library to be refreshed for the changed records only."
+    ),
+    citations=[],
+)
+
+P_compact, T_matched_spectra = TypeMap(
+    {
+        Bool % Choices(False): MatchedSpectra,
+        Bool % Choices(True): CompactMatchedSpectra,
+    }
+)
+
+plugin.methods.register_function(
+    function=match_spectra,
+    inputs={
+        "query": SampleData[mzML | mzMLPeaks] | MSP | ColumnarSpectralLibrary,
+        "library": (
+            MSP
+            | ColumnarSpectralLibrary
+            | BinnedSpectralLibrary
+            | IndexedSpectralLibrary
+        ),
+    },
+    outputs=[("matched_spectra", T_matched_spectra)],
+    parameters={
+        "method": Str % Choices(["cosine", "modified_cosine"]),
+        "bin_width": Float % Range(0, None, inclusive_start=False),
+        "ppm": Float % Range(0, None),
+        "min_score": Float % Range(0, 1, inclusive_end=True),
+        "search": Str % Choices(["exact", "approximate"]),
+        "threads": Int % Range(1, None),
+        "compact": P_compact,
+    },
+    input_descriptions={
+        "query": (
+            "Query spectra. All MS2 spectra are used if mzML files or stored "
+            "peaks are provided."
+        ),
+        "library": (
+            "Spectral library to match the query spectra against. Its binned "
+            "spectra are reused if it was binned with the same bin width."
+        ),
+    },
+    output_descriptions={
+        "matched_spectra": "Library spectra matching each query spectrum."
+    },
+    parameter_descriptions={
+        "method": (
+            "Similarity score. The modified cosine also matches peaks shifted by "
+            "the precursor m/z difference."
+        ),
+        "bin_width": "Width of the m/z bins the peaks are summed into.",
+        "ppm": (
+            "Maximum precursor m/z difference in ppm for a library spectrum to be "
+            "scored against a query spectrum."
+        ),
+        "min_score": "Minimum score of the reported matches.",
+        "search": (
+            "How candidates are found. 'exact' scores all library spectra within "
+            "the precursor tolerance. 'approximate' scores the library spectra "
+            "sharing a locality-sensitive hashing bucket with the query, whatever "
+            "their precursor m/z, using the index of an indexed library or one "
+            "built with the default settings. Candidates are scored exactly."
+        ),
+        "threads": "Number of processes the query spectra are distributed over.",
+        "compact": (
+            "Store the matches in the binary CompactMatchedSpectra layout, with "
+            "each target spectrum ID stored once, instead of the MatchedSpectra "
+            "text table read by R."
+        ),
+    },
+    name="Match spectra against a spectral library",
+    description=(
+        "Match query spectra against a spectral library. Library spectra with a "
+        "precursor m/z within the tolerance and the same ion mode are scored with "
+        "the cosine or modified cosine similarity of their binned peaks."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=convert_library,
+    inputs={"library": MSP},
+    outputs=[("columnar_library", ColumnarSpectralLibrary)],
+    parameters={},
+    input_descriptions={"library": "Spectral library in MSP format."},
+    output_descriptions={
+        "columnar_library": "The spectral library in the columnar layout."
+    },
+    parameter_descriptions={},
+    name="Convert a spectral library to the columnar layout",
+    description=(
+        "Parse an MSP spectral library once and store its peaks and metadata as "
+        "memory-mappable arrays. Actions taking the converted library load it "
+        "without tokenizing the MSP file again."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=bin_library,
+    inputs={"library": MSP | ColumnarSpectralLibrary},
+    outputs=[("binned_library", BinnedSpectralLibrary)],
+    parameters={"bin_width": Float % Range(0, None, inclusive_start=False)},
+    input_descriptions={"library": "Spectral library."},
+    output_descriptions={
+        "binned_library": "The spectral library with its binned spectra."
+    },
+    parameter_descriptions={
+        "bin_width": (
+            "Width of the m/z bins the peaks are summed into. Must equal the bin "
+            "width of the matching runs for the binned spectra to be reused."
+        ),
+    },
+    name="Bin a spectral library",
+    description=(
+        "Bin the peaks of all spectra of a spectral library into normalized peak "
+        "vectors once, so that matching query spectra against the library does "
+        "not bin it again on every run."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=index_library,
+    inputs={"library": MSP | ColumnarSpectralLibrary},
+    outputs=[("indexed_library", IndexedSpectralLibrary)],
+    parameters={
+        "bin_width": Float % Range(0, None, inclusive_start=False),
+        "hash_bin_width": Float % Range(0, None, inclusive_start=False),
+        "n_tables": Int % Range(1, None),
+        "n_bits": Int % Range(1, 64, inclusive_end=True),
+        "seed": Int % Range(0, None),
+    },
+    input_descriptions={"library": "Spectral library."},
+    output_descriptions={
+        "indexed_library": (
+            "The spectral library with its binned spectra and their "
+            "locality-sensitive hashing index."
+        )
+    },
+    parameter_descriptions={
+        "bin_width": (
+            "Width of the m/z bins the peaks are summed into for scoring. Must "
+            "equal the bin width of the matching runs for the binned spectra to "
+            "be reused."
+        ),
+        "hash_bin_width": (
+            "Width of the m/z bins the peaks are summed into for hashing. Wider "
+            "bins make the hashes robust to small m/z deviations."
+        ),
+        "n_tables": (
+            "Number of hash tables. More tables find more of the similar "
+            "spectra at the cost of more candidates."
+        ),
+        "n_bits": (
+            "Number of bits of the hash codes. More bits make the candidates "
+            "more similar to the query but find fewer of them per table."
+        ),
+        "seed": "Seed of the random hyperplanes the spectra are hashed with.",
+    },
+    name="Index a spectral library for approximate search",
+    description=(
+        "Bin the spectra of a spectral library and index them with random "
+        "hyperplane locality-sensitive hashing, so that match-spectra can find "
+        "similar library spectra without comparing each query to all spectra "
+        "within the precursor tolerance."
+    ),
+    citations=[],
+)
+
+T_filtered_spectra = TypeMatch([MatchedSpectra, CompactMatchedSpectra])
+
+plugin.methods.register_function(
+    function=filter_matched_spectra,
+    inputs={"matched_spectra": T_filtered_spectra},
+    outputs=[("filtered_matched_spectra", T_filtered_spectra)],
+    parameters={
+        "top_k": Int % Range(1, None),
+        "min_score": Float % Range(0, 1, inclusive_end=True),
+    },
+    input_descriptions={"matched_spectra": "Matched spectra to filter."},
+    output_descriptions={
+        "filtered_matched_spectra": (
+            "Matched spectra passing the filters, of the same type as the input."
+        )
+    },
+    parameter_descriptions={
+        "top_k": (
+            "Number of best-scoring matches kept per query spectrum. All matches "
+            "passing the score threshold are kept if not set."
+        ),
+        "min_score": "Minimum score of the kept matches.",
+    },
+    name="Filter matched spectra",
+    description=(
+        "Filter matched spectra by score and keep only the best-scoring matches "
+        "of each query spectrum. The matches are processed in chunks, so memory "
+        "use is bounded by the number of kept matches. CompactMatchedSpectra are "
+        "filtered without converting them to text and back."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=filter_library_peaks,
+    inputs={"library": MSP},
+    outputs=[("filtered_library", MSP)],
+    parameters={
+        "top_n": Int % Range(1, None),
+        "min_relative_intensity": Float % Range(0, 1, inclusive_end=True),
+        "remove_above_precursor_mz": Bool,
+        "sqrt_scale": Bool,
+        "min_peaks": Int % Range(0, None),
+    },
+    input_descriptions={"library": "Spectral library in MSP format."},
+    output_descriptions={"filtered_library": "The filtered spectral library."},
+    parameter_descriptions={
+        "top_n": "Keep only this many of the most intense peaks of each spectrum.",
+        "min_relative_intensity": (
+            "Remove peaks with an intensity below this fraction of the most "
+            "intense peak of their spectrum."
+        ),
+        "remove_above_precursor_mz": (
+            "Remove peaks with an m/z above the precursor m/z of their spectrum. "
+            "Spectra without precursor m/z are kept unchanged."
+        ),
+        "sqrt_scale": "Replace the intensities by their square roots.",
+        "min_peaks": "Drop spectra with fewer peaks left than this.",
+    },
+    name="Filter library peaks",
+    description=(
+        "Filter the peaks of a spectral library and scale their intensities. "
+        "The steps are applied in the order: removal of peaks above the "
+        "precursor m/z, relative intensity cutoff, top-N peaks, minimum number "
+        "of peaks and square root scaling. Spectra are streamed one at a time, "
+        "so memory use does not depend on the library size."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=index_mzml,
+    inputs={"spectra": SampleData[mzML]},
+    outputs=[("indexed_spectra", SampleData[mzML])],
+    parameters={"threads": Int % Range(1, None)},
+    input_descriptions={"spectra": "mzML files of the samples."},
+    output_descriptions={
+        "indexed_spectra": "The same mzML files with a spectrum offset index."
+    },
+    parameter_descriptions={
+        "threads": "Number of processes the samples are distributed over."
+    },
+    name="Index mzML files",
+    description=(
+        "Build the spectrum ID to byte offset index of each mzML file once and "
+        "store it in the artifact, so that individual spectra can be read "
+        "without parsing the file up to them. This is mainly useful for mzML "
+        "files written without an index."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=store_peaks,
+    inputs={"spectra": SampleData[mzML]},
+    outputs=[("peaks", SampleData[mzMLPeaks])],
+    parameters={"threads": Int % Range(1, None)},
+    input_descriptions={"spectra": "mzML files of the samples."},
+    output_descriptions={
+        "peaks": "Decoded peaks and metadata of all spectra of the samples."
+    },
+    parameter_descriptions={
+        "threads": "Number of processes the samples are distributed over."
+    },
+    name="Store decoded mzML peaks",
+    description=(
+        "Decode the peaks of all spectra once and store them as compressed "
+        "arrays with the spectrum metadata. Spectral matching and ion "
+        "chromatogram extraction accept the result in place of the mzML files "
+        "and skip parsing and decoding them."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=extract_chromatograms,
+    inputs={"spectra": SampleData[mzML]},
+    outputs=[("chromatograms", SampleData[Chromatograms])],
+    parameters={
+        "ms_level": Int % Range(1, None),
+        "recompute": Bool,
+        "threads": Int % Range(1, None),
+    },
+    input_descriptions={"spectra": "mzML files of the samples."},
+    output_descriptions={
+        "chromatograms": (
+            "Retention time, total ion current and base peak intensity and m/z "
+            "of each spectrum of the samples."
+        )
+    },
+    parameter_descriptions={
+        "ms_level": "MS level of the spectra the chromatograms are built from.",
+        "recompute": (
+            "Compute the total ion current and base peak from the peaks of each "
+            "spectrum even if the spectrum header reports them."
+        ),
+        "threads": "Number of processes the samples are distributed over.",
+    },
+    name="Extract TIC and BPC chromatograms",
+    description=(
+        "Extract the total ion chromatogram (TIC) and base peak chromatogram "
+        "(BPC) of each sample for quality control. Spectra are streamed one at "
+        "a time and their peaks are only decoded if the spectrum header does not "
+        "report the total ion current and base peak."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=extract_ion_chromatograms,
+    inputs={"spectra": SampleData[mzML | mzMLPeaks]},
+    outputs=[("ion_chromatograms", SampleData[IonChromatograms])],
+    parameters={
+        "targets": Metadata,
+        "ppm": Float % Range(0, None, inclusive_start=False),
+        "aggregation": Str % Choices(["sum", "max"]),
+    },
+    input_descriptions={"spectra": "mzML files or stored peaks of the samples."},
+    output_descriptions={
+        "ion_chromatograms": (
+            "Retention time and intensity of each MS1 spectrum within the "
+            "retention time window of each target, per sample."
+        )
+    },
+    parameter_descriptions={
+        "targets": (
+            "Targets to extract, identified by their ID, with the columns 'mz' "
+            "and optionally 'rt_min' and 'rt_max' (seconds). Missing retention "
+            "time bounds extend the window to the start or end of the run."
+        ),
+        "ppm": "m/z tolerance around the m/z of each target in ppm.",
+        "aggregation": (
+            "How the intensities of multiple peaks of a spectrum within the m/z "
+            "window are combined."
+        ),
+    },
+    name="Extract ion chromatograms",
+    description=(
+        "Extract the ion chromatograms (XICs) of many targets across all "
+        "samples in one pass. The MS1 peaks of each sample are indexed by m/z "
+        "and retention time once, after which each target is a range lookup "
+        "rather than a scan of the file."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=index_xcms_experiment,
+    inputs={"xcms_experiment": XCMSExperiment},
+    outputs=[("indexed_xcms_experiment", XCMSExperiment)],
+    parameters={},
+    input_descriptions={
+        "xcms_experiment": "XCMSExperiment with grouped chromatographic peaks."
+    },
+    output_descriptions={
+        "indexed_xcms_experiment": (
+            "The XCMSExperiment with the CSR arrays of its feature peak index."
+        )
+    },
+    parameter_descriptions={},
+    name="Index the feature peak assignments of an XCMSExperiment",
+    description=(
+        "Store the assignments of chromatographic peaks to features as CSR "
+        "arrays in both directions next to the feature peak index table, so "
+        "that the peaks of a feature and the features of a peak are found "
+        "without scanning the table. build-feature-table uses the arrays if "
+        "present."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=convert_xcms_experiment,
+    inputs={"xcms_experiment": XCMSExperiment},
+    outputs=[("columnar_xcms_experiment", ColumnarXCMSExperiment)],
+    parameters={},
+    input_descriptions={"xcms_experiment": "XCMSExperiment to convert."},
+    output_descriptions={
+        "columnar_xcms_experiment": "The XCMSExperiment in the columnar layout."
+    },
+    parameter_descriptions={},
+    name="Convert an XCMSExperiment to the columnar layout",
+    description=(
+        "Parse the MS backend data and chromatographic peak tables of an "
+        "XCMSExperiment once and store them as memory-mappable columns. "
+        "Actions taking the converted experiment read only the columns they "
+        "need. Index the experiment before converting it to keep the feature "
+        "peak index arrays."
+    ),
+    citations=[],
+)
+
+plugin.methods.register_function(
+    function=build_feature_table,
+    inputs={"xcms_experiment": XCMSExperiment | ColumnarXCMSExperiment},
+    outputs=[("feature_table", FeatureTable[Frequency])],
+    parameters={
+        "value": Str % Choices(["into", "maxo"]),
+        "method": Str % Choices(["maxint", "sum"]),
+    },
+    input_descriptions={
+        "xcms_experiment": "XCMSExperiment with grouped chromatographic peaks."
+    },
+    output_descriptions={"feature_table": "Feature abundances per sample."},
+    parameter_descriptions={
+        "value": (
+            "Peak value reported as abundance: the integrated peak intensity "
+            "('into') or the maximum peak intensity ('maxo')."
+        ),
+        "method": (
+            "How multiple peaks of a feature in one sample are resolved: report "
+            "the value of the peak with the highest maximum intensity ('maxint') "
+            "or the sum of all peak values ('sum')."
+        ),
+    },
+    name="Build feature table",
+    description=(
+        "Build a feature table from the grouped chromatographic peaks of an "
+        "XCMSExperiment. Samples are named after their raw data files."
     ),
     citations=[],
 )
@@ -64,24 +589,60 @@ plugin.methods.register_function(
 # Registrations
 plugin.register_semantic_types(
     mzML,
+    mzMLPeaks,
     XCMSExperiment,
+    ColumnarXCMSExperiment,
     MSP,
+    ColumnarSpectralLibrary,
+    BinnedSpectralLibrary,
+    IndexedSpectralLibrary,
     MatchedSpectra,
+    CompactMatchedSpectra,
+    Chromatograms,
+    IonChromatograms,
 )
 
 plugin.register_semantic_type_to_format(SampleData[mzML], artifact_format=mzMLDirFmt)
+plugin.register_semantic_type_to_format(
+    SampleData[mzMLPeaks], artifact_format=mzMLPeaksDirFmt
+)
 plugin.register_semantic_type_to_format(
     XCMSExperiment, artifact_format=XCMSExperimentDirFmt
 )
+plugin.register_semantic_type_to_format(
+    ColumnarXCMSExperiment, artifact_format=XCMSExperimentColumnarDirFmt
+)
 plugin.register_semantic_type_to_format(MSP, artifact_format=MSPDirFmt)
+plugin.register_semantic_type_to_format(
+    ColumnarSpectralLibrary, artifact_format=SpectralLibraryDirFmt
+)
+plugin.register_semantic_type_to_format(
+    BinnedSpectralLibrary, artifact_format=BinnedSpectralLibraryDirFmt
+)
+plugin.register_semantic_type_to_format(
+    IndexedSpectralLibrary, artifact_format=IndexedSpectralLibraryDirFmt
+)
 plugin.register_semantic_type_to_format(
     MatchedSpectra, artifact_format=MatchedSpectraDirFmt
 )
+plugin.register_semantic_type_to_format(
+    CompactMatchedSpectra, artifact_format=MatchedSpectraBinaryDirFmt
+)
+plugin.register_semantic_type_to_format(
+    SampleData[Chromatograms], artifact_format=ChromatogramsDirFmt
+)
+plugin.register_semantic_type_to_format(
+    SampleData[IonChromatograms], artifact_format=IonChromatogramsDirFmt
+)
 
 
 plugin.register_formats(
     mzMLFormat,
+    mzMLSampleFormat,
     mzMLDirFmt,
+    mzMLOffsetIndexFormat,
+    mzMLPeaksDirFmt,
+    CompressedPeaksFormat,
     MSBackendDataFormat,
     MSExperimentLinkMColsFormat,
     MSExperimentSampleDataFormat,
@@ -97,4 +658,21 @@ plugin.register_formats(
     MSPDirFmt,
     MatchedSpectraFormat,
     MatchedSpectraDirFmt,
+    MatchedSpectraBinaryDirFmt,
+    NumpyArrayFormat,
+    SpectralLibraryDirFmt,
+    BinnedSpectralLibraryMetadataFormat,
+    BinnedSpectralLibraryDirFmt,
+    LSHIndexMetadataFormat,
+    IndexedSpectralLibraryDirFmt,
+    ColumnarTableSchemaFormat,
+    ChromatogramsFormat,
+    ChromatogramsDirFmt,
+    IonChromatogramsFormat,
+    IonChromatogramsDirFmt,
+    MS1PeakIndexMetadataFormat,
+    MS1PeakIndexDirFmt,
+    XCMSExperimentColumnarDirFmt,
 )
+
+importlib.import_module("q2_ms.types._transformer")
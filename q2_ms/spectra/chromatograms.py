@@ -0,0 +1,96 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from q2_ms._metrics import count, measure
+from q2_ms.types import ChromatogramsDirFmt, mzMLDirFmt, mzMLSampleFormat
+from q2_ms.types._chromatograms import CHROMATOGRAM_COLUMNS
+from q2_ms.types._mzml import open_mzml
+from q2_ms.types._peaks import _retention_time
+
+# cvParams of the total ion current, base peak intensity and base peak m/z
+TIC = "MS:1000285"
+BASE_PEAK_INTENSITY = "MS:1000505"
+BASE_PEAK_MZ = "MS:1000504"
+
+
+def _summarize(spectrum, recompute):
+    """Returns the TIC, base peak intensity and base peak m/z of a spectrum."""
+    if not recompute:
+        tic, bpc, bpc_mz = (
+            spectrum.get(accession)
+            for accession in (TIC, BASE_PEAK_INTENSITY, BASE_PEAK_MZ)
+        )
+        if tic is not None and bpc is not None and bpc_mz is not None:
+            return float(tic), float(bpc), float(bpc_mz)
+
+    # The peaks are only decoded if the header lacks the values
+    intensity = np.asarray(spectrum.i, dtype=np.float64)
+    if len(intensity) == 0:
+        return 0.0, 0.0, np.nan
+    base_peak = int(intensity.argmax())
+    return float(intensity.sum()), float(intensity[base_peak]), spectrum.mz[base_peak]
+
+
+def sample_chromatograms(path, ms_level=1, recompute=False):
+    """
+    Streams the spectra of an mzML file and returns the TIC and BPC of the
+    spectra of one MS level as a DataFrame of CHROMATOGRAM_COLUMNS, without
+    the sample ID.
+    """
+    rows = []
+    with measure("sample_chromatograms", path=path):
+        reader = open_mzml(path)
+        for index, spectrum in enumerate(reader):
+            if spectrum.ms_level != ms_level:
+                continue
+            rows.append(
+                (index, _retention_time(spectrum), *_summarize(spectrum, recompute))
+            )
+        reader.close()
+        count(spectra=len(rows))
+
+    return pd.DataFrame(rows, columns=CHROMATOGRAM_COLUMNS[1:])
+
+
+def extract_chromatograms(
+    spectra: mzMLDirFmt, ms_level: int = 1, recompute: bool = False, threads: int = 1
+) -> ChromatogramsDirFmt:
+    """
+    Extracts the total ion chromatogram (TIC) and base peak chromatogram (BPC)
+    of each sample. Samples are processed in parallel by `threads` processes
+    and written to the output in sample order as they complete.
+    """
+    paths = [str(view) for _, view in spectra.mzml.iter_views(mzMLSampleFormat)]
+    sample_ids = [os.path.basename(path).rsplit(".", 1)[0] for path in paths]
+    extract = partial(sample_chromatograms, ms_level=ms_level, recompute=recompute)
+
+    chromatograms = ChromatogramsDirFmt()
+    with open(os.path.join(str(chromatograms), "chromatograms.tsv"), "w") as file:
+        file.write("\t".join(CHROMATOGRAM_COLUMNS) + "\n")
+
+        def write(sample_id, table):
+            table.insert(0, "sample_id", sample_id)
+            table.to_csv(
+                file, sep="\t", header=False, index=False, float_format="%.10g"
+            )
+
+        if threads == 1 or len(paths) < 2:
+            for sample_id, path in zip(sample_ids, paths):
+                write(sample_id, extract(path))
+        else:
+            with ProcessPoolExecutor(max_workers=min(threads, len(paths))) as executor:
+                for sample_id, table in zip(sample_ids, executor.map(extract, paths)):
+                    write(sample_id, table)
+
+    return chromatograms
@@ -0,0 +1,86 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import numpy as np
+
+from q2_ms.types import MatchedSpectraBinaryDirFmt
+from q2_ms.types._matched import CHUNK_ROWS, create_matches, open_matches
+
+
+def _chunks(n_rows):
+    for start in range(0, n_rows, CHUNK_ROWS):
+        yield slice(start, start + CHUNK_ROWS)
+
+
+def top_k_per_query(query, target, score, k):
+    """
+    Returns the rows of the `k` highest scores of each query, ordered by query
+    and descending score. Ties are resolved in favour of the earlier rows.
+    """
+    order = np.lexsort((-score, query))
+    query, target, score = query[order], target[order], score[order]
+
+    starts = np.flatnonzero(np.diff(query, prepend=query[:1] - 1))
+    counts = np.diff(np.append(starts, len(query)))
+    rank = np.arange(len(query)) - np.repeat(starts, counts)
+    keep = rank < k
+    return query[keep], target[keep], score[keep]
+
+
+def filter_matched_spectra(
+    matched_spectra: MatchedSpectraBinaryDirFmt,
+    top_k: int = None,
+    min_score: float = 0.0,
+) -> MatchedSpectraBinaryDirFmt:
+    """
+    Keeps the matches with a score of at least `min_score` and, if `top_k` is
+    given, only the `top_k` best of those per query spectrum.
+
+    The matches are streamed in chunks of CHUNK_ROWS rows. With `top_k`, the
+    best matches found so far are merged with each chunk, so memory is bounded
+    by `top_k` matches per query plus one chunk, and the result is ordered by
+    query and descending score. Otherwise the input order is kept and the
+    filtered matches are written to memory-mapped arrays in a second pass.
+    """
+    query, target, score, target_ids = open_matches(str(matched_spectra))
+    filtered = MatchedSpectraBinaryDirFmt()
+
+    if top_k is not None:
+        kept = (
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.float32),
+        )
+        for chunk in _chunks(len(query)):
+            hits = score[chunk] >= min_score
+            kept = top_k_per_query(
+                *(
+                    np.concatenate((kept_column, column[chunk][hits]))
+                    for kept_column, column in zip(kept, (query, target, score))
+                ),
+                top_k,
+            )
+        columns = create_matches(str(filtered), len(kept[0]), target_ids)
+        for column, values in zip(columns, kept):
+            column[:] = values
+            column.flush()
+        return filtered
+
+    n_hits = sum(
+        np.count_nonzero(score[chunk] >= min_score) for chunk in _chunks(len(query))
+    )
+    columns = create_matches(str(filtered), n_hits, target_ids)
+    start = 0
+    for chunk in _chunks(len(query)):
+        hits = score[chunk] >= min_score
+        stop = start + np.count_nonzero(hits)
+        for column, values in zip(columns, (query, target, score)):
+            column[start:stop] = values[chunk][hits]
+        start = stop
+    for column in columns:
+        column.flush()
+    return filtered
@@ -0,0 +1,60 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from q2_ms.types import mzMLDirFmt, mzMLPeaksDirFmt, mzMLSampleFormat
+from q2_ms.types._mzml import write_offset_index
+from q2_ms.types._peaks import write_peak_store
+
+
+def index_mzml(spectra: mzMLDirFmt, threads: int = 1) -> mzMLDirFmt:
+    """
+    Builds the spectrum offset index of each sample and stores it next to the
+    mzML file as <sample>.mzML.offsets.npy. Readers opened with open_mzml then
+    seek directly to a spectrum instead of parsing the file up to it. The mzML
+    files are hard-linked into the result if possible.
+    """
+    indexed = mzMLDirFmt()
+
+    paths = []
+    for relpath, view in spectra.mzml.iter_views(mzMLSampleFormat):
+        path = os.path.join(str(indexed), str(relpath))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # The mzML files are not modified, so they can be shared
+            os.link(str(view), path)
+        except OSError:
+            shutil.copyfile(str(view), path)
+        paths.append(path)
+
+    if threads == 1 or len(paths) < 2:
+        for path in paths:
+            write_offset_index(path)
+    else:
+        with ProcessPoolExecutor(max_workers=min(threads, len(paths))) as executor:
+            list(executor.map(write_offset_index, paths))
+
+    return indexed
+
+
+def store_peaks(spectra: mzMLDirFmt, threads: int = 1) -> mzMLPeaksDirFmt:
+    """
+    Decodes the peaks of all spectra of each sample once and stores them
+    compressed in chunks together with the spectrum metadata (see
+    write_peak_store). Spectral matching and ion chromatogram extraction read
+    the stored arrays instead of parsing and decoding the mzML files again.
+    """
+    peaks = mzMLPeaksDirFmt()
+    write_peak_store(
+        [str(view) for _, view in spectra.mzml.iter_views(mzMLSampleFormat)],
+        str(peaks),
+        max_workers=threads,
+    )
+    return peaks
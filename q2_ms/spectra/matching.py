@@ -0,0 +1,337 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from q2_ms._metrics import count, measure
+from q2_ms.types import (
+    BinnedSpectralLibraryDirFmt,
+    IndexedSpectralLibraryDirFmt,
+    LSHIndex,
+    MatchedSpectraBinaryDirFmt,
+    SpectralLibrary,
+    SpectralLibraryDirFmt,
+)
+from q2_ms.types._binned import (
+    bin_spectra,
+    library_matrix,
+    n_bins_for,
+    save_binned,
+    widen,
+)
+from q2_ms.types._library import _encode
+from q2_ms.types._lsh import HASH_BIN_WIDTH, N_BITS, N_TABLES
+from q2_ms.types._matched import create_matches
+
+# Number of query spectra handed to a worker at once and maximum number of
+# query-library pairs scored in one vectorized batch.
+QUERY_CHUNK_SIZE = 512
+PAIR_BATCH_SIZE = 20000
+
+# Arguments shared by all chunks of a worker process, set by _init_worker.
+_WORKER_KWARGS = {}
+
+
+def _gather_rows(matrix, rows):
+    """Returns the pair number, column and value of all entries of `rows`."""
+    starts = matrix.indptr[rows]
+    counts = matrix.indptr[np.asarray(rows) + 1] - starts
+    pairs = np.repeat(np.arange(len(rows)), counts)
+    positions = (
+        np.arange(counts.sum())
+        - np.repeat(np.cumsum(counts) - counts, counts)
+        + np.repeat(starts, counts)
+    )
+    return pairs, matrix.indices[positions], matrix.data[positions]
+
+
+def pair_scores(query_matrix, library_matrix, query_rows, library_rows, shifts=None):
+    """
+    Computes the cosine similarity of each (query_rows[k], library_rows[k]) pair
+    of binned spectra.
+
+    If `shifts` is given, a modified cosine is computed instead: each query bin
+    is matched with the larger of the library bin at the same position and the
+    library bin shifted by `shifts[k]` bins (the precursor mass difference).
+    This is an approximation of the peak assignment of the exact modified cosine,
+    which is why scores are capped at 1.
+    """
+    n_bins = query_matrix.shape[1]
+    q_pairs, q_bins, q_values = _gather_rows(query_matrix, query_rows)
+    l_pairs, l_bins, l_values = _gather_rows(library_matrix, library_rows)
+
+    l_keys = l_pairs * n_bins + l_bins
+    if shifts is not None:
+        shifted = l_bins + np.asarray(shifts)[l_pairs]
+        valid = (shifted >= 0) & (shifted < n_bins)
+        l_keys = np.concatenate((l_keys, l_pairs[valid] * n_bins + shifted[valid]))
+        l_values = np.concatenate((l_values, l_values[valid]))
+
+        order = np.argsort(l_keys, kind="stable")
+        l_keys, l_values = l_keys[order], l_values[order]
+        first = np.flatnonzero(np.diff(l_keys, prepend=-1))
+        if len(first):
+            l_keys, l_values = l_keys[first], np.maximum.reduceat(l_values, first)
+
+    scores = np.zeros(len(query_rows))
+    if len(l_keys) == 0:
+        return scores
+
+    q_keys = q_pairs * n_bins + q_bins
+    found = np.minimum(np.searchsorted(l_keys, q_keys), len(l_keys) - 1)
+    match = l_keys[found] == q_keys
+    scores += np.bincount(
+        q_pairs[match],
+        weights=q_values[match] * l_values[found[match]],
+        minlength=len(query_rows),
+    )
+    return np.minimum(scores, 1.0)
+
+
+def _candidate_pairs(query, library, query_indices, ppm):
+    query_rows, library_rows = [], []
+    for i in query_indices:
+        if np.isnan(query.precursor_mz[i]):
+            continue
+        candidates = library.precursor_candidates(
+            query.precursor_mz[i], ppm=ppm, ion_mode=int(query.ion_mode[i]) or None
+        )
+        query_rows.append(np.full(len(candidates), i, dtype=np.int64))
+        library_rows.append(candidates)
+
+    if not query_rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(query_rows), np.concatenate(library_rows)
+
+
+def _lsh_candidate_pairs(query, library, lsh, query_codes, query_indices):
+    # Spectra without peaks share a bucket but cannot score above 0
+    query_indices = np.asarray(query_indices)
+    offsets = np.asarray(query.offsets)
+    query_indices = query_indices[offsets[query_indices + 1] > offsets[query_indices]]
+
+    rows, library_rows = lsh.candidates(query_codes[query_indices])
+    query_rows = query_indices[rows]
+    ion_mode = np.asarray(query.ion_mode)[query_rows]
+    same_mode = (ion_mode == 0) | (
+        np.asarray(library.ion_mode)[library_rows] == ion_mode
+    )
+    return query_rows[same_mode], library_rows[same_mode]
+
+
+def _match_chunk(
+    query_indices,
+    query,
+    library,
+    query_matrix,
+    library_matrix,
+    method,
+    bin_width,
+    ppm,
+    min_score,
+    lsh=None,
+    query_codes=None,
+):
+    """
+    Scores a chunk of query spectra against their precursor candidates or,
+    given an LSH index and the hash codes of the queries, against the library
+    spectra sharing a bucket with them. Returns the matches and the number of
+    pairs scored.
+    """
+    if lsh is None:
+        query_rows, library_rows = _candidate_pairs(query, library, query_indices, ppm)
+    else:
+        query_rows, library_rows = _lsh_candidate_pairs(
+            query, library, lsh, query_codes, query_indices
+        )
+
+    scores = np.empty(len(query_rows))
+    for start in range(0, len(query_rows), PAIR_BATCH_SIZE):
+        batch = slice(start, start + PAIR_BATCH_SIZE)
+        shifts = None
+        if method == "modified_cosine":
+            # Spectra without precursor m/z are only scored unshifted
+            shifts = np.rint(
+                np.nan_to_num(
+                    query.precursor_mz[query_rows[batch]]
+                    - library.precursor_mz[library_rows[batch]]
+                )
+                / bin_width
+            ).astype(np.int64)
+        scores[batch] = pair_scores(
+            query_matrix, library_matrix, query_rows[batch], library_rows[batch], shifts
+        )
+
+    n_pairs = len(scores)
+    hits = scores >= min_score
+    query_rows, library_rows, scores = (
+        query_rows[hits],
+        library_rows[hits],
+        scores[hits],
+    )
+    order = np.lexsort((-scores, query_rows))
+    return query_rows[order], library_rows[order], scores[order], n_pairs
+
+
+def _init_worker(kwargs):
+    _WORKER_KWARGS.update(kwargs)
+
+
+def _match_chunk_in_worker(query_indices):
+    return _match_chunk(query_indices, **_WORKER_KWARGS)
+
+
+def _write_matches(path, library, results):
+    """
+    Writes the matches of all chunks in the binary layout of matched spectra.
+    Only the IDs of the library spectra that were matched are stored.
+    """
+    columns = ([], [], [])
+    for query_rows, library_rows, scores, n_pairs in results:
+        count(pairs=n_pairs, matches=len(scores))
+        for column, values, dtype in zip(
+            columns, (query_rows + 1, library_rows, scores), ("i4", "i4", "f4")
+        ):
+            column.append(values.astype(dtype))
+
+    query, library_rows, score = (
+        np.concatenate([np.empty(0, dtype=dtype)] + column)
+        for column, dtype in zip(columns, ("i4", "i4", "f4"))
+    )
+    matched, target = np.unique(library_rows, return_inverse=True)
+    target_ids = _encode([library.spectrum_id(row) for row in matched])
+    for column, values in zip(
+        create_matches(path, len(query), target_ids), (query, target, score)
+    ):
+        column[:] = values
+        column.flush()
+
+
+def convert_library(library: SpectralLibrary) -> SpectralLibraryDirFmt:
+    """
+    Stores a spectral library in the memory-mappable columnar layout, so that
+    later actions load it without parsing the MSP file again.
+    """
+    columnar_library = SpectralLibraryDirFmt()
+    library.save(str(columnar_library))
+    return columnar_library
+
+
+def bin_library(
+    library: SpectralLibrary, bin_width: float = 0.01
+) -> BinnedSpectralLibraryDirFmt:
+    """
+    Stores a spectral library together with its spectra binned into
+    L2-normalized peak vectors of `bin_width`, so that matching against it
+    skips binning the library.
+    """
+    binned_library = BinnedSpectralLibraryDirFmt()
+    library.save(str(binned_library))
+    save_binned(bin_spectra(library, bin_width), bin_width, str(binned_library))
+    return binned_library
+
+
+def index_library(
+    library: SpectralLibrary,
+    bin_width: float = 0.01,
+    hash_bin_width: float = HASH_BIN_WIDTH,
+    n_tables: int = N_TABLES,
+    n_bits: int = N_BITS,
+    seed: int = 0,
+) -> IndexedSpectralLibraryDirFmt:
+    """
+    Stores a spectral library together with its binned spectra (see
+    bin_library) and a locality-sensitive hashing index of them, which
+    match_spectra searches with `search="approximate"`.
+    """
+    indexed_library = IndexedSpectralLibraryDirFmt()
+    library.save(str(indexed_library))
+    save_binned(bin_spectra(library, bin_width), bin_width, str(indexed_library))
+    LSHIndex.build(
+        library,
+        hash_bin_width=hash_bin_width,
+        n_tables=n_tables,
+        n_bits=n_bits,
+        seed=seed,
+    ).save(str(indexed_library))
+    return indexed_library
+
+
+def match_spectra(
+    query: SpectralLibrary,
+    library: SpectralLibrary,
+    method: str = "cosine",
+    bin_width: float = 0.01,
+    ppm: float = 10.0,
+    min_score: float = 0.7,
+    search: str = "exact",
+    threads: int = 1,
+    compact: bool = False,
+) -> MatchedSpectraBinaryDirFmt:
+    """
+    Matches query spectra against a spectral library. Candidates are library
+    spectra with a precursor m/z within `ppm` of the query precursor and the
+    same ion mode. Their binned peak vectors are scored with the (modified)
+    cosine similarity in vectorized batches, chunks of queries are distributed
+    over `threads` processes. The binned library spectra are reused if they
+    were precomputed with the same bin width (see bin_library).
+
+    With `search="approximate"`, candidates are instead the library spectra of
+    the same ion mode sharing an LSH bucket with the query, whatever their
+    precursor m/z, and are scored exactly as above. The LSH index stored with
+    the library (see index_library) is used, or built with the defaults.
+
+    The matches are written in the binary layout. `compact` only selects the
+    artifact type: CompactMatchedSpectra keeps that layout, MatchedSpectra
+    stores it as matched_spectra.txt.
+    """
+    with measure("match_spectra", method=method, search=search):
+        binned_library = library_matrix(library, bin_width)
+        n_bins = max(n_bins_for(bin_width, query), binned_library.shape[1])
+        kwargs = {
+            "query": query,
+            "library": library,
+            "query_matrix": bin_spectra(query, bin_width, n_bins),
+            "library_matrix": widen(binned_library, n_bins),
+            "method": method,
+            "bin_width": bin_width,
+            "ppm": ppm,
+            "min_score": min_score,
+        }
+        if search == "approximate":
+            lsh = library.lsh if library.lsh is not None else LSHIndex.build(library)
+            kwargs["lsh"], kwargs["query_codes"] = lsh, lsh.hash(query)
+        elif search != "exact":
+            raise ValueError(f"Unknown search '{search}'.")
+        count(queries=len(query), library=len(library))
+
+        chunks = [
+            np.arange(start, min(start + QUERY_CHUNK_SIZE, len(query)))
+            for start in range(0, len(query), QUERY_CHUNK_SIZE)
+        ]
+
+        matched_spectra = MatchedSpectraBinaryDirFmt()
+        if threads == 1:
+            _write_matches(
+                str(matched_spectra),
+                library,
+                map(partial(_match_chunk, **kwargs), chunks),
+            )
+        else:
+            with ProcessPoolExecutor(
+                max_workers=threads, initializer=_init_worker, initargs=(kwargs,)
+            ) as executor:
+                _write_matches(
+                    str(matched_spectra),
+                    library,
+                    executor.map(_match_chunk_in_worker, chunks),
+                )
+
+    return matched_spectra
@@ -0,0 +1,113 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+import numpy as np
+
+from q2_ms._metrics import count, measure
+from q2_ms.types import MSPDirFmt
+from q2_ms.types._msp import iter_msp, write_msp
+
+# Each step below takes and yields MSPRecord objects with m/z and intensity
+# arrays, one record at a time, so memory use does not depend on the library
+# size.
+
+
+def _as_arrays(records):
+    for record in records:
+        yield record._replace(
+            mz=np.asarray(record.mz, dtype=np.float64),
+            intensity=np.asarray(record.intensity, dtype=np.float64),
+        )
+
+
+def _select(record, keep):
+    return record._replace(mz=record.mz[keep], intensity=record.intensity[keep])
+
+
+def remove_above_precursor(records):
+    """Removes the peaks above the precursor m/z, if the record has one."""
+    for record in records:
+        try:
+            precursor_mz = float(record.get("PrecursorMZ"))
+        except (TypeError, ValueError):
+            yield record
+            continue
+        yield _select(record, record.mz <= precursor_mz)
+
+
+def relative_intensity_cutoff(records, min_relative_intensity):
+    """Removes peaks below a fraction of the highest peak of their spectrum."""
+    for record in records:
+        if len(record.intensity) == 0:
+            yield record
+            continue
+        cutoff = min_relative_intensity * record.intensity.max()
+        yield _select(record, record.intensity >= cutoff)
+
+
+def keep_top_n(records, top_n):
+    """Keeps the `top_n` most intense peaks of each spectrum, in m/z order."""
+    for record in records:
+        if len(record.intensity) <= top_n:
+            yield record
+            continue
+        top = np.argpartition(-record.intensity, top_n - 1)[:top_n]
+        yield _select(record, np.sort(top))
+
+
+def sqrt_intensity(records):
+    """Replaces the intensities by their square roots."""
+    for record in records:
+        yield record._replace(intensity=np.sqrt(record.intensity))
+
+
+def require_min_peaks(records, min_peaks):
+    """Drops the spectra with fewer than `min_peaks` peaks."""
+    for record in records:
+        if len(record.mz) >= min_peaks:
+            yield record
+        else:
+            count(dropped=1)
+
+
+def filter_library_peaks(
+    library: MSPDirFmt,
+    top_n: int = None,
+    min_relative_intensity: float = 0.0,
+    remove_above_precursor_mz: bool = False,
+    sqrt_scale: bool = False,
+    min_peaks: int = 1,
+) -> MSPDirFmt:
+    """
+    Streams the spectra of an MSP library through the selected filtering and
+    scaling steps, in the order: removal of peaks above the precursor m/z,
+    relative intensity cutoff, top-N peaks, minimum number of peaks and square
+    root scaling. Only one spectrum is held in memory at a time.
+    """
+    path = next(library.path.glob("*.msp"))
+    filtered = MSPDirFmt()
+
+    with measure("filter_library_peaks", path=str(path)):
+        records = _as_arrays(iter_msp(str(path)))
+        if remove_above_precursor_mz:
+            records = remove_above_precursor(records)
+        if min_relative_intensity > 0:
+            records = relative_intensity_cutoff(records, min_relative_intensity)
+        if top_n is not None:
+            records = keep_top_n(records, top_n)
+        records = require_min_peaks(records, min_peaks)
+        if sqrt_scale:
+            records = sqrt_intensity(records)
+
+        n_spectra = write_msp(records, os.path.join(str(filtered), path.name))
+        count(spectra=n_spectra)
+
+    if n_spectra == 0:
+        raise ValueError("No spectra are left after filtering.")
+    return filtered
@@ -0,0 +1,84 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.spectra.chromatograms import extract_chromatograms, sample_chromatograms
+from q2_ms.types import mzMLDirFmt
+from q2_ms.types._chromatograms import read_chromatograms
+
+
+class TestExtractChromatograms(TestPluginBase):
+    package = "q2_ms.spectra.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.mzml_path = os.path.join(
+            os.path.dirname(__file__),
+            "..",
+            "..",
+            "types",
+            "tests",
+            "data",
+            "mzML_valid",
+            "tiny.mzML",
+        )
+
+    def test_sample_chromatograms(self):
+        obs = sample_chromatograms(self.mzml_path)
+
+        exp = pd.DataFrame(
+            {
+                "spectrum_index": [0, 2, 3],
+                "retention_time": [353.43, np.nan, 42.05],
+                "tic": [16675500.0, 0.0, 4200.0],
+                "bpc": [120053.0, 0.0, 42.0],
+                "bpc_mz": [445.347, np.nan, 422.42],
+            }
+        )
+        pd.testing.assert_frame_equal(obs, exp)
+
+    def test_sample_chromatograms_recompute(self):
+        obs = sample_chromatograms(self.mzml_path, ms_level=2, recompute=True)
+
+        self.assertEqual(obs["spectrum_index"].tolist(), [1])
+        self.assertEqual(obs["tic"].tolist(), [110.0])
+        self.assertEqual(obs["bpc"].tolist(), [20.0])
+
+    def _spectra(self, n_samples):
+        spectra = mzMLDirFmt()
+        for i in range(n_samples):
+            shutil.copyfile(
+                self.mzml_path, os.path.join(str(spectra), f"sample{i + 1}.mzML")
+            )
+        return spectra
+
+    def test_extract_chromatograms(self):
+        obs = extract_chromatograms(self._spectra(1))
+
+        obs.validate()
+        pd.testing.assert_frame_equal(
+            read_chromatograms(os.path.join(str(obs), "chromatograms.tsv")),
+            read_chromatograms(self.get_data_path("chromatograms.tsv")).replace(
+                "tiny", "sample1"
+            ),
+        )
+
+    def test_extract_chromatograms_threads(self):
+        obs = extract_chromatograms(self._spectra(3), threads=2)
+
+        table = read_chromatograms(os.path.join(str(obs), "chromatograms.tsv"))
+        self.assertEqual(
+            table["sample_id"].tolist(),
+            ["sample1"] * 3 + ["sample2"] * 3 + ["sample3"] * 3,
+        )
+        self.assertEqual(table["spectrum_index"].tolist(), [0, 2, 3] * 3)
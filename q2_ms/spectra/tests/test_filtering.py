@@ -0,0 +1,89 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+from unittest.mock import patch
+
+import numpy as np
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.spectra.filtering import filter_matched_spectra
+from q2_ms.types import MatchedSpectraBinaryDirFmt
+from q2_ms.types._library import _encode
+from q2_ms.types._matched import create_matches, open_matches
+
+
+class TestFilterMatchedSpectra(TestPluginBase):
+    package = "q2_ms.spectra.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.matched_spectra = MatchedSpectraBinaryDirFmt()
+        columns = create_matches(
+            str(self.matched_spectra), 8, _encode(["a", "b", "c", "d"])
+        )
+        for column, values in zip(
+            columns,
+            (
+                [1, 2, 1, 1, 2, 3, 1, 2],
+                [0, 0, 1, 2, 1, 3, 3, 2],
+                [0.5, 0.9, 0.8, 0.95, 0.9, 0.2, 0.8, 0.6],
+            ),
+        ):
+            column[:] = values
+            column.flush()
+
+    def assert_matches(self, matched_spectra, query, target, score):
+        matched_spectra.validate()
+        obs = open_matches(str(matched_spectra))
+        np.testing.assert_array_equal(obs[0], query)
+        np.testing.assert_array_equal(obs[1], target)
+        np.testing.assert_allclose(obs[2], score, rtol=1e-6)
+        np.testing.assert_array_equal(obs[3], [b"a", b"b", b"c", b"d"])
+
+    def test_filter_matched_spectra_top_k(self):
+        obs = filter_matched_spectra(self.matched_spectra, top_k=2)
+
+        # Ties are resolved in favour of the earlier match
+        self.assert_matches(
+            obs,
+            [1, 1, 2, 2, 3],
+            [2, 1, 0, 1, 3],
+            [0.95, 0.8, 0.9, 0.9, 0.2],
+        )
+
+    @patch("q2_ms.spectra.filtering.CHUNK_ROWS", 3)
+    def test_filter_matched_spectra_top_k_chunks(self):
+        obs = filter_matched_spectra(self.matched_spectra, top_k=2)
+
+        self.assert_matches(
+            obs,
+            [1, 1, 2, 2, 3],
+            [2, 1, 0, 1, 3],
+            [0.95, 0.8, 0.9, 0.9, 0.2],
+        )
+
+    def test_filter_matched_spectra_top_k_min_score(self):
+        obs = filter_matched_spectra(self.matched_spectra, top_k=1, min_score=0.7)
+
+        self.assert_matches(obs, [1, 2], [2, 0], [0.95, 0.9])
+
+    @patch("q2_ms.spectra.filtering.CHUNK_ROWS", 3)
+    def test_filter_matched_spectra_min_score(self):
+        obs = filter_matched_spectra(self.matched_spectra, min_score=0.8)
+
+        # The input order is kept
+        self.assert_matches(
+            obs,
+            [2, 1, 1, 2, 1],
+            [0, 1, 2, 1, 3],
+            [0.9, 0.8, 0.95, 0.9, 0.8],
+        )
+
+    def test_filter_matched_spectra_none_kept(self):
+        obs = filter_matched_spectra(self.matched_spectra, top_k=3, min_score=1.0)
+
+        self.assert_matches(obs, [], [], [])
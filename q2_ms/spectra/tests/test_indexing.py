@@ -0,0 +1,66 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import filecmp
+import os
+import shutil
+
+import numpy as np
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.spectra.indexing import index_mzml, store_peaks
+from q2_ms.types import mzMLDirFmt
+from q2_ms.types._mzml import build_offset_index, open_mzml
+from q2_ms.types._peaks import open_peak_store
+
+
+class TestIndexMzML(TestPluginBase):
+    package = "q2_ms.spectra.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.spectra = mzMLDirFmt()
+        tiny = os.path.join(
+            os.path.dirname(__file__), "..", "..", "types", "tests", "data"
+        )
+        shutil.copyfile(
+            os.path.join(tiny, "mzML_valid", "tiny.mzML"),
+            os.path.join(str(self.spectra), "sample1.mzML"),
+        )
+        shutil.copyfile(
+            os.path.join(tiny, "mzML_unindexed", "tiny.mzML"),
+            os.path.join(str(self.spectra), "sample2.mzML"),
+        )
+
+    def assert_indexed(self, indexed):
+        indexed.validate()
+        for sample in ("sample1", "sample2"):
+            path = os.path.join(str(indexed), f"{sample}.mzML")
+            self.assertTrue(
+                filecmp.cmp(path, os.path.join(str(self.spectra), f"{sample}.mzML"))
+            )
+            np.testing.assert_array_equal(
+                np.load(f"{path}.offsets.npy"), build_offset_index(path)
+            )
+
+    def test_index_mzml(self):
+        self.assert_indexed(index_mzml(self.spectra))
+
+    def test_index_mzml_threads(self):
+        self.assert_indexed(index_mzml(self.spectra, threads=2))
+
+    def test_store_peaks(self):
+        for threads in (1, 2):
+            peaks = store_peaks(self.spectra, threads=threads)
+            peaks.validate()
+
+            store = open_peak_store(str(peaks))
+            self.assertEqual(sorted(store), ["sample1", "sample2"])
+            for sample_id, sample in store.items():
+                path = os.path.join(str(self.spectra), f"{sample_id}.mzML")
+                for (mz, _), spectrum in zip(sample, open_mzml(path)):
+                    np.testing.assert_array_equal(mz, spectrum.mz)
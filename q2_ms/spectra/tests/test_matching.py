@@ -0,0 +1,234 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.spectra.matching import (
+    bin_library,
+    bin_spectra,
+    convert_library,
+    index_library,
+    match_spectra,
+    pair_scores,
+)
+from q2_ms.types import (
+    BinnedSpectralLibraryDirFmt,
+    IndexedSpectralLibraryDirFmt,
+    LSHIndex,
+    MatchedSpectraBinaryDirFmt,
+    SpectralLibrary,
+    SpectralLibraryDirFmt,
+)
+from q2_ms.types._binned import load_binned
+from q2_ms.types._matched import binary_to_text, open_matches
+
+
+class TestMatchSpectra(TestPluginBase):
+    package = "q2_ms.spectra.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.library = SpectralLibrary.from_msp(self.get_data_path("library.msp"))
+        self.query = SpectralLibrary.from_msp(self.get_data_path("query.msp"))
+
+    def read_matches(self, matched_spectra):
+        path = os.path.join(self.temp_dir.name, "matched_spectra.txt")
+        binary_to_text(str(matched_spectra), path)
+        return pd.read_csv(path, sep="\t")
+
+    def test_bin_spectra(self):
+        matrix = bin_spectra(self.library, bin_width=1.0)
+
+        self.assertEqual(matrix.shape, (3, 691))
+        np.testing.assert_allclose(
+            np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel(), 1.0
+        )
+        np.testing.assert_array_equal(matrix[0].indices, [273, 287, 311, 329])
+        np.testing.assert_array_equal(matrix[1].indices, [690])
+
+    def test_pair_scores_cosine(self):
+        matrix = bin_spectra(self.library, bin_width=0.01)
+        query_rows, library_rows = np.array([0, 0, 2]), np.array([0, 2, 2])
+
+        obs = pair_scores(matrix, matrix, query_rows, library_rows)
+
+        exp = (matrix @ matrix.T).toarray()[query_rows, library_rows]
+        np.testing.assert_allclose(obs, exp)
+        np.testing.assert_allclose(obs, [1.0, 0.0, 1.0])
+
+    def test_pair_scores_modified_cosine(self):
+        query = SpectralLibrary(
+            mz=np.array([10.0, 20.0]),
+            intensity=np.array([1.0, 1.0]),
+            offsets=np.array([0, 2]),
+            name=np.array([b"q"]),
+            precursor_mz=np.array([30.0]),
+            ion_mode=np.array([1], dtype=np.int8),
+            spectrum_type=np.array([b"MS2"]),
+            inchikey=np.array([b""]),
+            db_id=np.array([b"q"]),
+        )
+        matrix = bin_spectra(query, bin_width=1.0, n_bins=30)
+        library = matrix[[0]].copy()
+        # second library peak shifted by 5 bins, as if its precursor was lighter
+        library.indices = np.array([10, 15], dtype=library.indices.dtype)
+
+        cosine = pair_scores(matrix, library, np.array([0]), np.array([0]))
+        modified = pair_scores(
+            matrix, library, np.array([0]), np.array([0]), shifts=np.array([5])
+        )
+
+        np.testing.assert_allclose(cosine, [0.5])
+        np.testing.assert_allclose(modified, [1.0])
+
+    def test_match_spectra_cosine(self):
+        obs = match_spectra(self.query, self.library, ppm=10, min_score=0.5)
+
+        self.assertIsInstance(obs, MatchedSpectraBinaryDirFmt)
+        obs.validate()
+        matches = self.read_matches(obs)
+        self.assertEqual(matches.values.tolist(), [[1, "MSBNK-AAFC-AC000673", 1.0]])
+        # Only the IDs of matched library spectra are stored
+        np.testing.assert_array_equal(
+            open_matches(str(obs))[3], [b"MSBNK-AAFC-AC000673"]
+        )
+
+    def test_match_spectra_modified_cosine(self):
+        # Query 2 is Chaetoglobosin A with all fragments shifted by a CH2 group
+        cosine = self.read_matches(
+            match_spectra(self.query, self.library, ppm=50000, min_score=0.5)
+        )
+        modified = self.read_matches(
+            match_spectra(
+                self.query,
+                self.library,
+                method="modified_cosine",
+                ppm=50000,
+                min_score=0.5,
+            )
+        )
+
+        self.assertNotIn(2, cosine[".original_query_index"].tolist())
+        self.assertEqual(
+            modified[modified[".original_query_index"] == 2][
+                "target_spectrum_id"
+            ].tolist(),
+            ["MSBNK-AAFC-AC000084"],
+        )
+        self.assertGreater(modified["score"].iloc[-1], 0.9)
+
+    def test_match_spectra_threads(self):
+        single = match_spectra(self.library, self.library, min_score=0.0)
+        multi = match_spectra(self.library, self.library, min_score=0.0, threads=2)
+
+        pd.testing.assert_frame_equal(
+            self.read_matches(single), self.read_matches(multi)
+        )
+
+    def binned_library(self, bin_width):
+        binned = bin_library(self.library, bin_width=bin_width)
+        library = SpectralLibrary.load(str(binned))
+        library.binned = load_binned(str(binned))
+        return library
+
+    def test_convert_library(self):
+        obs = convert_library(self.library)
+
+        self.assertIsInstance(obs, SpectralLibraryDirFmt)
+        obs.validate()
+        library = SpectralLibrary.load(str(obs))
+        np.testing.assert_array_equal(library.mz, self.library.mz)
+        np.testing.assert_array_equal(library.name, self.library.name)
+        pd.testing.assert_frame_equal(
+            self.read_matches(match_spectra(self.query, library, min_score=0.0)),
+            self.read_matches(match_spectra(self.query, self.library, min_score=0.0)),
+        )
+
+    def test_bin_library(self):
+        obs = bin_library(self.library, bin_width=1.0)
+
+        self.assertIsInstance(obs, BinnedSpectralLibraryDirFmt)
+        obs.validate()
+        bin_width, matrix = load_binned(str(obs))
+        self.assertEqual(bin_width, 1.0)
+        exp = bin_spectra(self.library, bin_width=1.0)
+        self.assertEqual(matrix.shape, exp.shape)
+        np.testing.assert_allclose(matrix.toarray(), exp.toarray())
+
+    def test_match_spectra_binned_library(self):
+        library = self.binned_library(0.01)
+        exp = self.read_matches(
+            match_spectra(self.query, self.library, ppm=50000, min_score=0.0)
+        )
+
+        with patch("q2_ms.spectra.matching.bin_spectra", wraps=bin_spectra) as binned:
+            obs = self.read_matches(
+                match_spectra(self.query, library, ppm=50000, min_score=0.0)
+            )
+
+        # Only the query spectra are binned
+        binned.assert_called_once()
+        pd.testing.assert_frame_equal(obs, exp)
+
+    def test_match_spectra_binned_library_other_bin_width(self):
+        library = self.binned_library(1.0)
+        exp = self.read_matches(
+            match_spectra(self.query, self.library, ppm=50000, min_score=0.0)
+        )
+        obs = self.read_matches(
+            match_spectra(self.query, library, ppm=50000, min_score=0.0)
+        )
+
+        pd.testing.assert_frame_equal(obs, exp)
+
+    def test_index_library(self):
+        obs = index_library(self.library, bin_width=1.0, n_tables=4, n_bits=8)
+
+        self.assertIsInstance(obs, IndexedSpectralLibraryDirFmt)
+        obs.validate()
+        index = LSHIndex.load(str(obs))
+        self.assertEqual((index.n_tables, index.n_bits), (4, 8))
+        self.assertEqual(load_binned(str(obs))[0], 1.0)
+
+    def test_match_spectra_approximate(self):
+        indexed = index_library(self.library)
+        library = SpectralLibrary.load(str(indexed))
+        library.binned = load_binned(str(indexed))
+        library.lsh = LSHIndex.load(str(indexed))
+
+        exact = self.read_matches(
+            match_spectra(self.library, self.library, ppm=10, min_score=0.7)
+        )
+        obs = self.read_matches(
+            match_spectra(self.library, library, min_score=0.7, search="approximate")
+        )
+
+        # Each spectrum finds itself whatever its precursor
+        self.assertEqual(obs.values.tolist(), exact.values.tolist())
+        self.assertEqual(obs[".original_query_index"].tolist(), [1, 2, 3])
+
+    def test_match_spectra_approximate_builds_index(self):
+        obs = self.read_matches(
+            match_spectra(
+                self.library,
+                self.library,
+                method="modified_cosine",
+                min_score=0.7,
+                search="approximate",
+            )
+        )
+
+        self.assertEqual(obs["score"].tolist(), [1.0, 1.0, 1.0])
+
+    def test_match_spectra_unknown_search(self):
+        with self.assertRaisesRegex(ValueError, "Unknown search 'fuzzy'"):
+            match_spectra(self.query, self.library, search="fuzzy")
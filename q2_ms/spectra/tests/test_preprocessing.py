@@ -0,0 +1,84 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+import numpy as np
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.spectra.preprocessing import filter_library_peaks
+from q2_ms.types import MSPDirFmt
+from q2_ms.types._msp import MSPRecord, iter_msp, write_msp
+
+
+class TestFilterLibraryPeaks(TestPluginBase):
+    package = "q2_ms.spectra.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.library = MSPDirFmt()
+        write_msp(
+            [
+                MSPRecord(
+                    [("Name", "a"), ("PrecursorMZ", "300")],
+                    [100.0, 150.0, 200.0, 250.0, 300.0, 350.0],
+                    [1.0, 50.0, 100.0, 4.0, 25.0, 80.0],
+                ),
+                MSPRecord([("Name", "b")], [100.0, 400.0], [9.0, 16.0]),
+            ],
+            os.path.join(str(self.library), "library.msp"),
+        )
+
+    def filter(self, **kwargs):
+        filtered = filter_library_peaks(self.library, **kwargs)
+        filtered.validate()
+        return list(iter_msp(os.path.join(str(filtered), "library.msp")))
+
+    def assert_peaks(self, record, mz, intensity):
+        np.testing.assert_allclose(record.mz, mz)
+        np.testing.assert_allclose(record.intensity, intensity)
+
+    def test_filter_library_peaks_default(self):
+        obs = self.filter()
+
+        self.assertEqual([record.get("Name") for record in obs], ["a", "b"])
+        self.assert_peaks(obs[1], [100, 400], [9, 16])
+
+    def test_filter_library_peaks_remove_above_precursor(self):
+        obs = self.filter(remove_above_precursor_mz=True)
+
+        self.assert_peaks(obs[0], [100, 150, 200, 250, 300], [1, 50, 100, 4, 25])
+        # Spectra without precursor m/z are kept unchanged
+        self.assert_peaks(obs[1], [100, 400], [9, 16])
+
+    def test_filter_library_peaks_relative_intensity(self):
+        obs = self.filter(min_relative_intensity=0.25)
+
+        self.assert_peaks(obs[0], [150, 200, 300, 350], [50, 100, 25, 80])
+        self.assert_peaks(obs[1], [100, 400], [9, 16])
+
+    def test_filter_library_peaks_top_n(self):
+        obs = self.filter(top_n=3)
+
+        self.assert_peaks(obs[0], [150, 200, 350], [50, 100, 80])
+
+    def test_filter_library_peaks_pipeline(self):
+        obs = self.filter(
+            top_n=3,
+            min_relative_intensity=0.2,
+            remove_above_precursor_mz=True,
+            sqrt_scale=True,
+            min_peaks=3,
+        )
+
+        self.assertEqual(len(obs), 1)
+        self.assertEqual(obs[0].get("Num Peaks"), "3")
+        self.assert_peaks(obs[0], [150, 200, 300], np.sqrt([50, 100, 25]))
+
+    def test_filter_library_peaks_nothing_left(self):
+        with self.assertRaisesRegex(ValueError, "No spectra are left"):
+            self.filter(min_peaks=10)
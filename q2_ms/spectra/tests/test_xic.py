@@ -0,0 +1,80 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+import numpy as np
+import pandas as pd
+import qiime2
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.spectra.xic import extract_ion_chromatograms
+from q2_ms.types import MS1PeakIndexDirFmt
+from q2_ms.types._chromatograms import read_ion_chromatograms
+from q2_ms.types._ms1_index import MS1_INDEX_METADATA, save_ms1_index
+
+
+class TestExtractIonChromatograms(TestPluginBase):
+    package = "q2_ms.spectra.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.spectra = MS1PeakIndexDirFmt()
+        with open(os.path.join(str(self.spectra), MS1_INDEX_METADATA), "w") as file:
+            file.write('{"mz_bin_width": 0.1}')
+
+        peaks = [
+            (np.array([100.0, 200.0, 200.001]), np.array([1.0, 2.0, 3.0])),
+            (np.array([100.0005, 200.0]), np.array([4.0, 5.0])),
+            (np.array([150.0]), np.array([6.0])),
+        ]
+        for sample_id, rt in (("s1", [10.0, 20.0, 30.0]), ("s2", [25.0, 15.0, 5.0])):
+            save_ms1_index(
+                str(self.spectra), sample_id, rt, [0, 1, 2], peaks, mz_bin_width=0.1
+            )
+
+    def targets(self, **columns):
+        return qiime2.Metadata(
+            pd.DataFrame(columns, index=pd.Index(["t1", "t2"], name="id"))
+        )
+
+    def extract(self, targets, **kwargs):
+        obs = extract_ion_chromatograms(self.spectra, targets, **kwargs)
+        obs.validate()
+        return read_ion_chromatograms(os.path.join(str(obs), "ion_chromatograms.tsv"))
+
+    def test_extract_ion_chromatograms(self):
+        obs = self.extract(
+            self.targets(mz=[100.0, 200.0], rt_min=[0.0, 15.0], rt_max=[25.0, np.nan])
+        )
+
+        exp = pd.DataFrame(
+            {
+                "sample_id": ["s1"] * 4 + ["s2"] * 5,
+                "target_id": ["t1", "t1", "t2", "t2", "t1", "t1", "t1", "t2", "t2"],
+                "spectrum_index": [0, 1, 1, 2, 2, 1, 0, 1, 0],
+                "retention_time": [10.0, 20.0, 20.0, 30.0, 5.0, 15.0, 25.0, 15.0, 25.0],
+                "intensity": [1.0, 4.0, 5.0, 0.0, 0.0, 4.0, 1.0, 5.0, 5.0],
+            }
+        )
+        pd.testing.assert_frame_equal(obs, exp)
+
+    def test_extract_ion_chromatograms_ppm_and_max(self):
+        obs = self.extract(self.targets(mz=[200.0, 150.0]), ppm=10.0, aggregation="max")
+
+        s1 = obs[(obs["sample_id"] == "s1") & (obs["target_id"] == "t1")]
+        self.assertEqual(s1["intensity"].tolist(), [3.0, 5.0, 0.0])
+
+        obs = self.extract(self.targets(mz=[200.0, 150.0]), ppm=1.0)
+        s1 = obs[(obs["sample_id"] == "s1") & (obs["target_id"] == "t1")]
+        self.assertEqual(s1["intensity"].tolist(), [2.0, 5.0, 0.0])
+
+    def test_extract_ion_chromatograms_invalid_targets(self):
+        with self.assertRaisesRegex(ValueError, "'mz' column"):
+            self.extract(self.targets(rt_min=[1.0, 2.0]))
+        with self.assertRaisesRegex(ValueError, "rt_min must not be larger"):
+            self.extract(self.targets(mz=[1.0, 2.0], rt_min=[5.0, 0.0], rt_max=[1, 1]))
@@ -0,0 +1,98 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+import numpy as np
+import pandas as pd
+import qiime2
+
+from q2_ms._metrics import count, measure
+from q2_ms.types import IonChromatogramsDirFmt, MS1PeakIndexDirFmt
+from q2_ms.types._chromatograms import ION_CHROMATOGRAM_COLUMNS
+from q2_ms.types._ms1_index import open_ms1_index
+
+
+def _read_targets(targets):
+    """
+    Returns the m/z and retention time window of each target, with unbounded
+    windows where rt_min or rt_max are missing.
+    """
+    targets = targets.to_dataframe()
+    if "mz" not in targets.columns:
+        raise ValueError("The targets must have an 'mz' column.")
+
+    windows = pd.DataFrame(index=targets.index.astype(str))
+    for column, default in (("mz", None), ("rt_min", -np.inf), ("rt_max", np.inf)):
+        values = targets.get(column, pd.Series(default, index=targets.index))
+        try:
+            windows[column] = pd.to_numeric(values).to_numpy(dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"The '{column}' column of the targets must be numeric.")
+        if default is not None:
+            windows[column] = windows[column].fillna(default)
+
+    if windows["mz"].isna().any():
+        raise ValueError("Every target must have an m/z value.")
+    if (windows["rt_min"] > windows["rt_max"]).any():
+        raise ValueError("rt_min must not be larger than rt_max.")
+    return windows
+
+
+def extract_ion_chromatograms(
+    spectra: MS1PeakIndexDirFmt,
+    targets: qiime2.Metadata,
+    ppm: float = 10.0,
+    aggregation: str = "sum",
+) -> IonChromatogramsDirFmt:
+    """
+    Extracts the ion chromatogram of each target (m/z ± `ppm` within a
+    retention time window) from the MS1 spectra of each sample. The MS1 peak
+    index answers each target with a range lookup in the m/z bins the window
+    overlaps, so every sample is read once for all targets.
+    """
+    windows = _read_targets(targets)
+    tolerance = windows["mz"].to_numpy() * ppm * 1e-6
+    mz_min = windows["mz"].to_numpy() - tolerance
+    mz_max = windows["mz"].to_numpy() + tolerance
+
+    chromatograms = IonChromatogramsDirFmt()
+    path = os.path.join(str(chromatograms), "ion_chromatograms.tsv")
+    with open(path, "w") as file:
+        file.write("\t".join(ION_CHROMATOGRAM_COLUMNS) + "\n")
+
+        for sample_id, index in open_ms1_index(str(spectra)).items():
+            with measure("extract_ion_chromatograms", sample_id=sample_id):
+                tables = []
+                for target_id, low, high, rt_min, rt_max in zip(
+                    windows.index,
+                    mz_min,
+                    mz_max,
+                    windows["rt_min"],
+                    windows["rt_max"],
+                ):
+                    scans, intensity = index.xic(
+                        low, high, rt_min, rt_max, aggregation=aggregation
+                    )
+                    tables.append(
+                        pd.DataFrame(
+                            {
+                                "sample_id": sample_id,
+                                "target_id": target_id,
+                                "spectrum_index": index.spectrum_index[scans],
+                                "retention_time": index.rt[scans],
+                                "intensity": intensity,
+                            }
+                        )
+                    )
+                    count(targets=1, points=len(scans))
+
+                pd.concat(tables).to_csv(
+                    file, sep="\t", header=False, index=False, float_format="%.10g"
+                )
+
+    return chromatograms
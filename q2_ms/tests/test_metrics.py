@@ -0,0 +1,119 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import json
+import os
+import tracemalloc
+from unittest.mock import patch
+
+import numpy as np
+from qiime2.core.exceptions import ValidationError
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms._metrics import count, measure
+from q2_ms.types._format import MatchedSpectraFormat, MSPFormat
+
+
+class TestMetrics(TestPluginBase):
+    package = "q2_ms.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.temp_dir.name, "metrics.jsonl")
+        env = patch.dict(os.environ, {"Q2_MS_METRICS": self.path})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def read_records(self):
+        with open(self.path) as file:
+            return [json.loads(line) for line in file]
+
+    def test_measure(self):
+        with measure("block", sample="a") as fields:
+            count(rows=2)
+            count(rows=3, spectra=1)
+            data = np.ones(1_000_000)
+            fields["size"] = data.nbytes
+
+        (record,) = self.read_records()
+        self.assertEqual(record["name"], "block")
+        self.assertEqual(record["sample"], "a")
+        self.assertEqual(record["size"], 8_000_000)
+        self.assertEqual(record["counts"], {"rows": 5, "spectra": 1})
+        self.assertGreater(record["wall_time"], 0)
+        self.assertGreaterEqual(record["peak_memory"], 8_000_000)
+        self.assertIsNone(record["error"])
+
+    def test_measure_nested(self):
+        with measure("outer"):
+            with measure("inner"):
+                count(rows=1)
+                np.ones(1_000_000)
+            count(rows=1)
+
+        inner, outer = self.read_records()
+        self.assertEqual(inner["counts"], {"rows": 1})
+        self.assertEqual(outer["counts"], {"rows": 2})
+        self.assertGreaterEqual(outer["peak_memory"], 8_000_000)
+
+    def test_measure_stops_tracing(self):
+        with measure("outer"):
+            with measure("inner"):
+                self.assertTrue(tracemalloc.is_tracing())
+            self.assertTrue(tracemalloc.is_tracing())
+
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_measure_keeps_tracing(self):
+        # Tracing started by others is left running
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        with measure("block"):
+            pass
+
+        self.assertTrue(tracemalloc.is_tracing())
+
+    def test_measure_error(self):
+        with self.assertRaises(ValueError):
+            with measure("block"):
+                raise ValueError("broken")
+
+        (record,) = self.read_records()
+        self.assertEqual(record["error"], "ValueError: broken")
+
+    def test_measure_disabled(self):
+        with patch.dict(os.environ, {"Q2_MS_METRICS": ""}):
+            with measure("block"):
+                count(rows=1)
+
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_measure_log(self):
+        with patch.dict(os.environ, {"Q2_MS_METRICS": "log"}):
+            with self.assertLogs("q2_ms.metrics", level="INFO") as logs:
+                with measure("block"):
+                    count(rows=1)
+
+        (record,) = logs.records
+        self.assertEqual(record.q2_ms_metrics["name"], "block")
+        self.assertEqual(json.loads(record.getMessage())["counts"], {"rows": 1})
+
+    def test_validation_metrics(self):
+        path = self.get_data_path("matched_spectra.txt")
+        MatchedSpectraFormat(path, mode="r").validate()
+        with self.assertRaises(ValidationError):
+            MSPFormat(self.get_data_path("invalid.msp"), mode="r").validate()
+
+        matched, msp = self.read_records()
+        self.assertEqual(matched["name"], "validate.MatchedSpectraFormat")
+        self.assertEqual(matched["path"], path)
+        self.assertEqual(matched["level"], "max")
+        self.assertEqual(matched["counts"], {"rows": 7})
+        if matched["bytes_read"] is not None:
+            self.assertGreaterEqual(matched["bytes_read"], os.path.getsize(path))
+        self.assertEqual(msp["name"], "validate.MSPFormat")
+        self.assertTrue(msp["error"].startswith("ValidationError"))
@@ -5,31 +5,72 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+from q2_ms.types._experiment import XCMSExperimentView
+from q2_ms.types._feature_peaks import FeaturePeakIndex
 from q2_ms.types._format import (
+    BinnedSpectralLibraryDirFmt,
+    BinnedSpectralLibraryMetadataFormat,
+    ChromatogramsDirFmt,
+    ChromatogramsFormat,
+    ColumnarTableSchemaFormat,
+    CompressedPeaksFormat,
+    IndexedSpectralLibraryDirFmt,
+    IonChromatogramsDirFmt,
+    IonChromatogramsFormat,
+    LSHIndexMetadataFormat,
+    MatchedSpectraBinaryDirFmt,
     MatchedSpectraDirFmt,
     MatchedSpectraFormat,
+    MS1PeakIndexDirFmt,
+    MS1PeakIndexMetadataFormat,
     MSBackendDataFormat,
     MSExperimentLinkMColsFormat,
     MSExperimentSampleDataFormat,
     MSExperimentSampleDataLinksSpectra,
     MSPDirFmt,
     MSPFormat,
+    NumpyArrayFormat,
+    SpectralLibraryDirFmt,
     SpectraSlotsFormat,
     XCMSExperimentChromPeakDataFormat,
     XCMSExperimentChromPeaksFormat,
+    XCMSExperimentColumnarDirFmt,
     XCMSExperimentDirFmt,
     XCMSExperimentFeatureDefinitionsFormat,
     XCMSExperimentFeaturePeakIndexFormat,
     XCMSExperimentJSONFormat,
     mzMLDirFmt,
     mzMLFormat,
+    mzMLOffsetIndexFormat,
+    mzMLPeaksDirFmt,
+    mzMLSampleFormat,
+)
+from q2_ms.types._library import SpectralLibrary
+from q2_ms.types._lsh import LSHIndex
+from q2_ms.types._tables import read_xcms_table
+from q2_ms.types._type import (
+    MSP,
+    BinnedSpectralLibrary,
+    Chromatograms,
+    ColumnarSpectralLibrary,
+    ColumnarXCMSExperiment,
+    CompactMatchedSpectra,
+    IndexedSpectralLibrary,
+    IonChromatograms,
+    MatchedSpectra,
+    XCMSExperiment,
+    mzML,
+    mzMLPeaks,
 )
-from q2_ms.types._type import MSP, MatchedSpectra, XCMSExperiment, mzML
 
 __all__ = [
     "mzMLFormat",
+    "mzMLSampleFormat",
     "mzMLDirFmt",
+    "mzMLOffsetIndexFormat",
+    "mzMLPeaksDirFmt",
     "mzML",
+    "mzMLPeaks",
     "MSBackendDataFormat",
     "MSExperimentLinkMColsFormat",
     "MSExperimentSampleDataFormat",
@@ -40,12 +81,40 @@ __all__ = [
     "XCMSExperimentDirFmt",
     "XCMSExperimentFeatureDefinitionsFormat",
     "XCMSExperimentFeaturePeakIndexFormat",
+    "FeaturePeakIndex",
+    "XCMSExperimentView",
     "XCMSExperimentJSONFormat",
     "XCMSExperiment",
+    "read_xcms_table",
+    "ColumnarTableSchemaFormat",
+    "XCMSExperimentColumnarDirFmt",
+    "ColumnarXCMSExperiment",
     "MSPFormat",
     "MSPDirFmt",
     "MSP",
+    "CompressedPeaksFormat",
+    "NumpyArrayFormat",
+    "SpectralLibraryDirFmt",
+    "SpectralLibrary",
+    "ColumnarSpectralLibrary",
+    "BinnedSpectralLibraryMetadataFormat",
+    "BinnedSpectralLibraryDirFmt",
+    "BinnedSpectralLibrary",
+    "LSHIndexMetadataFormat",
+    "IndexedSpectralLibraryDirFmt",
+    "IndexedSpectralLibrary",
+    "LSHIndex",
     "MatchedSpectraFormat",
     "MatchedSpectraDirFmt",
+    "MatchedSpectraBinaryDirFmt",
     "MatchedSpectra",
+    "CompactMatchedSpectra",
+    "ChromatogramsFormat",
+    "ChromatogramsDirFmt",
+    "Chromatograms",
+    "IonChromatogramsFormat",
+    "IonChromatogramsDirFmt",
+    "IonChromatograms",
+    "MS1PeakIndexMetadataFormat",
+    "MS1PeakIndexDirFmt",
 ]
@@ -0,0 +1,102 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+
+# CSR arrays of a binned library, named "binned_<name>.npy"
+BINNED_ARRAYS = ("data", "indices", "indptr")
+BINNED_METADATA = "binned.json"
+
+
+def n_bins_for(bin_width, *libraries):
+    """Returns the number of m/z bins needed to hold the peaks of all libraries."""
+    max_mz = max((np.max(lib.mz, initial=0) for lib in libraries), default=0)
+    return int(max_mz / bin_width) + 1
+
+
+def bin_spectra(library, bin_width, n_bins=None):
+    """
+    Bins the peaks of all spectra of a library into a CSR matrix with one
+    L2-normalized row per spectrum and one column per m/z bin of `bin_width`.
+    Intensities of peaks falling into the same bin are summed.
+    """
+    if n_bins is None:
+        n_bins = n_bins_for(bin_width, library)
+
+    rows = np.repeat(np.arange(len(library)), np.diff(library.offsets))
+    cols = (np.asarray(library.mz) / bin_width).astype(np.int64)
+    keep = (cols >= 0) & (cols < n_bins)
+
+    matrix = sparse.csr_matrix(
+        (
+            np.asarray(library.intensity, dtype=np.float64)[keep],
+            (rows[keep], cols[keep]),
+        ),
+        shape=(len(library), n_bins),
+    )
+    matrix.sum_duplicates()
+    matrix.sort_indices()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix.data /= np.repeat(norms, np.diff(matrix.indptr))
+
+    return matrix
+
+
+def binned_paths(path):
+    return {name: os.path.join(path, f"binned_{name}.npy") for name in BINNED_ARRAYS}
+
+
+def save_binned(matrix, bin_width, path):
+    """Stores a matrix of binned spectra and the bin width it was binned with."""
+    with open(os.path.join(path, BINNED_METADATA), "w") as file:
+        json.dump({"bin_width": bin_width, "n_bins": matrix.shape[1]}, file)
+    for name, array_path in binned_paths(path).items():
+        np.save(array_path, getattr(matrix, name))
+
+
+def load_binned(path, mmap_mode="r"):
+    """Returns the bin width and the CSR matrix of a binned library."""
+    with open(os.path.join(path, BINNED_METADATA)) as file:
+        metadata = json.load(file)
+
+    arrays = {
+        name: np.load(array_path, mmap_mode=mmap_mode)
+        for name, array_path in binned_paths(path).items()
+    }
+    matrix = sparse.csr_matrix(
+        (arrays["data"], arrays["indices"], arrays["indptr"]),
+        shape=(len(arrays["indptr"]) - 1, metadata["n_bins"]),
+        copy=False,
+    )
+    return metadata["bin_width"], matrix
+
+
+def library_matrix(library, bin_width):
+    """
+    Returns the binned spectra of a library, reusing the matrix stored with the
+    library if it was binned with the same bin width.
+    """
+    if library.binned is not None and library.binned[0] == bin_width:
+        return library.binned[1]
+    return bin_spectra(library, bin_width)
+
+
+def widen(matrix, n_bins):
+    """Returns a CSR matrix with `n_bins` columns, the added ones empty."""
+    if n_bins < matrix.shape[1]:
+        raise ValueError(f"Cannot narrow a matrix of {matrix.shape[1]} bins.")
+    return sparse.csr_matrix(
+        (matrix.data, matrix.indices, matrix.indptr),
+        shape=(matrix.shape[0], n_bins),
+        copy=False,
+    )
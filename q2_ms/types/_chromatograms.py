@@ -0,0 +1,44 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import pandas as pd
+
+CHROMATOGRAM_COLUMNS = [
+    "sample_id",
+    "spectrum_index",
+    "retention_time",
+    "tic",
+    "bpc",
+    "bpc_mz",
+]
+
+CHROMATOGRAM_DTYPES = {
+    "sample_id": str,
+    "spectrum_index": "int64",
+    "retention_time": "float64",
+    "tic": "float64",
+    "bpc": "float64",
+    "bpc_mz": "float64",
+}
+
+
+ION_CHROMATOGRAM_DTYPES = {
+    "sample_id": str,
+    "target_id": str,
+    "spectrum_index": "int64",
+    "retention_time": "float64",
+    "intensity": "float64",
+}
+ION_CHROMATOGRAM_COLUMNS = list(ION_CHROMATOGRAM_DTYPES)
+
+
+def read_chromatograms(path, dtype=CHROMATOGRAM_DTYPES, **kwargs):
+    return pd.read_csv(path, sep="\t", dtype=dtype, **kwargs)
+
+
+def read_ion_chromatograms(path, **kwargs):
+    return read_chromatograms(path, dtype=ION_CHROMATOGRAM_DTYPES, **kwargs)
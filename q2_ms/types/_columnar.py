@@ -0,0 +1,126 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from q2_ms.types._library import _encode
+
+SCHEMA_FILE = "schema.json"
+INDEX_COLUMN = "_index"
+
+
+def _kind(dtype):
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "category"
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in "iu":
+        return "nullable"
+    if dtype.kind in "biuf":
+        return "numeric"
+    return "string"
+
+
+def _save_column(path, name, values):
+    kind = _kind(values.dtype)
+    na = values.isna().to_numpy()
+
+    if kind == "category":
+        np.save(os.path.join(path, f"{name}.npy"), values.cat.codes.to_numpy())
+        np.save(
+            os.path.join(path, f"{name}.categories.npy"),
+            _encode(values.cat.categories.astype(str)),
+        )
+    elif kind == "nullable":
+        np.save(
+            os.path.join(path, f"{name}.npy"),
+            values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0),
+        )
+        np.save(os.path.join(path, f"{name}.na.npy"), na)
+    elif kind == "numeric":
+        np.save(os.path.join(path, f"{name}.npy"), values.to_numpy())
+    else:
+        strings = values.astype(object).where(~na, "")
+        np.save(os.path.join(path, f"{name}.npy"), _encode(strings.astype(str)))
+        np.save(os.path.join(path, f"{name}.na.npy"), na)
+
+    return {"name": name, "kind": kind, "dtype": str(values.dtype)}
+
+
+def _load_column(path, column, mmap_mode):
+    name, kind = column["name"], column["kind"]
+    values = np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+    if kind == "category":
+        categories = np.load(os.path.join(path, f"{name}.categories.npy"))
+        return pd.Categorical.from_codes(
+            values, categories=np.char.decode(categories, "utf-8")
+        )
+    if kind == "nullable":
+        na = np.load(os.path.join(path, f"{name}.na.npy"), mmap_mode=mmap_mode)
+        return pd.arrays.IntegerArray(np.asarray(values), np.asarray(na))
+    if kind == "numeric":
+        return values
+
+    na = np.load(os.path.join(path, f"{name}.na.npy"))
+    strings = pd.Series(np.char.decode(values, "utf-8"), dtype="str")
+    return strings.where(~na).to_numpy()
+
+
+def save_columnar_table(df, path, comment=None):
+    """
+    Saves a DataFrame as one .npy file per column, plus the index, and a
+    schema.json listing the columns in order.
+
+    Categorical columns are stored as codes and categories, strings as
+    fixed-width UTF-8 and missing values of integer and string columns as
+    separate boolean masks.
+    """
+    os.makedirs(path, exist_ok=True)
+    schema = {
+        "comment": comment,
+        "index": _save_column(path, INDEX_COLUMN, pd.Series(df.index)),
+        "columns": [_save_column(path, name, df[name]) for name in df.columns],
+    }
+    with open(os.path.join(path, SCHEMA_FILE), "w") as file:
+        json.dump(schema, file, indent=2)
+
+
+def read_schema(path):
+    with open(os.path.join(path, SCHEMA_FILE)) as file:
+        return json.load(file)
+
+
+def count_columnar_rows(path):
+    """Returns the number of rows of a table saved by save_columnar_table."""
+    return len(np.load(os.path.join(path, f"{INDEX_COLUMN}.npy"), mmap_mode="r"))
+
+
+def load_columnar_table(path, columns=None, mmap_mode="r"):
+    """
+    Loads a table saved by save_columnar_table. Only the files of the given
+    `columns` are read and numeric columns are memory-mapped.
+    """
+    schema = read_schema(path)
+    available = {column["name"]: column for column in schema["columns"]}
+
+    if columns is None:
+        columns = list(available)
+    missing = [name for name in columns if name not in available]
+    if missing:
+        raise ValueError(
+            f"Columns {', '.join(missing)} are not present in {path}. "
+            f"Available columns: {', '.join(available)}"
+        )
+
+    return pd.DataFrame(
+        {name: _load_column(path, available[name], mmap_mode) for name in columns},
+        index=pd.Index(_load_column(path, schema["index"], mmap_mode)),
+        copy=False,
+    )
@@ -0,0 +1,236 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+
+import pandas as pd
+
+from q2_ms.types._columnar import load_columnar_table, read_schema, save_columnar_table
+from q2_ms.types._feature_peaks import load_feature_peak_index
+from q2_ms.types._format import (
+    MSBackendDataFormat,
+    MSExperimentSampleDataFormat,
+    MSExperimentSampleDataLinksSpectra,
+    XCMSExperimentChromPeakDataFormat,
+    XCMSExperimentChromPeaksFormat,
+    XCMSExperimentFeatureDefinitionsFormat,
+    XCMSExperimentFeaturePeakIndexFormat,
+)
+from q2_ms.types._tables import (
+    TABLE_SPECS,
+    _read_header,
+    read_xcms_table,
+    write_xcms_table,
+)
+
+# Tables of an XCMSExperiment by attribute name, with the file name (without
+# extension) and the format they are stored in
+EXPERIMENT_TABLES = {
+    "backend": ("ms_backend_data", MSBackendDataFormat),
+    "sample_data": ("ms_experiment_sample_data", MSExperimentSampleDataFormat),
+    "sample_data_links_spectra": (
+        "ms_experiment_sample_data_links_spectra",
+        MSExperimentSampleDataLinksSpectra,
+    ),
+    "chrom_peaks": ("xcms_experiment_chrom_peaks", XCMSExperimentChromPeaksFormat),
+    "chrom_peak_data": (
+        "xcms_experiment_chrom_peak_data",
+        XCMSExperimentChromPeakDataFormat,
+    ),
+    "features": (
+        "xcms_experiment_feature_definitions",
+        XCMSExperimentFeatureDefinitionsFormat,
+    ),
+    "feature_peak_index": (
+        "xcms_experiment_feature_peak_index",
+        XCMSExperimentFeaturePeakIndexFormat,
+    ),
+}
+
+# Tables of an XCMSExperiment that XCMSExperimentColumnarDirFmt stores as columns
+COLUMNAR_TABLES = {
+    "ms_backend_data": MSBackendDataFormat,
+    "xcms_experiment_chrom_peak_data": XCMSExperimentChromPeakDataFormat,
+    "xcms_experiment_chrom_peaks": XCMSExperimentChromPeaksFormat,
+}
+
+
+def _copy_text_files(source, target):
+    for name in os.listdir(source):
+        path = os.path.join(source, name)
+        if os.path.isfile(path) and os.path.splitext(name)[0] not in COLUMNAR_TABLES:
+            shutil.copyfile(path, os.path.join(target, name))
+
+
+def write_columnar_experiment(source, target):
+    """
+    Writes the XCMSExperiment directory `source` in the columnar layout of
+    XCMSExperimentColumnarDirFmt to `target`. The tables stored as columns
+    keep full precision, all other files are copied.
+    """
+    _copy_text_files(source, target)
+
+    for table, fmt in COLUMNAR_TABLES.items():
+        path = os.path.join(source, f"{table}.txt")
+        if not os.path.exists(path):
+            continue
+
+        comment = None
+        if table == "ms_backend_data":
+            with open(path) as file:
+                comment = file.readline().rstrip("\n")
+        save_columnar_table(
+            read_xcms_table(fmt(path, mode="r"), compact=False),
+            os.path.join(target, table),
+            comment=comment,
+        )
+
+
+def write_text_experiment(source, target):
+    """
+    Writes the columnar XCMSExperiment directory `source` back to the text
+    layout of XCMSExperimentDirFmt to `target`.
+    """
+    _copy_text_files(source, target)
+
+    for table in COLUMNAR_TABLES:
+        path = os.path.join(source, table)
+        if not os.path.isdir(path):
+            continue
+
+        write_xcms_table(
+            load_columnar_table(path),
+            os.path.join(target, f"{table}.txt"),
+            comment=read_schema(path)["comment"],
+        )
+
+
+class XCMSExperimentView:
+    """
+    Lazily loaded tables of an XCMSExperiment.
+
+    Nothing is read when the view is created. Each table is read when it is
+    first accessed, and only the requested columns of it, so consumers of the
+    feature definitions never parse the MS backend table. Columns read once
+    are cached. Tables of the columnar layout (XCMSExperimentColumnarDirFmt)
+    are memory-mapped instead of parsed. With `compact=False`, text tables
+    keep double precision as with read_xcms_table.
+    """
+
+    def __init__(self, path, compact=True):
+        self.path = str(path)
+        self.compact = compact
+        self._columns = {}
+        self._index = {}
+        self._feature_peaks = None
+
+    def _text_path(self, name):
+        return os.path.join(self.path, f"{EXPERIMENT_TABLES[name][0]}.txt")
+
+    def _columnar_path(self, name):
+        path = os.path.join(self.path, EXPERIMENT_TABLES[name][0])
+        return path if os.path.isdir(path) else None
+
+    def has_table(self, name):
+        """Returns whether the experiment contains the table `name`."""
+        return (
+            os.path.isfile(self._text_path(name))
+            or self._columnar_path(name) is not None
+        )
+
+    def columns(self, name):
+        """Returns the column names of a table without reading it."""
+        self._check_table(name)
+        columnar = self._columnar_path(name)
+        if columnar is not None:
+            return [column["name"] for column in read_schema(columnar)["columns"]]
+
+        spec = TABLE_SPECS[EXPERIMENT_TABLES[name][1]]
+        if spec.names is not None:
+            return list(spec.names)
+        return _read_header(self._text_path(name), spec.skiprows)
+
+    def table(self, name, columns=None):
+        """
+        Returns the given `columns` of a table, all of them if None. Only the
+        columns that were not accessed before are read.
+        """
+        self._check_table(name)
+        if columns is None:
+            columns = self.columns(name)
+
+        cached = self._columns.setdefault(name, {})
+        missing = [column for column in dict.fromkeys(columns) if column not in cached]
+        if missing or name not in self._index:
+            df = self._read(name, missing)
+            cached.update(df.items())
+            self._index[name] = df.index
+
+        return pd.DataFrame(
+            {column: cached[column] for column in columns},
+            index=self._index[name],
+            copy=False,
+        )
+
+    def _read(self, name, columns):
+        columnar = self._columnar_path(name)
+        if columnar is not None:
+            return load_columnar_table(columnar, columns=columns)
+
+        _, fmt = EXPERIMENT_TABLES[name]
+        return read_xcms_table(
+            fmt(self._text_path(name), mode="r"), columns=columns, compact=self.compact
+        )
+
+    def _check_table(self, name):
+        if name not in EXPERIMENT_TABLES:
+            raise ValueError(
+                f"Unknown table {name}. Available tables: "
+                f"{', '.join(EXPERIMENT_TABLES)}"
+            )
+        if not self.has_table(name):
+            raise ValueError(
+                f"The XCMSExperiment does not contain the table "
+                f"{EXPERIMENT_TABLES[name][0]}."
+            )
+
+    @property
+    def backend(self):
+        return self.table("backend")
+
+    @property
+    def sample_data(self):
+        return self.table("sample_data")
+
+    @property
+    def sample_data_links_spectra(self):
+        return self.table("sample_data_links_spectra")
+
+    @property
+    def chrom_peaks(self):
+        return self.table("chrom_peaks")
+
+    @property
+    def chrom_peak_data(self):
+        return self.table("chrom_peak_data")
+
+    @property
+    def features(self):
+        return self.table("features")
+
+    @property
+    def feature_peak_index(self):
+        return self.table("feature_peak_index")
+
+    @property
+    def feature_peaks(self):
+        """The FeaturePeakIndex of the experiment, see load_feature_peak_index."""
+        if self._feature_peaks is None:
+            self._check_table("feature_peak_index")
+            self._feature_peaks = load_feature_peak_index(self.path)
+        return self._feature_peaks
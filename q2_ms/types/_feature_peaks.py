@@ -0,0 +1,178 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+import numpy as np
+import pandas as pd
+
+from q2_ms.types._columnar import count_columnar_rows
+from q2_ms.types._matched import _count_rows
+
+FEATURE_PEAK_INDEX = "xcms_experiment_feature_peak_index"
+# CSR arrays of the feature peak index of an XCMSExperiment, stored next to the
+# edge list as "xcms_experiment_feature_peak_index.<name>.npy"
+FEATURE_PEAK_ARRAYS = (
+    "feature_indptr",
+    "feature_peaks",
+    "peak_indptr",
+    "peak_features",
+)
+
+
+def feature_peak_index_paths(path):
+    return {
+        name: os.path.join(path, f"{FEATURE_PEAK_INDEX}.{name}.npy")
+        for name in FEATURE_PEAK_ARRAYS
+    }
+
+
+def _csr(rows, columns, n_rows):
+    order = np.lexsort((columns, rows))
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, columns[order]
+
+
+class FeaturePeakIndex:
+    """
+    Assignments of chromatographic peaks to features as CSR adjacency arrays.
+
+    The peaks of feature f are `feature_peaks[feature_indptr[f]:feature_indptr
+    [f + 1]]` and the features of peak p are `peak_features[peak_indptr[p]:
+    peak_indptr[p + 1]]`, so both are sliced in O(1) without scanning the edge
+    list. Features and peaks are the 0-based row numbers of the feature
+    definitions and the chromatographic peaks tables, sorted within each slice.
+    """
+
+    def __init__(self, feature_indptr, feature_peaks, peak_indptr, peak_features):
+        self.feature_indptr = feature_indptr
+        self.feature_peaks = feature_peaks
+        self.peak_indptr = peak_indptr
+        self.peak_features = peak_features
+
+    @property
+    def n_features(self):
+        return len(self.feature_indptr) - 1
+
+    @property
+    def n_peaks(self):
+        return len(self.peak_indptr) - 1
+
+    def __len__(self):
+        return len(self.feature_peaks)
+
+    @classmethod
+    def from_edges(cls, features, peaks, n_features=None, n_peaks=None):
+        """
+        Builds the index from 0-based (feature, peak) pairs. The number of
+        features and peaks defaults to the largest index + 1.
+        """
+        features = np.asarray(features, dtype=np.int64)
+        peaks = np.asarray(peaks, dtype=np.int64)
+        if n_features is None:
+            n_features = int(features.max()) + 1 if len(features) else 0
+        if n_peaks is None:
+            n_peaks = int(peaks.max()) + 1 if len(peaks) else 0
+
+        if len(features) and (features.min() < 0 or features.max() >= n_features):
+            raise ValueError(f"Feature indices must lie within 0 and {n_features}.")
+        if len(peaks) and (peaks.min() < 0 or peaks.max() >= n_peaks):
+            raise ValueError(f"Peak indices must lie within 0 and {n_peaks}.")
+
+        return cls(*_csr(features, peaks, n_features), *_csr(peaks, features, n_peaks))
+
+    def peaks(self, feature):
+        """Returns the peaks of a feature."""
+        return self.feature_peaks[
+            self.feature_indptr[feature] : self.feature_indptr[feature + 1]
+        ]
+
+    def features(self, peak):
+        """Returns the features of a peak."""
+        return self.peak_features[self.peak_indptr[peak] : self.peak_indptr[peak + 1]]
+
+    def edges(self):
+        """Returns the feature and peak of all pairs, sorted by feature."""
+        return (
+            np.repeat(np.arange(self.n_features), np.diff(self.feature_indptr)),
+            np.asarray(self.feature_peaks),
+        )
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """Loads the index stored next to the edge list of an XCMSExperiment."""
+        return cls(
+            **{
+                name: np.load(array_path, mmap_mode=mmap_mode)
+                for name, array_path in feature_peak_index_paths(path).items()
+            }
+        )
+
+    def save(self, path):
+        for name, array_path in feature_peak_index_paths(path).items():
+            np.save(array_path, getattr(self, name))
+
+
+def read_feature_peak_edges(path):
+    """
+    Returns the 0-based feature and peak of all pairs of an
+    xcms_experiment_feature_peak_index.txt edge list (1-based in R).
+    """
+    edges = pd.read_csv(
+        path,
+        sep="\t",
+        header=None,
+        skiprows=1,
+        usecols=[1, 2],
+        dtype=np.int64,
+    )
+    return edges[1].to_numpy() - 1, edges[2].to_numpy() - 1
+
+
+def build_feature_peak_index(path):
+    """
+    Builds the feature peak index of an XCMSExperiment directory from its edge
+    list. The number of features and peaks is the number of rows of the
+    feature definitions and chromatographic peaks tables, if present, in the
+    text or the columnar layout.
+    """
+    n_rows = {}
+    for name in ("xcms_experiment_feature_definitions", "xcms_experiment_chrom_peaks"):
+        table = os.path.join(path, name)
+        if os.path.isfile(f"{table}.txt"):
+            n_rows[name] = _count_rows(f"{table}.txt")
+        elif os.path.isdir(table):
+            # Stored as columns by XCMSExperimentColumnarDirFmt
+            n_rows[name] = count_columnar_rows(table)
+        else:
+            n_rows[name] = None
+
+    features, peaks = read_feature_peak_edges(
+        os.path.join(path, f"{FEATURE_PEAK_INDEX}.txt")
+    )
+    return FeaturePeakIndex.from_edges(
+        features,
+        peaks,
+        n_features=n_rows["xcms_experiment_feature_definitions"],
+        n_peaks=n_rows["xcms_experiment_chrom_peaks"],
+    )
+
+
+def load_feature_peak_index(path):
+    """
+    Returns the feature peak index of an XCMSExperiment directory, loaded from
+    its stored CSR arrays if present and built from the edge list otherwise.
+    """
+    if all(map(os.path.isfile, feature_peak_index_paths(path).values())):
+        return FeaturePeakIndex.load(path)
+    return build_feature_peak_index(path)
+
+
+def write_feature_peak_index(path):
+    """Builds the feature peak index of an XCMSExperiment and stores it."""
+    build_feature_peak_index(path).save(path)
@@ -5,40 +5,195 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+import csv
+import io
 import json
 import os
 import re
 import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
+import numpy as np
 import pandas as pd
-import pymzml
 from qiime2.core.exceptions import ValidationError
 from qiime2.plugin import model
 
+from q2_ms._metrics import count, measure
+from q2_ms.types._binned import BINNED_METADATA, bin_spectra, load_binned
+from q2_ms.types._chromatograms import (
+    CHROMATOGRAM_DTYPES,
+    ION_CHROMATOGRAM_DTYPES,
+    read_chromatograms,
+)
+from q2_ms.types._columnar import SCHEMA_FILE, read_schema
+from q2_ms.types._feature_peaks import (
+    FEATURE_PEAK_ARRAYS,
+    FEATURE_PEAK_INDEX,
+    FeaturePeakIndex,
+    feature_peak_index_paths,
+    read_feature_peak_edges,
+)
+from q2_ms.types._library import SpectralLibrary
+from q2_ms.types._lsh import LSH_METADATA, LSHIndex
+from q2_ms.types._matched import CHUNK_ROWS as MATCHED_SPECTRA_CHUNK_ROWS
+from q2_ms.types._matched import open_matches
+from q2_ms.types._ms1_index import MS1_INDEX_ARRAYS, MS1_INDEX_METADATA, MS1PeakIndex
+from q2_ms.types._msp import _is_decimal
+from q2_ms.types._mzml import OFFSET_INDEX_SUFFIX, open_mzml
+from q2_ms.types._peaks import PEAK_STORE_SUFFIXES, SamplePeaks
+from q2_ms.types._validation import cached_validation, validation_cache
+
+# Bytes at the start of an mzML file searched for its root element
+MZML_ROOT_BYTES = 64 * 1024
+_MZML_ROOT = re.compile(rb"<(?:indexedmzML|mzML)[\s>]")
+
+
+def _validate_mzml(path):
+    """Returns the validation error of an mzML file or None if it is valid."""
+    with measure("validate_mzml_file", path=path) as fields:
+        try:
+            open_mzml(path).close()
+        except Exception as e:
+            fields["invalid"] = True
+            return str(e)
+
+
+def _silence_stdout():
+    # Older pymzml versions print a notice for each file without an index. The
+    # workers are single-threaded, so their sys.stdout can simply be replaced.
+    sys.stdout = open(os.devnull, "w")
+
+
+def _validate_mzml_files(paths, max_workers=None):
+    """
+    Validates mzML files concurrently in worker processes, which do not print
+    pymzml's missing index notice.
+    """
+    if not paths:
+        return []
+
+    max_workers = min(len(paths), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_silence_stdout
+    ) as executor:
+        return list(
+            executor.map(
+                _validate_mzml,
+                paths,
+                chunksize=max(1, len(paths) // (4 * max_workers)),
+            )
+        )
+
 
 class mzMLFormat(model.TextFileFormat):
     def _validate(self, n_records=None):
+        error = _validate_mzml(str(self))
+        if error is not None:
+            raise ValidationError(error)
+
+    @cached_validation
+    def _validate_(self, level):
+        self._validate()
+
+
+class mzMLOffsetIndexFormat(model.BinaryFileFormat):
+    def _validate(self):
         try:
-            # Suppressing warning print "Not index found and build_index_from_scratch
-            # is False". This could also be solved with setting build_index_from_scratch
-            # to True but this builds the index and slows down validation.
-            sys.stdout = open(os.devnull, "w")
-            pymzml.run.Reader(str(self))
-            sys.stdout = sys.__stdout__
-        except Exception as e:
-            raise ValidationError(e)
+            index = np.load(str(self), mmap_mode="r")
+        except ValueError as e:
+            raise ValidationError(f"File is not a NumPy array (.npy) file: {e}")
+
+        if index.ndim != 1 or index.dtype.names != ("id", "scan", "offset"):
+            raise ValidationError(
+                "The spectrum offset index must be a one-dimensional array with "
+                "the fields id, scan and offset."
+            )
+        if np.any(np.diff(index["offset"]) <= 0):
+            raise ValidationError("The spectrum offsets must be increasing.")
+
+    @cached_validation
+    def _validate_(self, level):
+        self._validate()
+
+
+class mzMLSampleFormat(model.TextFileFormat):
+    """
+    mzML file of a sample in an mzMLDirFmt. Only its root element is checked
+    here, mzMLDirFmt parses all samples concurrently once they were found.
+    """
+
+    def _validate(self):
+        with open(str(self), "rb") as file:
+            if _MZML_ROOT.search(file.read(MZML_ROOT_BYTES)) is None:
+                raise ValidationError("The file has no mzML root element.")
 
     def _validate_(self, level):
         self._validate()
 
 
 class mzMLDirFmt(model.DirectoryFormat):
-    mzml = model.FileCollection(r".*\.mzML$", format=mzMLFormat)
+    mzml = model.FileCollection(r".*\.mzML$", format=mzMLSampleFormat)
+    # Optional spectrum offset indices written by the index-mzml action
+    offsets = model.FileCollection(
+        r".*\.mzML\.offsets\.npy$", format=mzMLOffsetIndexFormat, optional=True
+    )
 
     @mzml.set_path_maker
     def mzml_path_maker(self, sample_id):
         return f"{sample_id}.mzML"
 
+    @offsets.set_path_maker
+    def offsets_path_maker(self, sample_id):
+        return f"{sample_id}.mzML{OFFSET_INDEX_SUFFIX}"
+
+    def _validate_samples(self, level):
+        # The samples are parsed with pymzml concurrently rather than one after
+        # another by their member format
+        paths = sorted(
+            str(p)
+            for p in self.path.glob("**/*.mzML")
+            if p.is_file() and not p.name.startswith(".")
+        )
+
+        # Files that passed before are skipped if the validation cache is enabled
+        cache, keys = validation_cache(), {}
+        if cache is not None:
+            keys = {path: cache.key(mzMLFormat, level, path) for path in paths}
+            paths = [path for path in paths if not cache.hit(keys[path])]
+
+        for path, error in zip(paths, _validate_mzml_files(paths)):
+            if error is not None:
+                raise ValidationError(f"{path} is not a(n) mzMLFormat file:\n\n{error}")
+            if cache is not None:
+                cache.add(keys[path])
+
+    @cached_validation
+    def _validate_(self, level):
+        self._validate_samples(level)
+
+        for index_path in sorted(self.path.glob(f"**/*.mzML{OFFSET_INDEX_SUFFIX}")):
+            mzml_path = str(index_path)[: -len(OFFSET_INDEX_SUFFIX)]
+            if not os.path.isfile(mzml_path):
+                raise ValidationError(
+                    f"{index_path.name} is an offset index without mzML file."
+                )
+
+            if level == "max":
+                # Every offset has to point at the opening tag of a spectrum
+                index = np.load(index_path, mmap_mode="r")
+                with open(mzml_path, "rb") as file:
+                    for offset in index["offset"].tolist():
+                        file.seek(offset)
+                        tag = file.read(10)
+                        if tag[:9] != b"<spectrum" or not tag[9:].isspace():
+                            raise ValidationError(
+                                f"The offset index {index_path.name} is out of date. "
+                                f"No spectrum starts at byte {offset} of the mzML "
+                                "file."
+                            )
+
 
 class MSBackendDataFormat(model.TextFileFormat):
     def _validate(self):
@@ -81,6 +236,7 @@ class MSBackendDataFormat(model.TextFileFormat):
                 f"{header_obs_1[0]}\n" + "\t".join(header_obs_2)
             )
 
+    @cached_validation
     def _validate_(self, level):
         self._validate()
 
@@ -99,6 +255,7 @@ class MSExperimentLinkMColsFormat(model.TextFileFormat):
                 f"{first_line}"
             )
 
+    @cached_validation
     def _validate_(self, level):
         self._validate()
 
@@ -113,6 +270,7 @@ class MSExperimentSampleDataLinksSpectra(model.TextFileFormat):
                 "It must consist of exactly two columns."
             )
 
+    @cached_validation
     def _validate_(self, level):
         self._validate()
 
@@ -129,6 +287,7 @@ class MSExperimentSampleDataFormat(model.TextFileFormat):
                 + ", ".join(header_obs)
             )
 
+    @cached_validation
     def _validate_(self, level):
         self._validate()
 
@@ -158,6 +317,7 @@ class XCMSExperimentJSONFormat(model.TextFileFormat):
         except json.JSONDecodeError as e:
             raise ValidationError(f"File is not valid JSON: {e}")
 
+    @cached_validation
     def _validate_(self, level):
         self._validate()
 
@@ -192,6 +352,7 @@ class SpectraSlotsFormat(model.TextFileFormat):
                 "backend = ...\n"
             )
 
+    @cached_validation
     def _validate_(self, level):
         self._validate()
 
@@ -210,6 +371,7 @@ class XCMSExperimentChromPeakDataFormat(model.TextFileFormat):
                 + ", ".join(header_obs)
             )
 
+    @cached_validation
     def _validate_(self, level):
         self._validate()
 
@@ -240,6 +402,7 @@ class XCMSExperimentChromPeaksFormat(model.TextFileFormat):
                 + ", ".join(header_obs)
             )
 
+    @cached_validation
     def _validate_(self, level):
         self._validate()
 
@@ -268,6 +431,7 @@ class XCMSExperimentFeatureDefinitionsFormat(model.TextFileFormat):
                 + ", ".join(header_obs)
             )
 
+    @cached_validation
     def _validate_(self, level):
         self._validate()
 
@@ -286,10 +450,85 @@ class XCMSExperimentFeaturePeakIndexFormat(model.TextFileFormat):
                 + ", ".join(header_obs)
             )
 
+    @cached_validation
     def _validate_(self, level):
         self._validate()
 
 
+class NumpyArrayFormat(model.BinaryFileFormat):
+    def _validate(self):
+        with self.open() as file:
+            magic = file.read(6)
+
+        if magic != b"\x93NUMPY":
+            raise ValidationError("File is not a NumPy array (.npy) file.")
+
+    @cached_validation
+    def _validate_(self, level):
+        self._validate()
+
+
+def _validate_feature_peak_csr(path, level):
+    """Validates the feature peak index arrays of an XCMSExperiment, if any."""
+    paths = feature_peak_index_paths(path)
+    missing = [
+        name for name, array_path in paths.items() if not os.path.isfile(array_path)
+    ]
+    if len(missing) == len(paths):
+        return
+    if missing:
+        raise ValidationError(
+            f"The feature peak index arrays {', '.join(missing)} are missing."
+        )
+    edge_list = os.path.join(path, f"{FEATURE_PEAK_INDEX}.txt")
+    if not os.path.isfile(edge_list):
+        raise ValidationError(
+            f"The feature peak index arrays require {FEATURE_PEAK_INDEX}.txt."
+        )
+
+    index = FeaturePeakIndex.load(path)
+    count(edges=len(index))
+    for indptr_name, indices_name, n_values in (
+        ("feature_indptr", "feature_peaks", index.n_peaks),
+        ("peak_indptr", "peak_features", index.n_features),
+    ):
+        indptr, indices = getattr(index, indptr_name), getattr(index, indices_name)
+        if (
+            indptr.ndim != 1
+            or len(indptr) == 0
+            or indptr[0] != 0
+            or indptr[-1] != len(indices)
+            or np.any(np.diff(indptr) < 0)
+        ):
+            raise ValidationError(
+                f"{indptr_name} must be non-decreasing row pointers from 0 to the "
+                f"length of {indices_name}."
+            )
+        if len(indices) and (indices.min() < 0 or indices.max() >= n_values):
+            raise ValidationError(
+                f"The values of {indices_name} must lie within 0 and {n_values}."
+            )
+    if len(index.feature_peaks) != len(index.peak_features):
+        raise ValidationError(
+            "feature_peaks and peak_features must hold the same assignments."
+        )
+
+    if level == "max":
+        features, peaks = read_feature_peak_edges(edge_list)
+        try:
+            expected = FeaturePeakIndex.from_edges(
+                features, peaks, index.n_features, index.n_peaks
+            )
+        except ValueError as e:
+            raise ValidationError(f"The feature peak index is out of date. {e}")
+        for name in FEATURE_PEAK_ARRAYS:
+            if not np.array_equal(getattr(expected, name), getattr(index, name)):
+                raise ValidationError(
+                    f"The feature peak index is out of date. {name} does not "
+                    f"match {FEATURE_PEAK_INDEX}.txt."
+                )
+
+
 class XCMSExperimentDirFmt(model.DirectoryFormat):
     ms_backend_data = model.File(
         pathspec="ms_backend_data.txt",
@@ -340,10 +579,25 @@ class XCMSExperimentDirFmt(model.DirectoryFormat):
         format=XCMSExperimentFeaturePeakIndexFormat,
         optional=True,
     )
+    # Optional CSR arrays of the feature peak index written by the
+    # index-xcms-experiment action
+    xcms_experiment_feature_peak_csr = model.FileCollection(
+        rf"{FEATURE_PEAK_INDEX}\.({'|'.join(FEATURE_PEAK_ARRAYS)})\.npy$",
+        format=NumpyArrayFormat,
+        optional=True,
+    )
+
+    @xcms_experiment_feature_peak_csr.set_path_maker
+    def xcms_experiment_feature_peak_csr_path_maker(self, name):
+        return f"{FEATURE_PEAK_INDEX}.{name}.npy"
+
+    @cached_validation
+    def _validate_(self, level):
+        _validate_feature_peak_csr(str(self), level)
 
 
 class MSPFormat(model.TextFileFormat):
-    def _validate(self):
+    def _validate(self, n_spectra=None, max_errors=20):
         """
         MSP format that adheres to the rules listed in the MsBackendMsp R package.
         - Comment lines are expected to start with a #.
@@ -357,97 +611,897 @@ class MSPFormat(model.TextFileFormat):
         - An MSP file can define/provide data for any number of spectra, with no limit
         on the number of spectra, number of peaks per spectra or number of metadata
         lines.
+
+        The file is validated in a single streaming pass. Only the first `n_spectra`
+        spectra are checked if it is set and at most `max_errors` errors are
+        reported, the remaining ones are only counted.
         """
         errors = []
+        n_errors = 0
+        n_seen = 0
+        in_spectrum = False
         peak_section = False
 
-        metadata_pattern = re.compile(r"^.*:.*$")  # Faster metadata detection
-        peak_pattern = re.compile(r"^\d+(\.\d+)?[ \t]+\d+(\.\d+)?(?:[ \t]+.*)?$")
-
         with open(self.path, "r", encoding="utf-8") as f:
             for i, line in enumerate(f):
                 line = line.strip()
 
                 # Switch to metadata section at empty lines
                 if not line:
+                    if in_spectrum:
+                        n_seen += 1
+                        in_spectrum = False
+                        if n_spectra is not None and n_seen >= n_spectra:
+                            break
                     peak_section = False
                     continue
 
                 # Check if the line is a comment
-                if line.startswith("#"):
+                if line[0] == "#":
                     continue
 
-                # Switch to peak section if pattern matches
-                if not peak_section and peak_pattern.match(line):
-                    peak_section = True
+                in_spectrum = True
+                # At most the first three tokens are needed to classify a line
+                tokens = line.split(None, 2)
+
+                # Switch to peak section if the line starts with two numbers
+                if not peak_section:
+                    if (
+                        len(tokens) >= 2
+                        and _is_decimal(tokens[0])
+                        and _is_decimal(tokens[1])
+                    ):
+                        peak_section = True
+                    # Metadata validation (must have "key: value" format)
+                    elif ":" not in line:
+                        n_errors += 1
+                        if n_errors <= max_errors:
+                            errors.append(
+                                f"Line {i}: Invalid metadata format (should be "
+                                f"'key: value').\n{line}"
+                            )
+                        continue
 
-                # Metadata validation (must have "key: value" format)
-                if not peak_section and not metadata_pattern.match(line):
-                    errors.append(
-                        f"Line {i}: Invalid metadata format (should be 'key: value')."
-                        f"\n{line}"
-                    )
                 # Peak data validation (must be m/z and intensity, whitespace or
                 # tab-separated, and allow additional values)
-                if peak_section and len(line.split()) < 2:
-                    errors.append(
-                        f"Line {i}: Peak data must have at least m/z and intensity "
-                        f"values.\n{line}"
-                    )
+                if peak_section and len(tokens) < 2:
+                    n_errors += 1
+                    if n_errors <= max_errors:
+                        errors.append(
+                            f"Line {i}: Peak data must have at least m/z and "
+                            f"intensity values.\n{line}"
+                        )
 
+        count(spectra=n_seen + in_spectrum)
+        if n_errors > max_errors:
+            errors.append(f"... and {n_errors - max_errors} more errors.")
         if errors:
             raise ValidationError("\n".join(errors))
 
+    @cached_validation
     def _validate_(self, level):
-        self._validate()
+        self._validate({"min": 50, "max": None}[level])
 
 
 MSPDirFmt = model.SingleFileDirectoryFormat("MSPDirFmt", r".+\.msp$", MSPFormat)
 
 
-class MatchedSpectraFormat(model.TextFileFormat):
-    def _validate(self, lines=None):
-        header_exp = [".original_query_index", "target_spectrum_id", "score"]
+class CompressedPeaksFormat(model.BinaryFileFormat):
+    def _validate(self):
+        with self.open() as file:
+            header = file.read(2)
 
-        with open(str(self), "r") as f:
-            for i, line in enumerate(f, 1):
-                parts = line.rstrip("\n").split("\t")
-
-                # Header check
-                if i == 1:
-                    if parts != header_exp:
-                        raise ValidationError(
-                            "Header does not match MatchedSpectraFormat. It must "
-                            "at least consist of the following columns:\n"
-                            + ", ".join(header_exp)
-                            + "\n\nFound instead:\n"
-                            + ", ".join(parts)
-                        )
-                    continue
+        # Chunks are zlib streams, the first one starts at the beginning
+        if header and (len(header) < 2 or int.from_bytes(header, "big") % 31):
+            raise ValidationError("File does not start with a zlib stream.")
+
+    @cached_validation
+    def _validate_(self, level):
+        self._validate()
+
+
+class mzMLPeaksDirFmt(model.DirectoryFormat):
+    """
+    Peaks and scan metadata of the spectra of each sample, decoded from mzML
+    once and stored as compressed binary arrays (see q2_ms.types._peaks).
+    """
+
+    peaks = model.FileCollection(r".*\.peaks\.bin$", format=CompressedPeaksFormat)
+    chunks = model.FileCollection(r".*\.chunks\.npy$", format=NumpyArrayFormat)
+    offsets = model.FileCollection(r".*\.peak_offsets\.npy$", format=NumpyArrayFormat)
+    spectra = model.FileCollection(r".*\.spectra\.npy$", format=NumpyArrayFormat)
+
+    @peaks.set_path_maker
+    def peaks_path_maker(self, sample_id):
+        return f"{sample_id}{PEAK_STORE_SUFFIXES['peaks']}"
+
+    @chunks.set_path_maker
+    def chunks_path_maker(self, sample_id):
+        return f"{sample_id}{PEAK_STORE_SUFFIXES['chunks']}"
+
+    @offsets.set_path_maker
+    def offsets_path_maker(self, sample_id):
+        return f"{sample_id}{PEAK_STORE_SUFFIXES['offsets']}"
+
+    @spectra.set_path_maker
+    def spectra_path_maker(self, sample_id):
+        return f"{sample_id}{PEAK_STORE_SUFFIXES['spectra']}"
+
+    @cached_validation
+    def _validate_(self, level):
+        samples = set()
+        for path in self.path.iterdir():
+            for suffix in PEAK_STORE_SUFFIXES.values():
+                if path.name.endswith(suffix):
+                    samples.add(path.name[: -len(suffix)])
+
+        for sample_id in sorted(samples):
+            for name, suffix in PEAK_STORE_SUFFIXES.items():
+                if not (self.path / f"{sample_id}{suffix}").is_file():
+                    raise ValidationError(
+                        f"The {name} file {sample_id}{suffix} of sample "
+                        f"{sample_id} is missing."
+                    )
+            self._validate_sample(SamplePeaks(str(self), sample_id), level)
+
+    def _validate_sample(self, sample, level):
+        count(spectra=len(sample))
+        offsets, chunks = sample.offsets, sample.chunks
+
+        if len(offsets) != len(sample) + 1 or offsets[0] != 0:
+            raise ValidationError(
+                f"The peak offsets of sample {sample.sample_id} must start at 0 "
+                "and hold one more value than there are spectra."
+            )
+        if np.any(np.diff(offsets) < 0):
+            raise ValidationError(
+                f"The peak offsets of sample {sample.sample_id} must not decrease."
+            )
 
-                # Column count check
-                if len(parts) != 3:
-                    raise ValidationError(f"Line {i} does not have 3 columns.")
+        # The chunks have to cover all spectra and the peaks file without gaps
+        starts = np.append(chunks["start"], len(sample))
+        stops = np.insert(chunks["stop"], 0, 0)
+        ends = np.insert(chunks["offset"] + chunks["size"], 0, 0)
+        if (
+            np.any(starts != stops)
+            or np.any(chunks["offset"] != ends[:-1])
+            or ends[-1] != os.path.getsize(sample.paths["peaks"])
+        ):
+            raise ValidationError(
+                f"The chunks of sample {sample.sample_id} do not cover its spectra "
+                "and peaks file contiguously."
+            )
 
-                # Score value check
+        if level == "max":
+            for index in range(len(chunks)):
                 try:
-                    score = float(parts[2])
-                    if not (0 <= score <= 1):
-                        raise ValidationError(
-                            "The values in the score column have to be between 0 and "
-                            f"1. Line {i} has an out-of-range score: {score}"
-                        )
-                except ValueError:
+                    sample.read_chunk(index)
+                except (ValueError, zlib.error) as e:
                     raise ValidationError(
-                        f"Line {i} has a non-numeric score: {parts[2]}"
+                        f"Chunk {index} of sample {sample.sample_id} is corrupt: {e}"
                     )
-                if lines is not None and i - 1 >= lines:
-                    break
 
+
+class MS1PeakIndexMetadataFormat(model.TextFileFormat):
+    def _validate(self):
+        try:
+            with self.open() as file:
+                metadata = json.load(file)
+        except json.JSONDecodeError as e:
+            raise ValidationError(f"File is not valid JSON: {e}")
+
+        width = metadata.get("mz_bin_width") if isinstance(metadata, dict) else None
+        if not isinstance(width, (int, float)) or width <= 0:
+            raise ValidationError("mz_bin_width must be a positive number.")
+
+    @cached_validation
     def _validate_(self, level):
-        self._validate({"min": 50, "max": None}[level])
+        self._validate()
+
+
+class MS1PeakIndexDirFmt(model.DirectoryFormat):
+    """
+    MS1 peaks of each sample binned by m/z and sorted by retention time within
+    each bin (see q2_ms.types._ms1_index).
+    """
+
+    metadata = model.File(MS1_INDEX_METADATA, format=MS1PeakIndexMetadataFormat)
+    arrays = model.FileCollection(
+        rf".*\.ms1_({'|'.join(MS1_INDEX_ARRAYS)})\.npy$", format=NumpyArrayFormat
+    )
+
+    @arrays.set_path_maker
+    def arrays_path_maker(self, sample_id, name):
+        return f"{sample_id}.ms1_{name}.npy"
+
+    @cached_validation
+    def _validate_(self, level):
+        with open(self.path / MS1_INDEX_METADATA) as file:
+            mz_bin_width = json.load(file)["mz_bin_width"]
+
+        samples = set()
+        for name in MS1_INDEX_ARRAYS:
+            suffix = f".ms1_{name}.npy"
+            samples.update(
+                path.name[: -len(suffix)] for path in self.path.glob(f"*{suffix}")
+            )
+
+        for sample_id in sorted(samples):
+            for name in MS1_INDEX_ARRAYS:
+                if not (self.path / f"{sample_id}.ms1_{name}.npy").is_file():
+                    raise ValidationError(
+                        f"The {name} array of sample {sample_id} is missing."
+                    )
+            self._validate_sample(
+                MS1PeakIndex(str(self), sample_id, mz_bin_width), level
+            )
+
+    def _validate_sample(self, index, level):
+        count(spectra=len(index), peaks=len(index.scan))
+        sample_id, bins = index.sample_id, index.bins
+
+        if len(index.spectrum_index) != len(index.rt):
+            raise ValidationError(
+                f"Sample {sample_id} must have one spectrum index per retention "
+                "time."
+            )
+        # Spectra without retention time are sorted to the end
+        rt = index.rt[: int(np.count_nonzero(~np.isnan(index.rt)))]
+        if np.any(np.isnan(rt)) or np.any(np.diff(rt) < 0):
+            raise ValidationError(
+                f"The retention times of sample {sample_id} must be sorted."
+            )
+        if len(bins) == 0 or bins[0] != 0 or np.any(np.diff(bins) < 0):
+            raise ValidationError(
+                f"The bin offsets of sample {sample_id} must start at 0 and must "
+                "not decrease."
+            )
+        if not bins[-1] == len(index.scan) == len(index.mz) == len(index.intensity):
+            raise ValidationError(
+                f"The last bin offset of sample {sample_id} must equal the number "
+                "of peaks."
+            )
+
+        if level == "max":
+            peak_bins = np.repeat(np.arange(len(bins) - 1), np.diff(bins))
+            if np.any(np.floor(index.mz / index.mz_bin_width) != peak_bins):
+                raise ValidationError(
+                    f"Peaks of sample {sample_id} are stored in the wrong m/z bin."
+                )
+            if np.any((index.scan < 0) | (index.scan >= len(index.rt))):
+                raise ValidationError(
+                    f"Peaks of sample {sample_id} refer to unknown spectra."
+                )
+            same_bin = peak_bins[1:] == peak_bins[:-1]
+            if np.any(np.diff(index.scan)[same_bin] < 0):
+                raise ValidationError(
+                    f"The peaks of sample {sample_id} must be sorted by retention "
+                    "time within each m/z bin."
+                )
+
+
+class SpectralLibraryDirFmt(model.DirectoryFormat):
+    mz = model.File("mz.npy", format=NumpyArrayFormat)
+    intensity = model.File("intensity.npy", format=NumpyArrayFormat)
+    offsets = model.File("offsets.npy", format=NumpyArrayFormat)
+    name = model.File("name.npy", format=NumpyArrayFormat)
+    precursor_mz = model.File("precursor_mz.npy", format=NumpyArrayFormat)
+    ion_mode = model.File("ion_mode.npy", format=NumpyArrayFormat)
+    spectrum_type = model.File("spectrum_type.npy", format=NumpyArrayFormat)
+    inchikey = model.File("inchikey.npy", format=NumpyArrayFormat)
+    db_id = model.File("db_id.npy", format=NumpyArrayFormat)
+    precursor_order = model.File("precursor_order.npy", format=NumpyArrayFormat)
+    precursor_sorted = model.File("precursor_sorted.npy", format=NumpyArrayFormat)
+    precursor_partitions = model.File(
+        "precursor_partitions.npy", format=NumpyArrayFormat
+    )
+
+    @cached_validation
+    def _validate_(self, level):
+        self._validate_library(SpectralLibrary.load(str(self)), level)
+
+    def _validate_library(self, library, level):
+        count(spectra=len(library))
+        offsets = library.offsets
+
+        if offsets.ndim != 1 or len(offsets) == 0 or offsets[0] != 0:
+            raise ValidationError(
+                "The peak offsets must be a one-dimensional array starting at 0."
+            )
+        if not offsets[-1] == len(library.mz) == len(library.intensity):
+            raise ValidationError(
+                "The last peak offset must equal the number of m/z and intensity "
+                f"values. Found a last offset of {offsets[-1]}, {len(library.mz)} "
+                f"m/z and {len(library.intensity)} intensity values."
+            )
+        for column in (
+            "name",
+            "precursor_mz",
+            "ion_mode",
+            "spectrum_type",
+            "inchikey",
+            "db_id",
+            "precursor_order",
+            "precursor_sorted",
+        ):
+            if len(getattr(library, column)) != len(library):
+                raise ValidationError(
+                    f"Column '{column}' must have one value per spectrum "
+                    f"({len(library)})."
+                )
+
+        partitions = library.precursor_partitions
+        bounds = np.append(partitions["start"], len(library))
+        if bounds[0] != 0 or not np.array_equal(bounds[1:], partitions["stop"]):
+            raise ValidationError(
+                "The precursor index partitions must cover all spectra without gaps."
+            )
+
+        if level == "max":
+            if np.any(np.diff(offsets) < 0):
+                raise ValidationError("The peak offsets must be non-decreasing.")
+            for start, stop in zip(partitions["start"], partitions["stop"]):
+                # NaN (missing precursors) is sorted last, so compare with fmax
+                sorted_mz = library.precursor_sorted[start:stop]
+                if np.any(np.fmax(sorted_mz[1:], sorted_mz[:-1]) != sorted_mz[1:]):
+                    raise ValidationError(
+                        "The precursor index must be sorted by precursor m/z."
+                    )
+
+
+class BinnedSpectralLibraryMetadataFormat(model.TextFileFormat):
+    def _validate(self):
+        try:
+            with self.open() as file:
+                metadata = json.load(file)
+        except json.JSONDecodeError as e:
+            raise ValidationError(f"File is not valid JSON: {e}")
+
+        if not isinstance(metadata, dict):
+            raise ValidationError("File must hold a JSON object.")
+        width = metadata.get("bin_width")
+        if not isinstance(width, (int, float)) or width <= 0:
+            raise ValidationError("bin_width must be a positive number.")
+        n_bins = metadata.get("n_bins")
+        if not isinstance(n_bins, int) or n_bins < 0:
+            raise ValidationError("n_bins must be a non-negative integer.")
+
+    @cached_validation
+    def _validate_(self, level):
+        self._validate()
+
+
+class BinnedSpectralLibraryDirFmt(SpectralLibraryDirFmt):
+    """
+    Spectral library together with its spectra binned into a CSR matrix of
+    L2-normalized peak vectors (see q2_ms.types._binned).
+    """
+
+    binned_metadata = model.File(
+        BINNED_METADATA, format=BinnedSpectralLibraryMetadataFormat
+    )
+    binned_data = model.File("binned_data.npy", format=NumpyArrayFormat)
+    binned_indices = model.File("binned_indices.npy", format=NumpyArrayFormat)
+    binned_indptr = model.File("binned_indptr.npy", format=NumpyArrayFormat)
+
+    @cached_validation
+    def _validate_(self, level):
+        library = SpectralLibrary.load(str(self))
+        self._validate_library(library, level)
+        self._validate_binned(library, level)
+
+    def _validate_binned(self, library, level):
+        bin_width, matrix = load_binned(str(self))
+        indptr, indices = matrix.indptr, matrix.indices
+        if len(indptr) != len(library) + 1:
+            raise ValidationError(
+                f"The binned spectra must have one row per spectrum "
+                f"({len(library)}), found {len(indptr) - 1}."
+            )
+        if indptr[0] != 0 or not indptr[-1] == len(indices) == len(matrix.data):
+            raise ValidationError(
+                "The binned row pointers must start at 0 and end at the number "
+                "of binned values."
+            )
+        if np.any(np.diff(indptr) < 0):
+            raise ValidationError("The binned row pointers must be non-decreasing.")
+        if len(indices) and (indices.min() < 0 or indices.max() >= matrix.shape[1]):
+            raise ValidationError(
+                f"The bin indices must lie within the {matrix.shape[1]} bins."
+            )
+
+        if level == "max":
+            expected = bin_spectra(library, bin_width)
+            if not (
+                matrix.shape[1] >= expected.shape[1]
+                and np.array_equal(expected.indptr, indptr)
+                and np.array_equal(expected.indices, indices)
+                and np.allclose(expected.data, matrix.data)
+            ):
+                raise ValidationError(
+                    f"The binned spectra do not match the library spectra binned "
+                    f"with a bin width of {bin_width}."
+                )
+
+
+class LSHIndexMetadataFormat(model.TextFileFormat):
+    def _validate(self):
+        try:
+            with self.open() as file:
+                metadata = json.load(file)
+        except json.JSONDecodeError as e:
+            raise ValidationError(f"File is not valid JSON: {e}")
+
+        if not isinstance(metadata, dict):
+            raise ValidationError("File must hold a JSON object.")
+        width = metadata.get("hash_bin_width")
+        if not isinstance(width, (int, float)) or width <= 0:
+            raise ValidationError("hash_bin_width must be a positive number.")
+        for key, maximum in (("n_tables", None), ("n_bits", 64)):
+            value = metadata.get(key)
+            if not isinstance(value, int) or value < 1:
+                raise ValidationError(f"{key} must be a positive integer.")
+            if maximum is not None and value > maximum:
+                raise ValidationError(f"{key} must not exceed {maximum}.")
+        if not isinstance(metadata.get("seed"), int) or metadata["seed"] < 0:
+            raise ValidationError("seed must be a non-negative integer.")
+
+    @cached_validation
+    def _validate_(self, level):
+        self._validate()
+
+
+class IndexedSpectralLibraryDirFmt(BinnedSpectralLibraryDirFmt):
+    """
+    Binned spectral library together with a locality-sensitive hashing index
+    of its spectra for approximate search (see q2_ms.types._lsh).
+    """
+
+    lsh_metadata = model.File(LSH_METADATA, format=LSHIndexMetadataFormat)
+    lsh_keys = model.File("lsh_keys.npy", format=NumpyArrayFormat)
+    lsh_order = model.File("lsh_order.npy", format=NumpyArrayFormat)
+
+    @cached_validation
+    def _validate_(self, level):
+        library = SpectralLibrary.load(str(self))
+        self._validate_library(library, level)
+        self._validate_binned(library, level)
+
+        index = LSHIndex.load(str(self))
+        keys, order = index.keys, index.order
+        if keys.shape != order.shape or keys.shape[1:] != (len(library),):
+            raise ValidationError(
+                f"The LSH keys and order must have one row per table and one "
+                f"column per spectrum ({len(library)}), found {keys.shape} keys "
+                f"and {order.shape} order."
+            )
+        if len(library) and (order.min() < 0 or order.max() >= len(library)):
+            raise ValidationError("The LSH order refers to unknown spectra.")
+        if np.any(keys[:, 1:] < keys[:, :-1]):
+            raise ValidationError("The LSH keys of each table must be sorted.")
+
+        if level == "max":
+            spectra = np.broadcast_to(np.arange(len(library)), order.shape)
+            if not np.array_equal(np.sort(order, axis=1), spectra):
+                raise ValidationError(
+                    "The LSH order of each table must hold each spectrum once."
+                )
+            codes = index.hash(library).T
+            if not np.array_equal(np.take_along_axis(codes, order, axis=1), keys):
+                raise ValidationError(
+                    "The LSH keys do not match the hash codes of the library "
+                    "spectra."
+                )
+
+
+class ColumnarTableSchemaFormat(model.TextFileFormat):
+    def _validate(self):
+        try:
+            with self.open() as file:
+                schema = json.load(file)
+        except json.JSONDecodeError as e:
+            raise ValidationError(f"File is not valid JSON: {e}")
+
+        if not isinstance(schema, dict) or not {"index", "columns"}.issubset(schema):
+            raise ValidationError(
+                "File does not match ColumnarTableSchemaFormat. The JSON object "
+                "must contain the keys: index, columns"
+            )
+
+    @cached_validation
+    def _validate_(self, level):
+        self._validate()
+
+
+def _validate_columnar_table(path):
+    schema = read_schema(path)
+    n_rows = None
+
+    for column in [schema["index"], *schema["columns"]]:
+        files = [f"{column['name']}.npy"]
+        if column["kind"] in ("nullable", "string"):
+            files.append(f"{column['name']}.na.npy")
+        elif column["kind"] == "category":
+            files.append(f"{column['name']}.categories.npy")
+
+        for file in files:
+            if not os.path.exists(os.path.join(path, file)):
+                raise ValidationError(
+                    f"File {file} of column '{column['name']}' is missing in {path}."
+                )
+
+        length = len(np.load(os.path.join(path, files[0]), mmap_mode="r"))
+        if n_rows is None:
+            n_rows = length
+        elif length != n_rows:
+            raise ValidationError(
+                f"Column '{column['name']}' in {path} has {length} values, "
+                f"expected {n_rows}."
+            )
+
+
+class XCMSExperimentColumnarDirFmt(model.DirectoryFormat):
+    # Tables stored as directories of .npy columns instead of text files
+    columnar_tables = (
+        "ms_backend_data",
+        "xcms_experiment_chrom_peak_data",
+        "xcms_experiment_chrom_peaks",
+    )
+
+    ms_backend_data_schema = model.File(
+        pathspec="ms_backend_data/schema.json",
+        format=ColumnarTableSchemaFormat,
+    )
+    ms_backend_data = model.FileCollection(
+        r"ms_backend_data/.+\.npy$", format=NumpyArrayFormat
+    )
+    ms_experiment_link_mcols = model.File(
+        pathspec="ms_experiment_link_mcols.txt",
+        format=MSExperimentLinkMColsFormat,
+    )
+    ms_experiment_sample_data_links_spectra = model.File(
+        pathspec="ms_experiment_sample_data_links_spectra.txt",
+        format=MSExperimentSampleDataLinksSpectra,
+    )
+    ms_experiment_sample_data = model.File(
+        pathspec="ms_experiment_sample_data.txt",
+        format=MSExperimentSampleDataFormat,
+    )
+    spectra_processing_queue = model.File(
+        pathspec="spectra_processing_queue.json",
+        format=XCMSExperimentJSONFormat,
+    )
+    spectra_slots = model.File(
+        pathspec="spectra_slots.txt",
+        format=SpectraSlotsFormat,
+    )
+    xcms_experiment_process_history = model.File(
+        pathspec="xcms_experiment_process_history.json",
+        format=XCMSExperimentJSONFormat,
+        optional=True,
+    )
+    xcms_experiment_chrom_peak_data_schema = model.File(
+        pathspec="xcms_experiment_chrom_peak_data/schema.json",
+        format=ColumnarTableSchemaFormat,
+        optional=True,
+    )
+    xcms_experiment_chrom_peak_data = model.FileCollection(
+        r"xcms_experiment_chrom_peak_data/.+\.npy$",
+        format=NumpyArrayFormat,
+        optional=True,
+    )
+    xcms_experiment_chrom_peaks_schema = model.File(
+        pathspec="xcms_experiment_chrom_peaks/schema.json",
+        format=ColumnarTableSchemaFormat,
+        optional=True,
+    )
+    xcms_experiment_chrom_peaks = model.FileCollection(
+        r"xcms_experiment_chrom_peaks/.+\.npy$",
+        format=NumpyArrayFormat,
+        optional=True,
+    )
+    xcms_experiment_feature_definitions = model.File(
+        pathspec="xcms_experiment_feature_definitions.txt",
+        format=XCMSExperimentFeatureDefinitionsFormat,
+        optional=True,
+    )
+    xcms_experiment_feature_peak_index = model.File(
+        pathspec="xcms_experiment_feature_peak_index.txt",
+        format=XCMSExperimentFeaturePeakIndexFormat,
+        optional=True,
+    )
+    # Optional CSR arrays of the feature peak index written by the
+    # index-xcms-experiment action
+    xcms_experiment_feature_peak_csr = model.FileCollection(
+        rf"{FEATURE_PEAK_INDEX}\.({'|'.join(FEATURE_PEAK_ARRAYS)})\.npy$",
+        format=NumpyArrayFormat,
+        optional=True,
+    )
+
+    @ms_backend_data.set_path_maker
+    def ms_backend_data_path_maker(self, column):
+        return f"ms_backend_data/{column}.npy"
+
+    @xcms_experiment_chrom_peak_data.set_path_maker
+    def xcms_experiment_chrom_peak_data_path_maker(self, column):
+        return f"xcms_experiment_chrom_peak_data/{column}.npy"
+
+    @xcms_experiment_chrom_peaks.set_path_maker
+    def xcms_experiment_chrom_peaks_path_maker(self, column):
+        return f"xcms_experiment_chrom_peaks/{column}.npy"
+
+    @xcms_experiment_feature_peak_csr.set_path_maker
+    def xcms_experiment_feature_peak_csr_path_maker(self, name):
+        return f"{FEATURE_PEAK_INDEX}.{name}.npy"
+
+    @cached_validation
+    def _validate_(self, level):
+        for table in self.columnar_tables:
+            path = os.path.join(str(self), table)
+            if os.path.exists(os.path.join(path, SCHEMA_FILE)):
+                _validate_columnar_table(path)
+        _validate_feature_peak_csr(str(self), level)
+
+
+# Bytes of matched spectra read at once and, for minimal validation of files
+# larger than MATCHED_SPECTRA_CHUNK_BYTES, number and size of evenly spaced
+# windows that are checked.
+MATCHED_SPECTRA_CHUNK_BYTES = 8 * 1024**2
+MATCHED_SPECTRA_SAMPLES = 16
+MATCHED_SPECTRA_SAMPLE_BYTES = 64 * 1024
+
+
+def _matched_spectra_errors(data, line_label):
+    """
+    Checks the complete lines in `data` and returns the errors of the first
+    kind found. `line_label(i)` names the i-th line of `data` in the messages.
+    """
+    if not data:
+        return []
+
+    # Number of tabs per line from the positions of all tabs and newlines
+    buf = np.frombuffer(data, dtype=np.uint8)
+    separators = buf[np.flatnonzero((buf == ord("\t")) | (buf == ord("\n")))]
+    tabs = np.diff(np.flatnonzero(separators == ord("\n")), prepend=-1) - 1
+    count(rows=len(tabs))
+
+    wrong_columns = np.flatnonzero(tabs != 2)
+    if len(wrong_columns):
+        return [f"{line_label(i)} does not have 3 columns." for i in wrong_columns]
+
+    read_scores = partial(
+        pd.read_csv,
+        sep="\t",
+        header=None,
+        usecols=[2],
+        quoting=csv.QUOTE_NONE,
+        na_filter=False,
+    )
+    try:
+        values = read_scores(io.BytesIO(data), dtype={2: np.float64})[2].to_numpy()
+        scores = values
+    except ValueError:
+        # Parse the scores as strings to locate the non-numeric ones
+        scores = read_scores(io.BytesIO(data), dtype=str)[2]
+        values = pd.to_numeric(scores, errors="coerce").to_numpy(dtype=np.float64)
+
+    errors = []
+    for i in np.flatnonzero(np.isnan(values) | (values < 0) | (values > 1)):
+        if np.isnan(values[i]):
+            errors.append(f"{line_label(i)} has a non-numeric score: {scores[i]}")
+        else:
+            errors.append(
+                "The values in the score column have to be between 0 and 1. "
+                f"{line_label(i)} has an out-of-range score: {values[i]}"
+            )
+    return errors
+
+
+class MatchedSpectraFormat(model.TextFileFormat):
+    def _validate(self, sample=False, max_errors=20):
+        header_exp = [".original_query_index", "target_spectrum_id", "score"]
+
+        with open(str(self), "rb") as f:
+            header = f.readline()
+            parts = header.decode("utf-8", "replace").rstrip("\r\n").split("\t")
+            if parts != header_exp:
+                raise ValidationError(
+                    "Header does not match MatchedSpectraFormat. It must "
+                    "at least consist of the following columns:\n"
+                    + ", ".join(header_exp)
+                    + "\n\nFound instead:\n"
+                    + ", ".join(parts)
+                )
+
+            size = os.fstat(f.fileno()).st_size
+            if sample and size - len(header) > MATCHED_SPECTRA_CHUNK_BYTES:
+                errors = self._check_windows(f, len(header), size)
+            else:
+                errors = self._check_chunks(f)
+
+        if errors:
+            if len(errors) > max_errors:
+                errors = errors[:max_errors] + [
+                    f"... and {len(errors) - max_errors} more errors."
+                ]
+            raise ValidationError("\n".join(errors))
+
+    @staticmethod
+    def _check_chunks(f):
+        """Checks all lines and returns the errors of the first faulty chunk."""
+        line, rest = 2, b""
+        while True:
+            chunk = f.read(MATCHED_SPECTRA_CHUNK_BYTES)
+            data = rest + chunk
+            if not chunk:
+                if not data:
+                    return []
+                data += b"\n"
+            end = data.rfind(b"\n") + 1
+            data, rest = data[:end], data[end:]
+
+            if data:
+                errors = _matched_spectra_errors(data, lambda i: f"Line {line + i}")
+                if errors:
+                    return errors
+                line += data.count(b"\n")
+            if not chunk:
+                return []
+
+    @staticmethod
+    def _check_windows(f, data_start, size):
+        """
+        Checks the complete lines of evenly spaced windows. Line numbers are not
+        known there, so lines are named by their byte offset.
+        """
+        last = size - MATCHED_SPECTRA_SAMPLE_BYTES
+        for offset in np.linspace(data_start, last, MATCHED_SPECTRA_SAMPLES):
+            offset = int(offset)
+            f.seek(offset)
+            data = f.read(MATCHED_SPECTRA_SAMPLE_BYTES)
+            if offset + len(data) == size and not data.endswith(b"\n"):
+                data += b"\n"
+
+            # Drop the partial lines at both ends of the window
+            first = 0 if offset == data_start else data.find(b"\n") + 1
+            data = data[first : data.rfind(b"\n") + 1]
+            starts = np.concatenate(
+                ([0], np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 10) + 1)
+            )
+
+            errors = _matched_spectra_errors(
+                data,
+                lambda i: f"Line at byte {offset + first + starts[i]}",
+            )
+            if errors:
+                return errors
+        return []
+
+    @cached_validation
+    def _validate_(self, level):
+        self._validate(sample=level == "min")
 
 
 MatchedSpectraDirFmt = model.SingleFileDirectoryFormat(
     "MatchedSpectraDirFmt", "matched_spectra.txt", MatchedSpectraFormat
 )
+
+
+class MatchedSpectraBinaryDirFmt(model.DirectoryFormat):
+    query_index = model.File("query_index.npy", format=NumpyArrayFormat)
+    target = model.File("target.npy", format=NumpyArrayFormat)
+    score = model.File("score.npy", format=NumpyArrayFormat)
+    target_ids = model.File("target_ids.npy", format=NumpyArrayFormat)
+
+    @cached_validation
+    def _validate_(self, level):
+        query, target, score, target_ids = open_matches(str(self))
+        count(rows=len(query))
+
+        for name, array, kind in (
+            ("query_index", query, "i"),
+            ("target", target, "i"),
+            ("score", score, "f"),
+        ):
+            if array.ndim != 1 or array.dtype.kind != kind:
+                raise ValidationError(
+                    f"Column '{name}' must be a one-dimensional "
+                    f"{'integer' if kind == 'i' else 'float'} array."
+                )
+        if not len(query) == len(target) == len(score):
+            raise ValidationError(
+                "Columns 'query_index', 'target' and 'score' must have the same "
+                f"length. Found {len(query)}, {len(target)} and {len(score)} values."
+            )
+
+        if level == "max":
+            for start in range(0, len(query), MATCHED_SPECTRA_CHUNK_ROWS):
+                chunk = slice(start, start + MATCHED_SPECTRA_CHUNK_ROWS)
+                if np.any(query[chunk] < 1):
+                    raise ValidationError("Query indices must be 1-based.")
+                if np.any((target[chunk] < 0) | (target[chunk] >= len(target_ids))):
+                    raise ValidationError(
+                        "Target codes must refer to one of the "
+                        f"{len(target_ids)} target spectrum IDs."
+                    )
+                scores = score[chunk]
+                if not np.all((scores >= 0) & (scores <= 1)):
+                    raise ValidationError(
+                        "The values in the score column have to be between 0 and 1."
+                    )
+
+
+def _join_columns(columns):
+    if len(columns) == 1:
+        return columns[0]
+    return f"{', '.join(columns[:-1])} and {columns[-1]}"
+
+
+class _ChromatogramTableFormat(model.TextFileFormat):
+    """Tab-separated table with a fixed header and typed columns."""
+
+    # Columns and their types, required and non-negative columns
+    DTYPES = {}
+    REQUIRED = ()
+    NON_NEGATIVE = ()
+
+    # Rows checked per chunk, and in total at the minimal validation level
+    CHUNK_ROWS = 100_000
+    MIN_ROWS = 1000
+
+    def _validate(self, n_rows=None):
+        columns = list(self.DTYPES)
+        header = pd.read_csv(str(self), sep="\t", nrows=0).columns.tolist()
+        if header != columns:
+            raise ValidationError(
+                f"Header does not match {type(self).__name__}. It must consist of "
+                "the following columns:\n"
+                + ", ".join(columns)
+                + "\n\nFound instead:\n"
+                + ", ".join(header)
+            )
+
+        try:
+            chunks = read_chromatograms(
+                str(self), dtype=self.DTYPES, nrows=n_rows, chunksize=self.CHUNK_ROWS
+            )
+            for chunk in chunks:
+                count(rows=len(chunk))
+                if chunk[list(self.REQUIRED)].isna().any(axis=None):
+                    raise ValidationError(
+                        f"The {_join_columns(self.REQUIRED)} columns must not be "
+                        "empty."
+                    )
+                if (chunk[list(self.NON_NEGATIVE)] < 0).any(axis=None):
+                    raise ValidationError(
+                        f"The values in the {_join_columns(self.NON_NEGATIVE)} "
+                        "columns must not be negative."
+                    )
+        except ValueError as e:
+            raise ValidationError(f"Columns have invalid values: {e}")
+
+    @cached_validation
+    def _validate_(self, level):
+        self._validate(n_rows=self.MIN_ROWS if level == "min" else None)
+
+
+class ChromatogramsFormat(_ChromatogramTableFormat):
+    DTYPES = CHROMATOGRAM_DTYPES
+    REQUIRED = ("sample_id", "tic", "bpc")
+    NON_NEGATIVE = ("tic", "bpc")
+
+
+ChromatogramsDirFmt = model.SingleFileDirectoryFormat(
+    "ChromatogramsDirFmt", "chromatograms.tsv", ChromatogramsFormat
+)
+
+
+class IonChromatogramsFormat(_ChromatogramTableFormat):
+    DTYPES = ION_CHROMATOGRAM_DTYPES
+    REQUIRED = ("sample_id", "target_id", "intensity")
+    NON_NEGATIVE = ("intensity",)
+
+
+IonChromatogramsDirFmt = model.SingleFileDirectoryFormat(
+    "IonChromatogramsDirFmt", "ion_chromatograms.tsv", IonChromatogramsFormat
+)
@@ -0,0 +1,260 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+from array import array
+
+import numpy as np
+
+from q2_ms.types._msp import iter_msp
+from q2_ms.types._mzml import open_mzml
+
+ION_MODES = {"positive": 1, "p": 1, "negative": -1, "n": -1}
+
+PARTITION_DTYPE = [
+    ("ion_mode", "i1"),
+    ("spectrum_type", "S16"),
+    ("start", "i8"),
+    ("stop", "i8"),
+]
+
+
+def _encode(values):
+    # Fixed-width UTF-8 byte strings keep the columns memory-mappable
+    return np.array([value.encode("utf-8") for value in values], dtype=bytes)
+
+
+def _ion_mode_code(ion_mode):
+    if isinstance(ion_mode, str):
+        return ION_MODES.get(ion_mode.lower(), 0)
+    return ion_mode
+
+
+def build_precursor_index(precursor_mz, ion_mode, spectrum_type):
+    """
+    Sorts spectra by ion mode, spectrum type and precursor m/z.
+
+    Returns the sorting permutation, the sorted precursor m/z values and one
+    partition record (ion mode, spectrum type, start, stop) per combination of ion
+    mode and spectrum type. Spectra without precursor m/z are sorted to the end
+    of their partition.
+    """
+    order = np.lexsort((precursor_mz, spectrum_type, ion_mode))
+    modes, types = np.asarray(ion_mode)[order], np.asarray(spectrum_type)[order]
+
+    bounds = np.flatnonzero((modes[1:] != modes[:-1]) | (types[1:] != types[:-1]))
+    starts = np.concatenate(([0], bounds + 1)) if len(order) else bounds
+    stops = np.append(starts[1:], len(order))[: len(starts)]
+
+    partitions = np.empty(len(starts), dtype=PARTITION_DTYPE)
+    partitions["ion_mode"] = modes[starts]
+    partitions["spectrum_type"] = types[starts]
+    partitions["start"] = starts
+    partitions["stop"] = stops
+
+    return order, np.asarray(precursor_mz)[order], partitions
+
+
+class SpectralLibrary:
+    """
+    Spectral library stored as flat NumPy arrays.
+
+    The peaks of all spectra are concatenated in `mz` and `intensity`, the peaks
+    of spectrum i are found at `offsets[i]:offsets[i + 1]`. Metadata is kept as
+    one array per column. Arrays loaded from disk are memory-mapped, so only the
+    pages that are accessed are read.
+
+    A precursor m/z index, partitioned by ion mode and spectrum type, is built
+    together with the library and answers precursor range queries in O(log n).
+
+    `binned` holds the bin width and CSR matrix of the binned spectra if they
+    were precomputed with the library (see q2_ms.types._binned), `lsh` its
+    LSHIndex if it was indexed for approximate search (see q2_ms.types._lsh).
+    """
+
+    binned = None
+    lsh = None
+
+    arrays = (
+        "mz",
+        "intensity",
+        "offsets",
+        "name",
+        "precursor_mz",
+        "ion_mode",
+        "spectrum_type",
+        "inchikey",
+        "db_id",
+        "precursor_order",
+        "precursor_sorted",
+        "precursor_partitions",
+    )
+
+    def __init__(
+        self,
+        mz,
+        intensity,
+        offsets,
+        name,
+        precursor_mz,
+        ion_mode,
+        spectrum_type,
+        inchikey,
+        db_id,
+        precursor_order=None,
+        precursor_sorted=None,
+        precursor_partitions=None,
+    ):
+        self.mz = mz
+        self.intensity = intensity
+        self.offsets = offsets
+        self.name = name
+        self.precursor_mz = precursor_mz
+        self.ion_mode = ion_mode
+        self.spectrum_type = spectrum_type
+        self.inchikey = inchikey
+        self.db_id = db_id
+
+        if precursor_order is None:
+            precursor_order, precursor_sorted, precursor_partitions = (
+                build_precursor_index(precursor_mz, ion_mode, spectrum_type)
+            )
+        self.precursor_order = precursor_order
+        self.precursor_sorted = precursor_sorted
+        self.precursor_partitions = precursor_partitions
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def peaks(self, index):
+        """Returns the m/z and intensity arrays of spectrum `index`."""
+        start, stop = self.offsets[index], self.offsets[index + 1]
+        return self.mz[start:stop], self.intensity[start:stop]
+
+    def spectrum_id(self, index):
+        """Returns the DB# of spectrum `index` or its name if it has none."""
+        return (self.db_id[index] or self.name[index]).decode("utf-8")
+
+    def precursor_candidates(self, mz, ppm=10.0, ion_mode=None, spectrum_type=None):
+        """
+        Returns the indices of all spectra with a precursor m/z within `ppm` of
+        `mz`, optionally restricted to an ion mode (1, -1 or "positive",
+        "negative") and a spectrum type (e.g. "MS2").
+        """
+        tolerance = mz * ppm * 1e-6
+        ion_mode = _ion_mode_code(ion_mode)
+        if spectrum_type is not None:
+            spectrum_type = spectrum_type.encode("utf-8")
+
+        candidates = []
+        for mode, stype, start, stop in self.precursor_partitions:
+            if ion_mode is not None and mode != ion_mode:
+                continue
+            if spectrum_type is not None and stype != spectrum_type:
+                continue
+
+            sorted_mz = self.precursor_sorted[start:stop]
+            lower = np.searchsorted(sorted_mz, mz - tolerance, side="left")
+            upper = np.searchsorted(sorted_mz, mz + tolerance, side="right")
+            candidates.append(self.precursor_order[start + lower : start + upper])
+
+        if not candidates:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(candidates)
+
+    @classmethod
+    def from_msp(cls, path):
+        """Builds a library from an MSP file in a single streaming pass."""
+        mz, intensity = array("d"), array("f")
+        offsets = array("q", [0])
+        precursor_mz, ion_mode = array("d"), array("b")
+        name, spectrum_type, inchikey, db_id = [], [], [], []
+
+        for record in iter_msp(path):
+            mz.extend(record.mz)
+            intensity.extend(record.intensity)
+            offsets.append(len(mz))
+
+            try:
+                precursor_mz.append(float(record.get("PrecursorMZ")))
+            except (TypeError, ValueError):
+                precursor_mz.append(np.nan)
+            ion_mode.append(_ion_mode_code(record.get("Ion_mode", "")))
+            spectrum_type.append(record.get("Spectrum_type", "")[:16])
+            name.append(record.get("Name", ""))
+            inchikey.append(record.get("InChIKey", ""))
+            db_id.append(record.get("DB#", ""))
+
+        return cls(
+            mz=np.frombuffer(mz, dtype=np.float64),
+            intensity=np.frombuffer(intensity, dtype=np.float32),
+            offsets=np.frombuffer(offsets, dtype=np.int64),
+            name=_encode(name),
+            precursor_mz=np.frombuffer(precursor_mz, dtype=np.float64),
+            ion_mode=np.frombuffer(ion_mode, dtype=np.int8),
+            spectrum_type=_encode(spectrum_type),
+            inchikey=_encode(inchikey),
+            db_id=_encode(db_id),
+        )
+
+    @classmethod
+    def from_mzml(cls, paths, ms_level=2):
+        """
+        Builds a library from the spectra of one MS level of mzML files, in the
+        order of `paths`. Spectra are named "<file name>:<spectrum id>".
+        """
+        mz, intensity, offsets = [], [], [0]
+        precursor_mz, ion_mode, name = [], [], []
+
+        for path in paths:
+            sample = os.path.basename(path).rsplit(".", 1)[0]
+            reader = open_mzml(path)
+            for spectrum in reader:
+                if spectrum.ms_level != ms_level:
+                    continue
+
+                mz.append(np.asarray(spectrum.mz, dtype=np.float64))
+                intensity.append(np.asarray(spectrum.i, dtype=np.float32))
+                offsets.append(offsets[-1] + len(mz[-1]))
+
+                precursors = spectrum.selected_precursors or [{}]
+                precursor_mz.append(precursors[0].get("mz", np.nan))
+                if spectrum.get("MS:1000130") is not None:
+                    ion_mode.append(1)
+                elif spectrum.get("MS:1000129") is not None:
+                    ion_mode.append(-1)
+                else:
+                    ion_mode.append(0)
+                name.append(f"{sample}:{spectrum.ID}")
+            reader.close()
+
+        return cls(
+            mz=np.concatenate(mz) if mz else np.empty(0, dtype=np.float64),
+            intensity=(
+                np.concatenate(intensity) if mz else np.empty(0, dtype=np.float32)
+            ),
+            offsets=np.array(offsets, dtype=np.int64),
+            name=_encode(name),
+            precursor_mz=np.array(precursor_mz, dtype=np.float64),
+            ion_mode=np.array(ion_mode, dtype=np.int8),
+            spectrum_type=_encode([f"MS{ms_level}"] * len(name)),
+            inchikey=_encode([""] * len(name)),
+            db_id=_encode(name),
+        )
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        return cls(
+            **{
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+                for name in cls.arrays
+            }
+        )
+
+    def save(self, path):
+        for name in self.arrays:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
@@ -0,0 +1,172 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+
+from q2_ms.types._binned import bin_spectra
+
+# Arrays of an LSH index, named "lsh_<name>.npy"
+LSH_ARRAYS = ("keys", "order")
+LSH_METADATA = "lsh.json"
+
+# Peaks are hashed in coarser bins than they are scored in, so that small m/z
+# deviations between query and library spectra rarely change their hash.
+HASH_BIN_WIDTH = 1.0
+N_TABLES = 16
+N_BITS = 12
+
+# Number of spectra projected at once
+HASH_CHUNK_SIZE = 4096
+
+
+def _splitmix64(x):
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _signs(bins, n_hashes, seed):
+    """
+    Returns the random hyperplane components of `bins`, +1 or -1 per bin and
+    hash. They are derived from the bin number and seed, so the hyperplanes
+    never need to be stored, whatever the number of bins.
+    """
+    hashes = np.arange(n_hashes, dtype=np.uint64)
+    keys = np.asarray(bins, dtype=np.uint64)[:, None] * np.uint64(n_hashes) + hashes
+    keys ^= _splitmix64(np.full(1, seed, dtype=np.uint64))
+    return np.where(_splitmix64(keys) >> np.uint64(63), 1.0, -1.0)
+
+
+def hash_codes(library, hash_bin_width, n_tables, n_bits, seed):
+    """
+    Returns the locality-sensitive hash of each spectrum of a library in each
+    table, (n_spectra, n_tables) codes of `n_bits` bits. Each bit is the side
+    of a random hyperplane the binned peak vector lies on, so the probability
+    of two spectra sharing a code is (1 - angle / pi) ** n_bits.
+    """
+    matrix = bin_spectra(library, hash_bin_width)
+    weights = np.uint64(1) << np.arange(n_bits, dtype=np.uint64)
+    codes = np.empty((len(library), n_tables), dtype=np.uint64)
+
+    for start in range(0, len(library), HASH_CHUNK_SIZE):
+        chunk = matrix[start : start + HASH_CHUNK_SIZE]
+        # Project onto the hyperplane components of the bins in the chunk only
+        bins, columns = np.unique(chunk.indices, return_inverse=True)
+        local = sparse.csr_matrix(
+            (chunk.data, columns.ravel(), chunk.indptr),
+            shape=(chunk.shape[0], len(bins)),
+        )
+        projections = local @ _signs(bins, n_tables * n_bits, seed)
+        bits = (projections > 0).reshape(-1, n_tables, n_bits)
+        codes[start : start + HASH_CHUNK_SIZE] = np.sum(
+            bits * weights, axis=2, dtype=np.uint64
+        )
+
+    return codes
+
+
+def lsh_paths(path):
+    return {name: os.path.join(path, f"lsh_{name}.npy") for name in LSH_ARRAYS}
+
+
+class LSHIndex:
+    """
+    Random hyperplane locality-sensitive hashing index of spectra.
+
+    Each of the `n_tables` tables stores the spectrum numbers sorted by their
+    hash code (`order`) and the sorted codes (`keys`), so the spectra sharing a
+    bucket with a query are found by binary search. Spectra sharing a bucket
+    in any table are candidates, more tables raise the recall and more bits
+    the precision of the candidates.
+    """
+
+    def __init__(self, keys, order, hash_bin_width, n_bits, seed):
+        self.keys = keys
+        self.order = order
+        self.hash_bin_width = hash_bin_width
+        self.n_bits = n_bits
+        self.seed = seed
+
+    @property
+    def n_tables(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(
+        cls,
+        library,
+        hash_bin_width=HASH_BIN_WIDTH,
+        n_tables=N_TABLES,
+        n_bits=N_BITS,
+        seed=0,
+    ):
+        codes = hash_codes(library, hash_bin_width, n_tables, n_bits, seed).T
+        order = np.argsort(codes, axis=1, kind="stable")
+        keys = np.take_along_axis(codes, order, axis=1)
+        return cls(keys, order, hash_bin_width, n_bits, seed)
+
+    def hash(self, library):
+        """Returns the hash codes of the spectra of a library in each table."""
+        return hash_codes(
+            library, self.hash_bin_width, self.n_tables, self.n_bits, self.seed
+        )
+
+    def candidates(self, codes):
+        """
+        Returns the query and library spectrum numbers of all pairs sharing a
+        bucket in at least one table, given the (n_queries, n_tables) codes of
+        the queries. Pairs are unique and sorted by query.
+        """
+        queries, targets = [], []
+        for table, (keys, order) in enumerate(zip(self.keys, self.order)):
+            lower = np.searchsorted(keys, codes[:, table], side="left")
+            counts = np.searchsorted(keys, codes[:, table], side="right") - lower
+            positions = (
+                np.arange(counts.sum())
+                - np.repeat(np.cumsum(counts) - counts, counts)
+                + np.repeat(lower, counts)
+            )
+            queries.append(np.repeat(np.arange(len(codes)), counts))
+            targets.append(np.asarray(order[positions], dtype=np.int64))
+
+        n_targets = max(self.keys.shape[1], 1)
+        pairs = np.unique(np.concatenate(queries) * n_targets + np.concatenate(targets))
+        return pairs // n_targets, pairs % n_targets
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        with open(os.path.join(path, LSH_METADATA)) as file:
+            metadata = json.load(file)
+
+        paths = lsh_paths(path)
+        return cls(
+            np.load(paths["keys"], mmap_mode=mmap_mode),
+            np.load(paths["order"], mmap_mode=mmap_mode),
+            metadata["hash_bin_width"],
+            metadata["n_bits"],
+            metadata["seed"],
+        )
+
+    def save(self, path):
+        with open(os.path.join(path, LSH_METADATA), "w") as file:
+            json.dump(
+                {
+                    "hash_bin_width": self.hash_bin_width,
+                    "n_tables": self.n_tables,
+                    "n_bits": self.n_bits,
+                    "seed": self.seed,
+                },
+                file,
+            )
+        paths = lsh_paths(path)
+        np.save(paths["keys"], self.keys)
+        np.save(paths["order"], self.order)
@@ -0,0 +1,118 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+from q2_ms.types._library import _encode
+
+MATCHED_SPECTRA_HEADER = ".original_query_index\ttarget_spectrum_id\tscore\n"
+MATCHED_SPECTRA_COLUMNS = ("query_index", "target", "score")
+
+# Rows converted at once between the text and the binary layout
+CHUNK_ROWS = 1_000_000
+
+
+def _count_rows(path):
+    """Returns the number of lines after the header of a text file."""
+    lines, last = 0, b"\n"
+    with open(path, "rb") as f:
+        while chunk := f.read(16 * 1024**2):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    return max(lines + (last != b"\n") - 1, 0)
+
+
+def open_matches(path, mmap_mode="r"):
+    """
+    Returns the query index, target code and score arrays and the target IDs
+    of matched spectra stored in the binary layout.
+    """
+    arrays = [
+        np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in MATCHED_SPECTRA_COLUMNS
+    ]
+    target_ids = np.load(os.path.join(path, "target_ids.npy"))
+    return (*arrays, target_ids)
+
+
+def create_matches(path, n_rows, target_ids):
+    """
+    Creates writable memory-mapped arrays for `n_rows` matches in the binary
+    layout and saves the target IDs. Returns the query index, target code and
+    score arrays.
+    """
+    np.save(os.path.join(path, "target_ids.npy"), target_ids)
+    return tuple(
+        open_memmap(
+            os.path.join(path, f"{name}.npy"),
+            mode="w+",
+            dtype=dtype,
+            shape=(int(n_rows),),
+        )
+        for name, dtype in zip(MATCHED_SPECTRA_COLUMNS, ("i4", "i4", "f4"))
+    )
+
+
+def text_to_binary(text_path, path):
+    """
+    Converts a matched_spectra.txt file to the binary layout in chunks of
+    CHUNK_ROWS rows. Target IDs are interned, each one is stored once.
+    """
+    query, target, score = create_matches(
+        path, _count_rows(text_path), np.empty(0, dtype=bytes)
+    )
+    codes = {}
+
+    start = 0
+    with pd.read_csv(
+        text_path,
+        sep="\t",
+        dtype={"target_spectrum_id": str},
+        quoting=csv.QUOTE_NONE,
+        na_filter=False,
+        chunksize=CHUNK_ROWS,
+    ) as reader:
+        for chunk in reader:
+            stop = start + len(chunk)
+            chunk_codes, uniques = pd.factorize(chunk["target_spectrum_id"])
+            mapping = np.array(
+                [codes.setdefault(target_id, len(codes)) for target_id in uniques],
+                dtype=np.int32,
+            )
+            query[start:stop] = chunk[".original_query_index"]
+            target[start:stop] = mapping[chunk_codes]
+            score[start:stop] = chunk["score"]
+            start = stop
+
+    for array in (query, target, score):
+        array.flush()
+    np.save(os.path.join(path, "target_ids.npy"), _encode(list(codes)))
+
+
+def binary_to_text(path, text_path):
+    """Writes matches stored in the binary layout as matched_spectra.txt."""
+    query, target, score, target_ids = open_matches(path)
+    target_ids = np.char.decode(target_ids, "utf-8").astype(object)
+
+    with open(text_path, "w") as f:
+        f.write(MATCHED_SPECTRA_HEADER)
+        for start in range(0, len(query), CHUNK_ROWS):
+            chunk = slice(start, start + CHUNK_ROWS)
+            # Formatted as by match_spectra, which is faster than DataFrame.to_csv
+            f.writelines(
+                f"{q}\t{t}\t{s:.6g}\n"
+                for q, t, s in zip(
+                    query[chunk].tolist(),
+                    target_ids[target[chunk]].tolist(),
+                    score[chunk].tolist(),
+                )
+            )
@@ -0,0 +1,219 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from q2_ms.types._mzml import open_mzml
+from q2_ms.types._peaks import _retention_time, open_peak_store
+
+# Arrays of one sample in an MS1 peak index, named "<sample id>.ms1_<name>.npy"
+MS1_INDEX_ARRAYS = ("rt", "spectrum_index", "bins", "scan", "mz", "intensity")
+MS1_INDEX_METADATA = "ms1_index.json"
+
+# Width of the m/z bins the peaks are grouped in
+MZ_BIN_WIDTH = 0.1
+
+
+def ms1_index_paths(path, sample_id):
+    return {
+        name: os.path.join(path, f"{sample_id}.ms1_{name}.npy")
+        for name in MS1_INDEX_ARRAYS
+    }
+
+
+def save_ms1_index(path, sample_id, rt, spectrum_index, peaks, mz_bin_width):
+    """
+    Stores the peaks of MS1 spectra, given as (m/z, intensity) arrays per
+    spectrum, grouped in m/z bins of `mz_bin_width` and sorted by retention
+    time within each bin.
+    """
+    # Scans are numbered in retention time order. Spectra without retention
+    # time are sorted to the end and never fall into a retention time window.
+    rt = np.asarray(rt, dtype=np.float64)
+    rt_order = np.argsort(rt, kind="stable")
+    rank = np.empty(len(rt), dtype=np.int32)
+    rank[rt_order] = np.arange(len(rt), dtype=np.int32)
+
+    mz = np.concatenate([np.empty(0)] + [mz for mz, _ in peaks]).astype(np.float64)
+    intensity = np.concatenate(
+        [np.empty(0)] + [intensity for _, intensity in peaks]
+    ).astype(np.float32)
+    scan = np.repeat(rank, [len(mz) for mz, _ in peaks])
+
+    bins = np.floor(mz / mz_bin_width).astype(np.int64)
+    order = np.lexsort((scan, bins))
+    n_bins = int(bins.max()) + 1 if len(bins) else 0
+
+    paths = ms1_index_paths(path, sample_id)
+    np.save(paths["rt"], rt[rt_order])
+    np.save(
+        paths["spectrum_index"],
+        np.asarray(spectrum_index, dtype=np.int64)[rt_order],
+    )
+    np.save(
+        paths["bins"],
+        np.concatenate(([0], np.cumsum(np.bincount(bins, minlength=n_bins)))),
+    )
+    np.save(paths["scan"], scan[order])
+    np.save(paths["mz"], mz[order])
+    np.save(paths["intensity"], intensity[order])
+
+
+def write_sample_ms1_index(mzml_path, path, sample_id, mz_bin_width=MZ_BIN_WIDTH):
+    """Reads the MS1 spectra of an mzML file once and stores their peak index."""
+    rt, spectrum_index, peaks = [], [], []
+    reader = open_mzml(mzml_path)
+    for index, spectrum in enumerate(reader):
+        if spectrum.ms_level != 1:
+            continue
+        rt.append(_retention_time(spectrum))
+        spectrum_index.append(index)
+        peaks.append((np.asarray(spectrum.mz), np.asarray(spectrum.i)))
+    reader.close()
+
+    save_ms1_index(path, sample_id, rt, spectrum_index, peaks, mz_bin_width)
+
+
+def write_ms1_index(mzml_paths, path, max_workers=None, mz_bin_width=MZ_BIN_WIDTH):
+    """
+    Builds the MS1 peak index of mzML files, concurrently with each file in its
+    own process. Samples are named by the mzML file names.
+    """
+    with open(os.path.join(path, MS1_INDEX_METADATA), "w") as file:
+        json.dump({"mz_bin_width": mz_bin_width}, file)
+
+    n_samples = len(mzml_paths)
+    args = (
+        mzml_paths,
+        [path] * n_samples,
+        [os.path.basename(p).rsplit(".", 1)[0] for p in mzml_paths],
+        [mz_bin_width] * n_samples,
+    )
+    if n_samples < 2:
+        list(map(write_sample_ms1_index, *args))
+        return
+
+    max_workers = min(n_samples, max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(write_sample_ms1_index, *args))
+
+
+def write_peak_store_ms1_index(store_path, path, mz_bin_width=MZ_BIN_WIDTH):
+    """
+    Builds the MS1 peak index of all samples in a peak store, reading their
+    stored peaks instead of decoding the mzML files again.
+    """
+    with open(os.path.join(path, MS1_INDEX_METADATA), "w") as file:
+        json.dump({"mz_bin_width": mz_bin_width}, file)
+
+    for sample_id, sample in open_peak_store(store_path).items():
+        indices = np.flatnonzero(sample.spectra["ms_level"] == 1)
+        save_ms1_index(
+            path,
+            sample_id,
+            sample.spectra["retention_time"][indices],
+            indices,
+            [sample.peaks(index) for index in indices],
+            mz_bin_width,
+        )
+
+
+class MS1PeakIndex:
+    """
+    MS1 peaks of one sample, indexed for m/z and retention time range queries.
+
+    The MS1 spectra are numbered in retention time order (`rt`). The peaks are
+    grouped in m/z bins, the peaks of bin b are found at
+    `bins[b]:bins[b + 1]` and sorted by spectrum number, so a range query
+    binary searches the spectra of the retention time window in the one or few
+    bins its m/z window overlaps. Arrays are memory-mapped.
+    """
+
+    def __init__(self, path, sample_id, mz_bin_width=MZ_BIN_WIDTH):
+        self.sample_id = sample_id
+        self.mz_bin_width = mz_bin_width
+        for name, array_path in ms1_index_paths(path, sample_id).items():
+            setattr(self, name, np.load(array_path, mmap_mode="r"))
+
+    def __len__(self):
+        return len(self.rt)
+
+    def scan_range(self, rt_min=-np.inf, rt_max=np.inf):
+        """Returns the first and last + 1 spectrum number of an RT window."""
+        return (
+            int(np.searchsorted(self.rt, rt_min, side="left")),
+            int(np.searchsorted(self.rt, rt_max, side="right")),
+        )
+
+    def query(self, mz_min, mz_max, rt_min=-np.inf, rt_max=np.inf):
+        """
+        Returns the spectrum numbers, m/z and intensity values of the peaks
+        within an m/z and retention time window (bounds included).
+        """
+        first, last = self.scan_range(rt_min, rt_max)
+        n_bins = len(self.bins) - 1
+        bin_min = max(int(np.floor(mz_min / self.mz_bin_width)), 0)
+        bin_max = min(int(np.floor(mz_max / self.mz_bin_width)), n_bins - 1)
+
+        scans, mzs, intensities = [], [], []
+        for b in range(bin_min, bin_max + 1):
+            start, stop = int(self.bins[b]), int(self.bins[b + 1])
+            scan = self.scan[start:stop]
+            peaks = slice(
+                start + int(np.searchsorted(scan, first, side="left")),
+                start + int(np.searchsorted(scan, last, side="left")),
+            )
+            mz = self.mz[peaks]
+            hits = (mz >= mz_min) & (mz <= mz_max)
+            scans.append(self.scan[peaks][hits])
+            mzs.append(mz[hits])
+            intensities.append(self.intensity[peaks][hits])
+
+        if not scans:
+            return (
+                np.empty(0, dtype=np.int32),
+                np.empty(0, dtype=np.float64),
+                np.empty(0, dtype=np.float32),
+            )
+        return np.concatenate(scans), np.concatenate(mzs), np.concatenate(intensities)
+
+    def xic(self, mz_min, mz_max, rt_min=-np.inf, rt_max=np.inf, aggregation="sum"):
+        """
+        Returns the spectrum numbers of the spectra in a retention time window
+        and the sum or maximum intensity of their peaks within an m/z window,
+        0 for spectra without such peaks.
+        """
+        first, last = self.scan_range(rt_min, rt_max)
+        scans, _, intensity = self.query(mz_min, mz_max, rt_min, rt_max)
+
+        if aggregation == "sum":
+            values = np.bincount(
+                scans - first, weights=intensity, minlength=last - first
+            )
+        elif aggregation == "max":
+            values = np.zeros(last - first, dtype=np.float64)
+            np.maximum.at(values, scans - first, intensity)
+        else:
+            raise ValueError(f"Unknown aggregation '{aggregation}'.")
+        return np.arange(first, last), values
+
+
+def open_ms1_index(path):
+    """Returns the MS1PeakIndex of each sample in an MS1 peak index by sample ID."""
+    with open(os.path.join(path, MS1_INDEX_METADATA)) as file:
+        mz_bin_width = json.load(file)["mz_bin_width"]
+
+    suffix = ".ms1_rt.npy"
+    return {
+        name[: -len(suffix)]: MS1PeakIndex(path, name[: -len(suffix)], mz_bin_width)
+        for name in sorted(os.listdir(path))
+        if name.endswith(suffix)
+    }
@@ -0,0 +1,106 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+from typing import NamedTuple
+
+import numpy as np
+
+
+def _is_decimal(token):
+    integer, dot, fraction = token.partition(".")
+    return integer.isdecimal() and (not dot or fraction.isdecimal())
+
+
+def _normalize_key(key):
+    # MSP flavours spell the same field differently, e.g. "PrecursorMZ",
+    # "PRECURSORMZ" or "Precursor_MZ".
+    return key.replace("_", "").replace(" ", "").lower()
+
+
+class MSPRecord(NamedTuple):
+    """A single spectrum of an MSP file."""
+
+    metadata: list
+    mz: list
+    intensity: list
+
+    def get(self, key, default=None):
+        """Returns the first metadata value of `key`, ignoring case and '_'."""
+        key = _normalize_key(key)
+        for name, value in self.metadata:
+            if _normalize_key(name) == key:
+                return value
+        return default
+
+
+def iter_msp(path):
+    """
+    Streams the spectra of an MSP file as MSPRecord objects.
+
+    Metadata is kept as (key, value) pairs in file order, peaks as m/z and
+    intensity lists. A metadata line directly following a peak line starts a new
+    spectrum even if the separating empty line is missing.
+    """
+    metadata, mz, intensity = [], [], []
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+
+            if not line:
+                if metadata or mz:
+                    yield MSPRecord(metadata, mz, intensity)
+                    metadata, mz, intensity = [], [], []
+                continue
+
+            if line[0] == "#":
+                continue
+
+            tokens = line.split(None, 2)
+            if len(tokens) >= 2 and _is_decimal(tokens[0]) and _is_decimal(tokens[1]):
+                mz.append(float(tokens[0]))
+                intensity.append(float(tokens[1]))
+                continue
+
+            key, sep, value = line.partition(":")
+            if not sep:
+                continue
+            if mz:
+                yield MSPRecord(metadata, mz, intensity)
+                metadata, mz, intensity = [], [], []
+            metadata.append((key.strip(), value.strip()))
+
+    if metadata or mz:
+        yield MSPRecord(metadata, mz, intensity)
+
+
+def _format_number(value):
+    # Positional notation, as MSP readers do not accept exponents in peaks
+    return np.format_float_positional(value, trim="-")
+
+
+def write_msp(records, path):
+    """
+    Writes MSPRecord objects to an MSP file, one at a time. The "Num Peaks"
+    field is set to the number of peaks of each record.
+    """
+    n_records = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            if n_records:
+                f.write("\n")
+            has_num_peaks = False
+            for key, value in record.metadata:
+                if _normalize_key(key) == "numpeaks":
+                    value, has_num_peaks = len(record.mz), True
+                f.write(f"{key}: {value}\n")
+            if not has_num_peaks:
+                f.write(f"Num Peaks: {len(record.mz)}\n")
+            for mz, intensity in zip(record.mz, record.intensity):
+                f.write(f"{_format_number(mz)} {_format_number(intensity)}\n")
+            n_records += 1
+    return n_records
@@ -0,0 +1,94 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import logging
+import mmap
+import os
+import re
+
+import numpy as np
+import pymzml
+
+
+class _MissingIndexFilter(logging.Filter):
+    def filter(self, record):
+        return "build_index_from_scratch" not in record.getMessage()
+
+
+# Newer pymzml versions log the missing index notice, older ones print it (see
+# _silence_stdout in _format).
+logging.getLogger("pymzml.file_classes.standardMzml").addFilter(_MissingIndexFilter())
+
+
+# Suffix of the spectrum offset index stored next to an mzML file
+OFFSET_INDEX_SUFFIX = ".offsets.npy"
+
+_SPECTRUM_TAG = re.compile(rb'<spectrum\s[^>]*?\bid="([^"]*)"')
+_SCAN_NUMBER = re.compile(rb"\bscan=(\d+)")
+
+
+def offset_index_path(path):
+    return f"{path}{OFFSET_INDEX_SUFFIX}"
+
+
+def build_offset_index(path):
+    """
+    Returns the native ID, scan number (-1 if the ID has none) and byte offset
+    of the opening tag of each spectrum in an mzML file, found in a single
+    pass over the memory-mapped file.
+    """
+    ids, offsets = [], []
+    if os.path.getsize(path):
+        with open(path, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            for match in _SPECTRUM_TAG.finditer(data):
+                ids.append(match.group(1))
+                offsets.append(match.start())
+
+    index = np.empty(
+        len(ids),
+        dtype=[
+            ("id", f"S{max(map(len, ids), default=1)}"),
+            ("scan", "i8"),
+            ("offset", "i8"),
+        ],
+    )
+    index["id"] = ids
+    index["scan"] = [
+        int(match.group(1)) if (match := _SCAN_NUMBER.search(id_)) else -1
+        for id_ in ids
+    ]
+    index["offset"] = offsets
+    return index
+
+
+def write_offset_index(path):
+    """Builds the offset index of an mzML file and saves it next to the file."""
+    np.save(offset_index_path(path), build_offset_index(path))
+
+
+def open_mzml(path, **kwargs):
+    """
+    Opens an mzML file with pymzml. If the file has an offset index, spectra
+    can be retrieved by native ID or scan number without parsing the file up
+    to them.
+    """
+    reader = pymzml.run.Reader(path, **kwargs)
+
+    if os.path.exists(offset_index_path(str(path))):
+        index = np.load(offset_index_path(str(path)))
+        offsets = reader.info["offset_dict"]
+        for id_, scan, offset in zip(
+            np.char.decode(index["id"], "utf-8").tolist(),
+            index["scan"].tolist(),
+            index["offset"].tolist(),
+        ):
+            offsets[id_] = (offset,)
+            if scan >= 0:
+                offsets[scan] = (offset,)
+    return reader
@@ -0,0 +1,284 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from pymzml.regex_patterns import SPECTRUM_ID_PATTERN
+
+from q2_ms.types._library import SpectralLibrary, _encode
+from q2_ms.types._mzml import _SCAN_NUMBER, open_mzml
+
+# Files of one sample in a peak store, named "<sample id><suffix>"
+PEAK_STORE_SUFFIXES = {
+    "peaks": ".peaks.bin",
+    "chunks": ".chunks.npy",
+    "offsets": ".peak_offsets.npy",
+    "spectra": ".spectra.npy",
+}
+
+# Spectra are compressed in chunks of at least this many peaks
+CHUNK_PEAKS = 1 << 16
+
+MZ_DTYPE = np.dtype("<f8")
+INTENSITY_DTYPE = np.dtype("<f4")
+
+CHUNK_DTYPE = [
+    ("offset", "i8"),
+    ("size", "i8"),
+    ("start", "i8"),
+    ("stop", "i8"),
+]
+
+
+def _spectrum_dtype(id_length):
+    return [
+        ("id", f"S{max(id_length, 1)}"),
+        ("scan", "i8"),
+        ("ms_level", "i1"),
+        ("retention_time", "f8"),
+        ("precursor_mz", "f8"),
+        ("ion_mode", "i1"),
+    ]
+
+
+def _shuffle(values):
+    # Grouping the n-th bytes of all values puts the similar exponent and high
+    # mantissa bytes next to each other, which zlib compresses much better
+    return values.view(np.uint8).reshape(-1, values.itemsize).T.tobytes()
+
+
+def _unshuffle(data, dtype):
+    return (
+        np.frombuffer(data, dtype=np.uint8)
+        .reshape(dtype.itemsize, -1)
+        .T.copy()
+        .view(dtype)
+        .ravel()
+    )
+
+
+def _retention_time(spectrum):
+    try:
+        return spectrum.scan_time_in_minutes() * 60
+    except (AttributeError, TypeError, ValueError):
+        # Spectra without scan start time or with an unknown unit
+        return np.nan
+
+
+def _ion_mode(spectrum):
+    if spectrum.get("MS:1000130") is not None:
+        return 1
+    if spectrum.get("MS:1000129") is not None:
+        return -1
+    return 0
+
+
+def peak_store_paths(path, sample_id):
+    return {
+        name: os.path.join(path, f"{sample_id}{suffix}")
+        for name, suffix in PEAK_STORE_SUFFIXES.items()
+    }
+
+
+def write_sample_peaks(mzml_path, path, sample_id, chunk_peaks=CHUNK_PEAKS):
+    """
+    Reads the spectra of an mzML file once and stores their peaks as
+    compressed chunks of byte-shuffled m/z (float64) and intensity (float32)
+    arrays, together with the peak offset of each spectrum and its metadata.
+    """
+    paths = peak_store_paths(path, sample_id)
+    chunks, offsets, metadata = [], [0], []
+    mz, intensity, start = [], [], 0
+
+    with open(paths["peaks"], "wb") as peaks:
+
+        def flush(stop):
+            data = zlib.compress(
+                _shuffle(np.concatenate(mz).astype(MZ_DTYPE, copy=False))
+                + _shuffle(np.concatenate(intensity).astype(INTENSITY_DTYPE))
+            )
+            chunks.append((peaks.tell(), len(data), start, stop))
+            peaks.write(data)
+            mz.clear()
+            intensity.clear()
+
+        reader = open_mzml(mzml_path)
+        for spectrum in reader:
+            mz.append(np.asarray(spectrum.mz, dtype=np.float64))
+            intensity.append(np.asarray(spectrum.i))
+            offsets.append(offsets[-1] + len(mz[-1]))
+
+            id_ = spectrum.element.get("id", str(spectrum.ID))
+            scan = _SCAN_NUMBER.search(id_.encode())
+            precursors = spectrum.selected_precursors or [{}]
+            metadata.append(
+                (
+                    id_,
+                    int(scan.group(1)) if scan else -1,
+                    spectrum.ms_level or 0,
+                    _retention_time(spectrum),
+                    precursors[0].get("mz", np.nan),
+                    _ion_mode(spectrum),
+                )
+            )
+
+            if offsets[-1] - offsets[start] >= chunk_peaks:
+                flush(len(metadata))
+                start = len(metadata)
+        reader.close()
+
+        if start < len(metadata):
+            flush(len(metadata))
+
+    spectra = np.empty(
+        len(metadata),
+        dtype=_spectrum_dtype(max((len(m[0]) for m in metadata), default=1)),
+    )
+    for field, values in zip(spectra.dtype.names, zip(*metadata)):
+        spectra[field] = _encode(values) if field == "id" else values
+
+    np.save(paths["chunks"], np.array(chunks, dtype=CHUNK_DTYPE))
+    np.save(paths["offsets"], np.array(offsets, dtype=np.int64))
+    np.save(paths["spectra"], spectra)
+
+
+def write_peak_store(mzml_paths, path, max_workers=None):
+    """
+    Stores the peaks of mzML files in a peak store, concurrently with each
+    file in its own process. Samples are named by the mzML file names.
+    """
+    sample_ids = [os.path.basename(p).rsplit(".", 1)[0] for p in mzml_paths]
+    if len(mzml_paths) < 2:
+        for mzml_path, sample_id in zip(mzml_paths, sample_ids):
+            write_sample_peaks(mzml_path, path, sample_id)
+        return
+
+    max_workers = min(len(mzml_paths), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        list(
+            executor.map(
+                write_sample_peaks, mzml_paths, [path] * len(mzml_paths), sample_ids
+            )
+        )
+
+
+class SamplePeaks:
+    """
+    Peaks of the spectra of one sample in a peak store.
+
+    The peaks of spectrum i are found at `offsets[i]:offsets[i + 1]` of the
+    concatenated peaks of all spectra, which are compressed in chunks of whole
+    spectra. Retrieving a spectrum inflates its chunk only, the last inflated
+    chunk is kept, so reading spectra in order inflates each chunk once.
+    """
+
+    def __init__(self, path, sample_id):
+        self.sample_id = sample_id
+        self.paths = peak_store_paths(path, sample_id)
+        self.chunks = np.load(self.paths["chunks"], mmap_mode="r")
+        self.offsets = np.load(self.paths["offsets"], mmap_mode="r")
+        self.spectra = np.load(self.paths["spectra"], mmap_mode="r")
+        self._chunk = None
+
+    def __len__(self):
+        return len(self.spectra)
+
+    def read_chunk(self, index):
+        """Returns the first spectrum, m/z and intensity values of a chunk."""
+        offset, size, start, stop = self.chunks[index].tolist()
+        with open(self.paths["peaks"], "rb") as file:
+            file.seek(offset)
+            data = zlib.decompress(file.read(size))
+
+        n_peaks = int(self.offsets[stop] - self.offsets[start])
+        if len(data) != n_peaks * (MZ_DTYPE.itemsize + INTENSITY_DTYPE.itemsize):
+            raise ValueError(
+                f"Chunk {index} of {self.sample_id} does not hold {n_peaks} peaks."
+            )
+        split = n_peaks * MZ_DTYPE.itemsize
+        return (
+            start,
+            _unshuffle(data[:split], MZ_DTYPE),
+            _unshuffle(data[split:], INTENSITY_DTYPE),
+        )
+
+    def peaks(self, index):
+        """Returns the m/z and intensity arrays of a spectrum."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Spectrum index {index} out of range.")
+
+        if self._chunk is None or not self._chunk[0] <= index < self._chunk[1]:
+            chunk = int(np.searchsorted(self.chunks["stop"], index, side="right"))
+            start, mz, intensity = self.read_chunk(chunk)
+            self._chunk = (start, int(self.chunks["stop"][chunk]), mz, intensity)
+
+        start, _, mz, intensity = self._chunk
+        first = self.offsets[start]
+        peaks = slice(self.offsets[index] - first, self.offsets[index + 1] - first)
+        return mz[peaks], intensity[peaks]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.peaks(index)
+
+
+def open_peak_store(path):
+    """Returns the SamplePeaks of each sample in a peak store by sample ID."""
+    suffix = PEAK_STORE_SUFFIXES["spectra"]
+    return {
+        name[: -len(suffix)]: SamplePeaks(path, name[: -len(suffix)])
+        for name in sorted(os.listdir(path))
+        if name.endswith(suffix)
+    }
+
+
+def _native_id(id_):
+    """Returns the native ID pymzml reports for a spectrum id (Spectrum.ID)."""
+    match = SPECTRUM_ID_PATTERN.search(id_)
+    if match is None:
+        return id_
+    return str(int(match.group(1))) if match.group(1) else ""
+
+
+def peak_store_library(path, ms_level=2):
+    """
+    Builds a library from the spectra of one MS level of all samples in a peak
+    store, as SpectralLibrary.from_mzml does from the mzML files, without
+    decoding them again.
+    """
+    mz, intensity, offsets, name = [], [], [0], []
+    precursor_mz, ion_mode = [], []
+
+    for sample_id, sample in open_peak_store(path).items():
+        indices = np.flatnonzero(sample.spectra["ms_level"] == ms_level)
+        for index in indices:
+            spectrum_mz, spectrum_intensity = sample.peaks(index)
+            mz.append(spectrum_mz)
+            intensity.append(spectrum_intensity)
+            offsets.append(offsets[-1] + len(spectrum_mz))
+
+        spectra = sample.spectra[indices]
+        precursor_mz.append(spectra["precursor_mz"])
+        ion_mode.append(spectra["ion_mode"])
+        name.extend(
+            f"{sample_id}:{_native_id(id_.decode('utf-8'))}" for id_ in spectra["id"]
+        )
+
+    return SpectralLibrary(
+        mz=np.concatenate([np.empty(0, dtype=MZ_DTYPE)] + mz),
+        intensity=np.concatenate([np.empty(0, dtype=INTENSITY_DTYPE)] + intensity),
+        offsets=np.array(offsets, dtype=np.int64),
+        name=_encode(name),
+        precursor_mz=np.concatenate([np.empty(0)] + precursor_mz),
+        ion_mode=np.concatenate([np.empty(0, dtype=np.int8)] + ion_mode),
+        spectrum_type=_encode([f"MS{ms_level}"] * len(name)),
+        inchikey=_encode([""] * len(name)),
+        db_id=_encode(name),
+    )
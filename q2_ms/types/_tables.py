@@ -0,0 +1,256 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import csv
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from q2_ms.types._format import (
+    MSBackendDataFormat,
+    MSExperimentSampleDataFormat,
+    MSExperimentSampleDataLinksSpectra,
+    XCMSExperimentChromPeakDataFormat,
+    XCMSExperimentChromPeaksFormat,
+    XCMSExperimentFeatureDefinitionsFormat,
+    XCMSExperimentFeaturePeakIndexFormat,
+)
+
+# Rows parsed at once. Nullable integer and categorical columns are converted
+# per chunk, which is faster than parsing into these dtypes and bounds the
+# memory held by the intermediate string and float columns.
+CHUNK_ROWS = 100_000
+
+
+class _TableSpec(NamedTuple):
+    # Dtypes of known columns, other columns are inferred by pandas
+    dtypes: dict
+    # Dtype of the R row names, None if the file has no row names
+    index_dtype: str = "int32"
+    # Lines preceding the header
+    skiprows: int = 0
+    # Column names of files written without header
+    names: list = None
+
+
+# m/z and retention times keep double precision, intensities, energies and
+# signal-to-noise ratios are stored as float32. Integer columns that may contain
+# NA use nullable integer dtypes. File paths repeated on every row are
+# categorical.
+TABLE_SPECS = {
+    MSBackendDataFormat: _TableSpec(
+        dtypes={
+            "msLevel": "Int8",
+            "rtime": "float64",
+            "acquisitionNum": "Int32",
+            "dataOrigin": "category",
+            "polarity": "Int8",
+            "precScanNum": "Int32",
+            "precursorMz": "float64",
+            "precursorIntensity": "float32",
+            "precursorCharge": "Int8",
+            "collisionEnergy": "float32",
+            "peaksCount": "Int32",
+            "totIonCurrent": "float32",
+            "basePeakMZ": "float64",
+            "basePeakIntensity": "float32",
+            "ionisationEnergy": "float32",
+            "lowMZ": "float64",
+            "highMZ": "float64",
+            "mergedScan": "Int32",
+            "mergedResultScanNum": "Int32",
+            "mergedResultStartScanNum": "Int32",
+            "mergedResultEndScanNum": "Int32",
+            "injectionTime": "float32",
+            "ionMobilityDriftTime": "float32",
+            "dataStorage": "category",
+            "scanIndex": "Int32",
+        },
+        skiprows=1,
+    ),
+    MSExperimentSampleDataFormat: _TableSpec(dtypes={"spectraOrigin": "category"}),
+    MSExperimentSampleDataLinksSpectra: _TableSpec(
+        dtypes={"sample_index": "int32", "spectrum_index": "int32"},
+        index_dtype=None,
+        names=["sample_index", "spectrum_index"],
+    ),
+    XCMSExperimentChromPeakDataFormat: _TableSpec(
+        dtypes={"ms_level": "int8", "is_filled": "bool"}, index_dtype="str"
+    ),
+    XCMSExperimentChromPeaksFormat: _TableSpec(
+        dtypes={
+            "mz": "float64",
+            "mzmin": "float64",
+            "mzmax": "float64",
+            "rt": "float64",
+            "rtmin": "float64",
+            "rtmax": "float64",
+            "into": "float32",
+            "intb": "float32",
+            "maxo": "float32",
+            "sn": "float32",
+            "sample": "int32",
+        },
+        index_dtype="str",
+    ),
+    XCMSExperimentFeatureDefinitionsFormat: _TableSpec(
+        dtypes={
+            "mzmed": "float64",
+            "mzmin": "float64",
+            "mzmax": "float64",
+            "rtmed": "float64",
+            "rtmin": "float64",
+            "rtmax": "float64",
+            "npeaks": "int32",
+            "ms_level": "int8",
+        },
+        index_dtype="str",
+    ),
+    XCMSExperimentFeaturePeakIndexFormat: _TableSpec(
+        dtypes={"feature_index": "int32", "peak_index": "int32"}
+    ),
+}
+
+
+def _read_header(path, skiprows):
+    with open(path, "r", newline="") as file:
+        for _ in range(skiprows):
+            file.readline()
+        return next(csv.reader([file.readline()], delimiter="\t"))
+
+
+def read_xcms_table(ff, columns=None, compact=True):
+    """
+    Reads a table of an XCMSExperiment into a DataFrame with compact dtypes.
+
+    The tables are written by R's write.table, so the header lacks the column of
+    row names, which become the index. Only the given `columns` are parsed if
+    specified. With `compact=False`, no column is reduced to float32, so the
+    table can be written back without loss of precision.
+    """
+    spec = TABLE_SPECS[type(ff)]
+    path = str(ff)
+
+    if spec.names is not None:
+        names, skiprows = spec.names, spec.skiprows
+    else:
+        names, skiprows = _read_header(path, spec.skiprows), spec.skiprows + 1
+
+    if columns is not None:
+        missing = [column for column in columns if column not in names]
+        if missing:
+            raise ValueError(
+                f"Columns {', '.join(missing)} are not present in {path}. "
+                f"Available columns: {', '.join(names)}"
+            )
+
+    dtypes = {name: dtype for name, dtype in spec.dtypes.items() if name in names}
+    if not compact:
+        dtypes = {
+            name: "float64" if dtype == "float32" else dtype
+            for name, dtype in dtypes.items()
+        }
+    usecols = list(columns) if columns is not None else list(names)
+    index_col = None
+    if spec.index_dtype is not None:
+        names = ["_row_name", *names]
+        dtypes["_row_name"] = spec.index_dtype
+        usecols = ["_row_name", *usecols]
+        index_col = "_row_name"
+
+    converted = {
+        name: dtypes[name]
+        for name in usecols
+        if name in dtypes and _convert_after_parsing(dtypes[name])
+    }
+    kwargs = dict(
+        sep="\t",
+        header=None,
+        names=names,
+        skiprows=skiprows,
+        usecols=usecols,
+        index_col=index_col,
+        dtype={
+            name: dtypes[name]
+            for name in usecols
+            if name in dtypes and name not in converted
+        },
+    )
+    with pd.read_csv(path, chunksize=CHUNK_ROWS, **kwargs) as reader:
+        chunks = [chunk.astype(converted) for chunk in reader]
+    if not chunks:
+        chunks = [pd.read_csv(path, nrows=0, **kwargs).astype(converted)]
+    df = _concat(chunks, converted)
+    df.index.name = None
+
+    return df[columns] if columns is not None else df
+
+
+def _format_column(values):
+    """Formats a column as write.table does, with NA for missing values."""
+    if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype.kind in "OUST":
+        strings = values.astype(object).where(values.notna(), None)
+        return np.array(
+            [
+                "NA" if value is None else '"' + value.replace('"', '\\"') + '"'
+                for value in strings
+            ],
+            dtype=object,
+        )
+
+    na = values.isna().to_numpy()
+    if values.dtype.kind == "b":
+        formatted = np.where(values.to_numpy(dtype=bool), "TRUE", "FALSE")
+    elif values.dtype.kind == "f":
+        formatted = np.char.mod("%.15g", values.to_numpy(dtype=np.float64))
+        formatted[np.isposinf(values)] = "Inf"
+        formatted[np.isneginf(values)] = "-Inf"
+    else:
+        formatted = values.to_numpy(dtype=np.int64, na_value=0).astype(str)
+    return np.where(na, "NA", formatted).astype(object)
+
+
+def write_xcms_table(df, path, comment=None):
+    """
+    Writes a DataFrame in the layout read by read_xcms_table, i.e. as R's
+    write.table with quoted strings and row names and an optional comment line
+    preceding the header.
+    """
+    with open(path, "w") as file:
+        if comment is not None:
+            file.write(f"{comment}\n")
+        file.write("\t".join(f'"{name}"' for name in df.columns) + "\n")
+
+        for start in range(0, len(df), CHUNK_ROWS):
+            chunk = df.iloc[start : start + CHUNK_ROWS]
+            # R quotes row names even if they are numbers
+            columns = [np.array([f'"{name}"' for name in chunk.index])] + [
+                _format_column(chunk[name]) for name in chunk.columns
+            ]
+            file.writelines("\t".join(row) + "\n" for row in zip(*columns))
+
+
+def _convert_after_parsing(dtype):
+    return dtype == "category" or dtype[0] == "I"
+
+
+def _concat(chunks, dtypes):
+    if len(chunks) == 1:
+        return chunks[0]
+
+    # Chunks only share a categorical dtype if their categories are the same
+    for name, dtype in dtypes.items():
+        if dtype == "category":
+            categories = union_categoricals(
+                [chunk[name] for chunk in chunks]
+            ).categories
+            for chunk in chunks:
+                chunk[name] = chunk[name].cat.set_categories(categories)
+
+    return pd.concat(chunks)
@@ -0,0 +1,244 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+import pandas as pd
+
+from q2_ms.plugin_setup import plugin
+from q2_ms.types._binned import load_binned
+from q2_ms.types._chromatograms import read_chromatograms, read_ion_chromatograms
+from q2_ms.types._experiment import (
+    XCMSExperimentView,
+    write_columnar_experiment,
+    write_text_experiment,
+)
+from q2_ms.types._feature_peaks import (
+    FeaturePeakIndex,
+    load_feature_peak_index,
+    read_feature_peak_edges,
+)
+from q2_ms.types._format import (
+    BinnedSpectralLibraryDirFmt,
+    ChromatogramsFormat,
+    IndexedSpectralLibraryDirFmt,
+    IonChromatogramsFormat,
+    MatchedSpectraBinaryDirFmt,
+    MatchedSpectraDirFmt,
+    MS1PeakIndexDirFmt,
+    MSBackendDataFormat,
+    MSExperimentSampleDataFormat,
+    MSExperimentSampleDataLinksSpectra,
+    MSPDirFmt,
+    SpectralLibraryDirFmt,
+    XCMSExperimentChromPeakDataFormat,
+    XCMSExperimentChromPeaksFormat,
+    XCMSExperimentColumnarDirFmt,
+    XCMSExperimentDirFmt,
+    XCMSExperimentFeatureDefinitionsFormat,
+    XCMSExperimentFeaturePeakIndexFormat,
+    mzMLDirFmt,
+    mzMLFormat,
+    mzMLPeaksDirFmt,
+    mzMLSampleFormat,
+)
+from q2_ms.types._library import SpectralLibrary
+from q2_ms.types._lsh import LSHIndex
+from q2_ms.types._matched import binary_to_text, text_to_binary
+from q2_ms.types._ms1_index import write_ms1_index, write_peak_store_ms1_index
+from q2_ms.types._peaks import peak_store_library, write_peak_store
+from q2_ms.types._tables import read_xcms_table
+
+
+def _msp_path(ff):
+    return str(next(ff.path.glob("*.msp")))
+
+
+@plugin.register_transformer
+def _1(ff: MSPDirFmt) -> SpectralLibraryDirFmt:
+    library = SpectralLibraryDirFmt()
+    SpectralLibrary.from_msp(_msp_path(ff)).save(str(library))
+    return library
+
+
+@plugin.register_transformer
+def _2(ff: SpectralLibraryDirFmt) -> SpectralLibrary:
+    return SpectralLibrary.load(str(ff))
+
+
+@plugin.register_transformer
+def _3(ff: MSPDirFmt) -> SpectralLibrary:
+    return SpectralLibrary.from_msp(_msp_path(ff))
+
+
+@plugin.register_transformer
+def _4(ff: mzMLDirFmt) -> SpectralLibrary:
+    return SpectralLibrary.from_mzml(
+        [str(view) for _, view in ff.mzml.iter_views(mzMLSampleFormat)]
+    )
+
+
+@plugin.register_transformer
+def _5(ff: MSBackendDataFormat) -> pd.DataFrame:
+    return read_xcms_table(ff)
+
+
+@plugin.register_transformer
+def _6(ff: MSExperimentSampleDataFormat) -> pd.DataFrame:
+    return read_xcms_table(ff)
+
+
+@plugin.register_transformer
+def _7(ff: MSExperimentSampleDataLinksSpectra) -> pd.DataFrame:
+    return read_xcms_table(ff)
+
+
+@plugin.register_transformer
+def _8(ff: XCMSExperimentChromPeakDataFormat) -> pd.DataFrame:
+    return read_xcms_table(ff)
+
+
+@plugin.register_transformer
+def _9(ff: XCMSExperimentChromPeaksFormat) -> pd.DataFrame:
+    return read_xcms_table(ff)
+
+
+@plugin.register_transformer
+def _10(ff: XCMSExperimentFeatureDefinitionsFormat) -> pd.DataFrame:
+    return read_xcms_table(ff)
+
+
+@plugin.register_transformer
+def _11(ff: XCMSExperimentFeaturePeakIndexFormat) -> pd.DataFrame:
+    return read_xcms_table(ff)
+
+
+@plugin.register_transformer
+def _12(ff: XCMSExperimentDirFmt) -> XCMSExperimentColumnarDirFmt:
+    experiment = XCMSExperimentColumnarDirFmt()
+    write_columnar_experiment(str(ff), str(experiment))
+    return experiment
+
+
+@plugin.register_transformer
+def _13(ff: XCMSExperimentColumnarDirFmt) -> XCMSExperimentDirFmt:
+    experiment = XCMSExperimentDirFmt()
+    write_text_experiment(str(ff), str(experiment))
+    return experiment
+
+
+@plugin.register_transformer
+def _14(ff: MatchedSpectraDirFmt) -> MatchedSpectraBinaryDirFmt:
+    matched_spectra = MatchedSpectraBinaryDirFmt()
+    text_to_binary(os.path.join(str(ff), "matched_spectra.txt"), str(matched_spectra))
+    return matched_spectra
+
+
+@plugin.register_transformer
+def _15(ff: MatchedSpectraBinaryDirFmt) -> MatchedSpectraDirFmt:
+    matched_spectra = MatchedSpectraDirFmt()
+    binary_to_text(str(ff), os.path.join(str(matched_spectra), "matched_spectra.txt"))
+    return matched_spectra
+
+
+@plugin.register_transformer
+def _16(ff: mzMLDirFmt) -> mzMLPeaksDirFmt:
+    peaks = mzMLPeaksDirFmt()
+    write_peak_store(
+        [str(view) for _, view in ff.mzml.iter_views(mzMLSampleFormat)], str(peaks)
+    )
+    return peaks
+
+
+@plugin.register_transformer
+def _17(ff: ChromatogramsFormat) -> pd.DataFrame:
+    return read_chromatograms(str(ff))
+
+
+@plugin.register_transformer
+def _18(data: pd.DataFrame) -> ChromatogramsFormat:
+    ff = ChromatogramsFormat()
+    data.to_csv(str(ff), sep="\t", index=False, float_format="%.10g")
+    return ff
+
+
+@plugin.register_transformer
+def _19(ff: IonChromatogramsFormat) -> pd.DataFrame:
+    return read_ion_chromatograms(str(ff))
+
+
+@plugin.register_transformer
+def _20(data: pd.DataFrame) -> IonChromatogramsFormat:
+    ff = IonChromatogramsFormat()
+    data.to_csv(str(ff), sep="\t", index=False, float_format="%.10g")
+    return ff
+
+
+@plugin.register_transformer
+def _21(ff: mzMLDirFmt) -> MS1PeakIndexDirFmt:
+    index = MS1PeakIndexDirFmt()
+    write_ms1_index(
+        [str(view) for _, view in ff.mzml.iter_views(mzMLSampleFormat)], str(index)
+    )
+    return index
+
+
+@plugin.register_transformer
+def _22(ff: BinnedSpectralLibraryDirFmt) -> SpectralLibrary:
+    library = SpectralLibrary.load(str(ff))
+    library.binned = load_binned(str(ff))
+    return library
+
+
+@plugin.register_transformer
+def _23(ff: IndexedSpectralLibraryDirFmt) -> SpectralLibrary:
+    library = SpectralLibrary.load(str(ff))
+    library.binned = load_binned(str(ff))
+    library.lsh = LSHIndex.load(str(ff))
+    return library
+
+
+@plugin.register_transformer
+def _24(ff: XCMSExperimentFeaturePeakIndexFormat) -> FeaturePeakIndex:
+    return FeaturePeakIndex.from_edges(*read_feature_peak_edges(str(ff)))
+
+
+@plugin.register_transformer
+def _25(ff: XCMSExperimentDirFmt) -> FeaturePeakIndex:
+    return load_feature_peak_index(str(ff))
+
+
+@plugin.register_transformer
+def _26(ff: XCMSExperimentColumnarDirFmt) -> FeaturePeakIndex:
+    return load_feature_peak_index(str(ff))
+
+
+@plugin.register_transformer
+def _27(ff: XCMSExperimentDirFmt) -> XCMSExperimentView:
+    return XCMSExperimentView(str(ff))
+
+
+@plugin.register_transformer
+def _28(ff: XCMSExperimentColumnarDirFmt) -> XCMSExperimentView:
+    return XCMSExperimentView(str(ff))
+
+
+@plugin.register_transformer
+def _29(ff: mzMLPeaksDirFmt) -> SpectralLibrary:
+    return peak_store_library(str(ff))
+
+
+@plugin.register_transformer
+def _30(ff: mzMLPeaksDirFmt) -> MS1PeakIndexDirFmt:
+    index = MS1PeakIndexDirFmt()
+    write_peak_store_ms1_index(str(ff), str(index))
+    return index
+
+
+@plugin.register_transformer
+def _31(ff: mzMLSampleFormat) -> mzMLFormat:
+    return mzMLFormat(str(ff), mode="r")
@@ -9,6 +9,14 @@ from q2_types.sample_data import SampleData
 from qiime2.core.type import SemanticType
 
 mzML = SemanticType("mzML", variant_of=SampleData.field["type"])
+mzMLPeaks = SemanticType("mzMLPeaks", variant_of=SampleData.field["type"])
 XCMSExperiment = SemanticType("XCMSExperiment")
+ColumnarXCMSExperiment = SemanticType("ColumnarXCMSExperiment")
 MSP = SemanticType("MSP")
+ColumnarSpectralLibrary = SemanticType("ColumnarSpectralLibrary")
+BinnedSpectralLibrary = SemanticType("BinnedSpectralLibrary")
+IndexedSpectralLibrary = SemanticType("IndexedSpectralLibrary")
 MatchedSpectra = SemanticType("MatchedSpectra_valid")
+CompactMatchedSpectra = SemanticType("CompactMatchedSpectra")
+Chromatograms = SemanticType("Chromatograms", variant_of=SampleData.field["type"])
+IonChromatograms = SemanticType("IonChromatograms", variant_of=SampleData.field["type"])
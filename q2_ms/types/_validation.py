@@ -0,0 +1,147 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import functools
+import hashlib
+import os
+
+from q2_ms import __version__
+from q2_ms._cache import default_cache_dir
+from q2_ms._metrics import measure
+
+VALIDATION_CACHE_ENV = "Q2_MS_VALIDATION_CACHE"
+VALIDATION_CACHE_SIZE_ENV = "Q2_MS_VALIDATION_CACHE_SIZE"
+DEFAULT_VALIDATION_CACHE_SIZE = 10_000
+
+# Bytes hashed at the start and at the end of each file
+FINGERPRINT_BYTES = 64 * 1024
+
+
+def _fingerprint_file(hasher, path, stat):
+    hasher.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as file:
+        hasher.update(file.read(FINGERPRINT_BYTES))
+        if stat.st_size > 2 * FINGERPRINT_BYTES:
+            file.seek(-FINGERPRINT_BYTES, os.SEEK_END)
+            hasher.update(file.read())
+
+
+def fingerprint(path):
+    """
+    Returns a digest of the size, modification time and first and last
+    FINGERPRINT_BYTES of a file, or of all files of a directory and their
+    relative paths.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    if not os.path.isdir(path):
+        _fingerprint_file(hasher, path, os.stat(path))
+        return hasher.hexdigest()
+
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            hasher.update(os.path.relpath(file_path, path).encode() + b"\0")
+            _fingerprint_file(hasher, file_path, os.stat(file_path))
+    return hasher.hexdigest()
+
+
+class ValidationCache:
+    """
+    Cache of successful validations, one empty file per validated
+    (format, level, fingerprint) in `path`. The modification time of an entry
+    marks its last use, the least recently used entries are evicted once there
+    are more than `max_entries`. Failed validations are not cached.
+    """
+
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or os.path.join(default_cache_dir(), "validation")
+        self.max_entries = (
+            DEFAULT_VALIDATION_CACHE_SIZE if max_entries is None else max_entries
+        )
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def key(fmt, level, path):
+        # Validators may change between releases, so the version is part of the key
+        name = f"{fmt.__module__}.{fmt.__qualname__}"
+        key = f"{__version__}\0{name}\0{level}\0{fingerprint(path)}"
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def hit(self, key):
+        """Returns whether `key` was validated before, marking it as used."""
+        try:
+            os.utime(os.path.join(self.path, key))
+        except OSError:
+            return False
+        return True
+
+    def add(self, key):
+        open(os.path.join(self.path, key), "w").close()
+        self.evict()
+
+    def evict(self):
+        """Deletes the least recently used entries beyond `max_entries`."""
+        entries = list(os.scandir(self.path))
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in entries[: len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def validation_cache():
+    """Returns the validation cache if enabled by Q2_MS_VALIDATION_CACHE."""
+    if os.environ.get(VALIDATION_CACHE_ENV, "").lower() not in ("1", "true", "yes"):
+        return None
+
+    size = os.environ.get(VALIDATION_CACHE_SIZE_ENV, "")
+    try:
+        return ValidationCache(max_entries=int(size) if size.isdigit() else None)
+    except OSError:
+        return None
+
+
+def _cached_validate(validate_, fmt, level, fields):
+    cache = validation_cache()
+    if cache is None:
+        return validate_(fmt, level)
+
+    try:
+        key = cache.key(type(fmt), level, str(fmt))
+    except OSError:
+        return validate_(fmt, level)
+    if cache.hit(key):
+        fields["cached"] = True
+        return
+
+    validate_(fmt, level)
+    try:
+        cache.add(key)
+    except OSError:
+        pass
+
+
+def cached_validation(validate_):
+    """
+    Decorates the _validate_ method of a format to skip validating files that
+    passed the same validation before, if the validation cache is enabled, and
+    to measure the validation if metrics are enabled (see q2_ms._metrics).
+    """
+
+    @functools.wraps(validate_)
+    def wrapper(self, level):
+        with measure(
+            f"validate.{type(self).__name__}", path=str(self), level=level
+        ) as fields:
+            _cached_validate(validate_, self, level, fields)
+
+    return wrapper
@@ -0,0 +1,129 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types import (
+    XCMSExperimentChromPeaksFormat,
+    XCMSExperimentColumnarDirFmt,
+    XCMSExperimentDirFmt,
+    XCMSExperimentView,
+    read_xcms_table,
+)
+from q2_ms.types._experiment import read_xcms_table as _read_xcms_table
+
+
+class TestXCMSExperimentView(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.experiment = XCMSExperimentView(self.get_data_path("XCMSExperiment"))
+
+    def test_tables_are_read_on_access(self):
+        with patch(
+            "q2_ms.types._experiment.read_xcms_table", wraps=_read_xcms_table
+        ) as read:
+            features = self.experiment.features
+
+            self.assertEqual(read.call_count, 1)
+            self.assertEqual(
+                type(read.call_args.args[0]).__name__,
+                "XCMSExperimentFeatureDefinitionsFormat",
+            )
+            self.assertEqual(features.index[0], "FT001")
+            self.assertEqual(features["npeaks"].dtype, np.int32)
+
+            # Cached tables are not read again
+            self.experiment.features
+            self.assertEqual(read.call_count, 1)
+
+    def test_table_columns(self):
+        with patch(
+            "q2_ms.types._experiment.read_xcms_table", wraps=_read_xcms_table
+        ) as read:
+            mz = self.experiment.table("chrom_peaks", columns=["mz"])
+            peaks = self.experiment.table("chrom_peaks", columns=["mz", "sample"])
+
+            self.assertEqual(mz.columns.tolist(), ["mz"])
+            self.assertEqual(peaks.columns.tolist(), ["mz", "sample"])
+            # Only the column not read before is parsed
+            self.assertEqual(read.call_args.kwargs["columns"], ["sample"])
+
+        exp = read_xcms_table(
+            XCMSExperimentChromPeaksFormat(
+                self.get_data_path("XCMSExperiment/xcms_experiment_chrom_peaks.txt"),
+                mode="r",
+            ),
+            columns=["mz", "sample"],
+        )
+        pd.testing.assert_frame_equal(peaks, exp)
+
+    def test_table_missing_column(self):
+        with self.assertRaisesRegex(ValueError, "Columns foo are not present"):
+            self.experiment.table("features", columns=["foo"])
+
+    def test_columns(self):
+        self.assertEqual(
+            self.experiment.columns("sample_data"),
+            ["sample_name", "sample_group", "spectraOrigin"],
+        )
+        self.assertEqual(
+            self.experiment.columns("sample_data_links_spectra"),
+            ["sample_index", "spectrum_index"],
+        )
+
+    def test_compact(self):
+        into = self.experiment.table("chrom_peaks", columns=["into"])["into"]
+        full = XCMSExperimentView(
+            self.get_data_path("XCMSExperiment"), compact=False
+        ).table("chrom_peaks", columns=["into"])["into"]
+
+        self.assertEqual(into.dtype, np.float32)
+        self.assertEqual(full.dtype, np.float64)
+
+    def test_unknown_table(self):
+        with self.assertRaisesRegex(ValueError, "Unknown table spectra"):
+            self.experiment.table("spectra")
+
+    def test_missing_table(self):
+        experiment = XCMSExperimentView(self.temp_dir.name)
+
+        self.assertFalse(experiment.has_table("features"))
+        with self.assertRaisesRegex(
+            ValueError, "does not contain the table xcms_experiment_feature_defin"
+        ):
+            experiment.features
+
+    def test_columnar(self):
+        columnar = XCMSExperimentView(self.get_data_path("XCMSExperimentColumnar"))
+
+        self.assertTrue(columnar.has_table("backend"))
+        obs = columnar.table("chrom_peaks", columns=["mz", "sample"])
+        exp = XCMSExperimentView(
+            self.get_data_path("XCMSExperiment"), compact=False
+        ).table("chrom_peaks", columns=["mz", "sample"])
+        self.assertEqual(obs.index.tolist(), exp.index.tolist())
+        np.testing.assert_array_equal(obs.to_numpy(), exp.to_numpy())
+        self.assertEqual(
+            columnar.features.index.tolist(), self.experiment.features.index.tolist()
+        )
+
+    def test_transformers(self):
+        for fmt, name in (
+            (XCMSExperimentDirFmt, "XCMSExperiment"),
+            (XCMSExperimentColumnarDirFmt, "XCMSExperimentColumnar"),
+        ):
+            transformer = self.get_transformer(fmt, XCMSExperimentView)
+            obs = transformer(fmt(self.get_data_path(name), mode="r"))
+
+            self.assertIsInstance(obs, XCMSExperimentView)
+            self.assertEqual(len(obs.sample_data), 8)
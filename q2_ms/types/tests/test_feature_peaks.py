@@ -0,0 +1,70 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import numpy as np
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types._feature_peaks import FeaturePeakIndex, feature_peak_index_paths
+
+
+class TestFeaturePeakIndex(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        # Peak 2 is assigned to two features, peak 4 and feature 3 to none
+        self.index = FeaturePeakIndex.from_edges(
+            features=[1, 0, 0, 2, 1, 0],
+            peaks=[3, 2, 0, 5, 2, 1],
+            n_features=4,
+            n_peaks=6,
+        )
+
+    def test_from_edges(self):
+        self.assertEqual((self.index.n_features, self.index.n_peaks), (4, 6))
+        self.assertEqual(len(self.index), 6)
+        np.testing.assert_array_equal(self.index.feature_indptr, [0, 3, 5, 6, 6])
+        np.testing.assert_array_equal(self.index.feature_peaks, [0, 1, 2, 2, 3, 5])
+        np.testing.assert_array_equal(self.index.peak_indptr, [0, 1, 2, 4, 5, 5, 6])
+        np.testing.assert_array_equal(self.index.peak_features, [0, 0, 0, 1, 1, 2])
+
+    def test_from_edges_default_sizes(self):
+        index = FeaturePeakIndex.from_edges([1, 0], [3, 2])
+
+        self.assertEqual((index.n_features, index.n_peaks), (2, 4))
+
+    def test_from_edges_empty(self):
+        index = FeaturePeakIndex.from_edges([], [])
+
+        self.assertEqual((index.n_features, index.n_peaks, len(index)), (0, 0, 0))
+
+    def test_from_edges_out_of_range(self):
+        with self.assertRaisesRegex(ValueError, "Peak indices must lie within 0"):
+            FeaturePeakIndex.from_edges([0, 1], [0, 6], n_peaks=6)
+        with self.assertRaisesRegex(ValueError, "Feature indices must lie within"):
+            FeaturePeakIndex.from_edges([-1, 1], [0, 1])
+
+    def test_peaks_features(self):
+        self.assertEqual(self.index.peaks(0).tolist(), [0, 1, 2])
+        self.assertEqual(self.index.peaks(3).tolist(), [])
+        self.assertEqual(self.index.features(2).tolist(), [0, 1])
+        self.assertEqual(self.index.features(4).tolist(), [])
+
+    def test_edges(self):
+        features, peaks = self.index.edges()
+
+        self.assertEqual(features.tolist(), [0, 0, 0, 1, 1, 2])
+        self.assertEqual(peaks.tolist(), [0, 1, 2, 2, 3, 5])
+
+    def test_save_load(self):
+        self.index.save(self.temp_dir.name)
+        obs = FeaturePeakIndex.load(self.temp_dir.name)
+
+        for name, path in feature_peak_index_paths(self.temp_dir.name).items():
+            self.assertTrue(path.endswith(f"feature_peak_index.{name}.npy"))
+            np.testing.assert_array_equal(getattr(obs, name), getattr(self.index, name))
+        self.assertEqual(obs.peaks(1).tolist(), [2, 3])
@@ -5,28 +5,57 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+import os
+import shutil
+from unittest.mock import patch
+
+import numpy as np
 from qiime2.core.exceptions import ValidationError
 from qiime2.plugin.testing import TestPluginBase
 
+from q2_ms.types._binned import bin_spectra, save_binned
 from q2_ms.types._format import (
+    BinnedSpectralLibraryDirFmt,
+    BinnedSpectralLibraryMetadataFormat,
+    ChromatogramsDirFmt,
+    ChromatogramsFormat,
+    ColumnarTableSchemaFormat,
+    IndexedSpectralLibraryDirFmt,
+    IonChromatogramsDirFmt,
+    IonChromatogramsFormat,
+    LSHIndexMetadataFormat,
+    MatchedSpectraBinaryDirFmt,
     MatchedSpectraDirFmt,
     MatchedSpectraFormat,
+    MS1PeakIndexDirFmt,
     MSBackendDataFormat,
     MSExperimentLinkMColsFormat,
     MSExperimentSampleDataFormat,
     MSExperimentSampleDataLinksSpectra,
     MSPDirFmt,
     MSPFormat,
+    NumpyArrayFormat,
+    SpectralLibraryDirFmt,
     SpectraSlotsFormat,
     XCMSExperimentChromPeakDataFormat,
     XCMSExperimentChromPeaksFormat,
+    XCMSExperimentColumnarDirFmt,
     XCMSExperimentDirFmt,
     XCMSExperimentFeatureDefinitionsFormat,
     XCMSExperimentFeaturePeakIndexFormat,
     XCMSExperimentJSONFormat,
+    _validate_mzml_files,
     mzMLDirFmt,
     mzMLFormat,
+    mzMLOffsetIndexFormat,
+    mzMLPeaksDirFmt,
+    mzMLSampleFormat,
 )
+from q2_ms.types._library import SpectralLibrary
+from q2_ms.types._lsh import LSHIndex
+from q2_ms.types._ms1_index import write_ms1_index
+from q2_ms.types._mzml import write_offset_index
+from q2_ms.types._peaks import write_sample_peaks
 
 
 class TestmzMLFormats(TestPluginBase):
@@ -47,6 +76,112 @@ class TestmzMLFormats(TestPluginBase):
         with self.assertRaises(ValidationError):
             format.validate()
 
+    def test_mzml_dir_fmt_validate_negative(self):
+        format = mzMLDirFmt(self.get_data_path("mzML_mixed"), mode="r")
+        with self.assertRaisesRegex(
+            ValidationError, "sample2.mzML is not a\\(n\\) mzMLFormat file"
+        ):
+            format.validate()
+
+    def test_mzml_sample_format_validate_negative(self):
+        path = os.path.join(self.temp_dir.name, "sample.mzML")
+        with open(path, "w") as file:
+            file.write("sample\tmz\n")
+        with self.assertRaisesRegex(ValidationError, "no mzML root element"):
+            mzMLSampleFormat(path, mode="r").validate()
+        mzMLSampleFormat(
+            self.get_data_path("mzML_valid/tiny.mzML"), mode="r"
+        ).validate()
+
+    def test_validate_mzml_files(self):
+        paths = [
+            self.get_data_path("mzML_mixed/sample1.mzML"),
+            self.get_data_path("mzML_mixed/sample2.mzML"),
+        ]
+        errors = _validate_mzml_files(paths, max_workers=2)
+
+        self.assertIsNone(errors[0])
+        self.assertIn("no element found", errors[1])
+
+    def _indexed_dir(self):
+        path = os.path.join(self.temp_dir.name, "indexed")
+        shutil.copytree(self.get_data_path("mzML_unindexed"), path)
+        write_offset_index(os.path.join(path, "tiny.mzML"))
+        return path
+
+    def test_mzml_dir_fmt_offset_index_validate_positive(self):
+        path = self._indexed_dir()
+        mzMLOffsetIndexFormat(
+            os.path.join(path, "tiny.mzML.offsets.npy"), mode="r"
+        ).validate()
+        mzMLDirFmt(path, mode="r").validate()
+
+    def test_mzml_dir_fmt_offset_index_out_of_date(self):
+        path = self._indexed_dir()
+        with open(os.path.join(path, "tiny.mzML"), "r+b") as file:
+            content = file.read()
+            file.seek(0)
+            header, body = content.split(b"\n", 1)
+            file.write(header + b"\n<!-- -->\n" + body)
+
+        format = mzMLDirFmt(path, mode="r")
+        format.validate(level="min")
+        with self.assertRaisesRegex(ValidationError, "out of date"):
+            format.validate()
+
+    def test_mzml_dir_fmt_offset_index_without_mzml(self):
+        path = self._indexed_dir()
+        os.rename(
+            os.path.join(path, "tiny.mzML.offsets.npy"),
+            os.path.join(path, "other.mzML.offsets.npy"),
+        )
+        with self.assertRaisesRegex(ValidationError, "without mzML file"):
+            mzMLDirFmt(path, mode="r").validate()
+
+    def test_mzml_offset_index_format_validate_negative(self):
+        path = os.path.join(self.temp_dir.name, "tiny.mzML.offsets.npy")
+        np.save(path, np.arange(3))
+        with self.assertRaisesRegex(ValidationError, "fields id, scan and offset"):
+            mzMLOffsetIndexFormat(path, mode="r").validate()
+
+
+class TestmzMLPeaksDirFmt(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.temp_dir.name
+        write_sample_peaks(
+            self.get_data_path("mzML_valid/tiny.mzML"),
+            self.path,
+            "tiny",
+            chunk_peaks=20,
+        )
+
+    def test_mzml_peaks_dir_fmt_validate_positive(self):
+        mzMLPeaksDirFmt(self.path, mode="r").validate()
+
+    def test_mzml_peaks_dir_fmt_missing_file(self):
+        os.remove(os.path.join(self.path, "tiny.peak_offsets.npy"))
+        with self.assertRaisesRegex(ValidationError, "tiny.peak_offsets.npy"):
+            mzMLPeaksDirFmt(self.path, mode="r").validate()
+
+    def test_mzml_peaks_dir_fmt_truncated(self):
+        with open(os.path.join(self.path, "tiny.peaks.bin"), "r+b") as file:
+            file.truncate(os.path.getsize(file.name) - 1)
+        with self.assertRaisesRegex(ValidationError, "contiguously"):
+            mzMLPeaksDirFmt(self.path, mode="r").validate(level="min")
+
+    def test_mzml_peaks_dir_fmt_corrupt_chunk(self):
+        with open(os.path.join(self.path, "tiny.peaks.bin"), "r+b") as file:
+            file.seek(-4, os.SEEK_END)
+            file.write(b"\0\0\0\0")
+
+        format = mzMLPeaksDirFmt(self.path, mode="r")
+        format.validate(level="min")
+        with self.assertRaisesRegex(ValidationError, "is corrupt"):
+            format.validate()
+
 
 class TestXCMSExperimentFormats(TestPluginBase):
     package = "q2_ms.types.tests"
@@ -230,6 +365,48 @@ class TestXCMSExperimentFormats(TestPluginBase):
         format = XCMSExperimentDirFmt(filepath, mode="r")
         format.validate()
 
+    def copy_columnar(self):
+        path = os.path.join(self.temp_dir.name, "XCMSExperimentColumnar")
+        shutil.copytree(self.get_data_path("XCMSExperimentColumnar"), path)
+        return path
+
+    def test_columnar_table_schema_positive(self):
+        filepath = self.get_data_path(
+            "XCMSExperimentColumnar/ms_backend_data/schema.json"
+        )
+        format = ColumnarTableSchemaFormat(filepath, mode="r")
+        format.validate()
+
+    def test_columnar_table_schema_negative(self):
+        filepath = self.get_data_path("XCMSExperiment/spectra_processing_queue.json")
+        format = ColumnarTableSchemaFormat(filepath, mode="r")
+        with self.assertRaisesRegex(ValidationError, "keys: index, columns"):
+            format.validate()
+
+    def test_xcms_experiment_columnar_dir_fmt_positive(self):
+        filepath = self.get_data_path("XCMSExperimentColumnar")
+        format = XCMSExperimentColumnarDirFmt(filepath, mode="r")
+        format.validate()
+
+    def test_xcms_experiment_columnar_dir_fmt_length_mismatch(self):
+        path = self.copy_columnar()
+        np.save(
+            os.path.join(path, "xcms_experiment_chrom_peaks", "rt.npy"),
+            np.zeros(3),
+        )
+
+        format = XCMSExperimentColumnarDirFmt(path, mode="r")
+        with self.assertRaisesRegex(ValidationError, "'rt'.*has 3 values, expected 4"):
+            format.validate()
+
+    def test_xcms_experiment_columnar_dir_fmt_missing_mask(self):
+        path = self.copy_columnar()
+        os.remove(os.path.join(path, "ms_backend_data", "msLevel.na.npy"))
+
+        format = XCMSExperimentColumnarDirFmt(path, mode="r")
+        with self.assertRaisesRegex(ValidationError, "msLevel.na.npy of column"):
+            format.validate()
+
 
 class TestMSPFormat(TestPluginBase):
     package = "q2_ms.types.tests"
@@ -244,11 +421,132 @@ class TestMSPFormat(TestPluginBase):
         with self.assertRaisesRegex(ValidationError, pattern):
             format.validate()
 
+    def test_msp_validate_min_checks_first_spectra(self):
+        format = MSPFormat(
+            self.get_data_path("MSP_invalid/invalid_after_min.msp"), mode="r"
+        )
+        format.validate("min")
+
+    def test_msp_validate_max_checks_all_spectra(self):
+        format = MSPFormat(
+            self.get_data_path("MSP_invalid/invalid_after_min.msp"), mode="r"
+        )
+        with self.assertRaisesRegex(ValidationError, r"Line 352: Inv.+\nPrecursorMZ"):
+            format.validate("max")
+
+    def test_msp_validate_error_cap(self):
+        format = MSPFormat(self.get_data_path("MSP_invalid/invalid.msp"), mode="r")
+        pattern = r"Line 21: Peak.+\n311.0914\n\.\.\. and 1 more errors\.$"
+        with self.assertRaisesRegex(ValidationError, pattern):
+            format._validate(max_errors=2)
+
     def test_msp_directory_format_validate_positive(self):
         format = MSPDirFmt(self.get_data_path("MSP_valid"), mode="r")
         format.validate()
 
 
+class TestSpectralLibraryFormats(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def test_numpy_array_format_validate_positive(self):
+        format = NumpyArrayFormat(
+            self.get_data_path("SpectralLibrary/mz.npy"), mode="r"
+        )
+        format.validate()
+
+    def test_numpy_array_format_validate_negative(self):
+        format = NumpyArrayFormat(self.get_data_path("MSP_valid/valid.msp"), mode="r")
+        with self.assertRaisesRegex(ValidationError, "not a NumPy array"):
+            format.validate()
+
+    def test_spectral_library_dir_fmt_validate_positive(self):
+        format = SpectralLibraryDirFmt(self.get_data_path("SpectralLibrary"), mode="r")
+        format.validate()
+
+    def test_spectral_library_dir_fmt_validate_negative(self):
+        format = SpectralLibraryDirFmt(
+            self.get_data_path("SpectralLibrary_invalid"), mode="r"
+        )
+        with self.assertRaisesRegex(ValidationError, "last offset of 15, 14 m/z"):
+            format.validate()
+
+
+class TestBinnedSpectralLibraryDirFmt(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.temp_dir.name, "binned")
+        shutil.copytree(self.get_data_path("SpectralLibrary"), self.path)
+        self.library = SpectralLibrary.load(self.path)
+        save_binned(bin_spectra(self.library, 1.0), 1.0, self.path)
+
+    def test_binned_spectral_library_dir_fmt_validate_positive(self):
+        BinnedSpectralLibraryDirFmt(self.path, mode="r").validate()
+
+    def test_binned_spectral_library_dir_fmt_wrong_rows(self):
+        save_binned(bin_spectra(self.library, 1.0)[:2], 1.0, self.path)
+        with self.assertRaisesRegex(ValidationError, r"one row per spectrum \(3\)"):
+            BinnedSpectralLibraryDirFmt(self.path, mode="r").validate(level="min")
+
+    def test_binned_spectral_library_dir_fmt_other_bin_width(self):
+        save_binned(bin_spectra(self.library, 0.5), 1.0, self.path)
+
+        format = BinnedSpectralLibraryDirFmt(self.path, mode="r")
+        format.validate(level="min")
+        with self.assertRaisesRegex(ValidationError, "bin width of 1.0"):
+            format.validate()
+
+    def test_binned_spectral_library_dir_fmt_invalid_bin_width(self):
+        path = os.path.join(self.path, "binned.json")
+        with open(path, "w") as file:
+            file.write('{"bin_width": 0, "n_bins": 691}')
+        with self.assertRaisesRegex(ValidationError, "bin_width must be a positive"):
+            BinnedSpectralLibraryMetadataFormat(path, mode="r").validate()
+
+
+class TestIndexedSpectralLibraryDirFmt(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.temp_dir.name, "indexed")
+        shutil.copytree(self.get_data_path("SpectralLibrary"), self.path)
+        self.library = SpectralLibrary.load(self.path)
+        save_binned(bin_spectra(self.library, 1.0), 1.0, self.path)
+        self.index = LSHIndex.build(self.library, n_tables=4, n_bits=8)
+        self.index.save(self.path)
+
+    def test_indexed_spectral_library_dir_fmt_validate_positive(self):
+        IndexedSpectralLibraryDirFmt(self.path, mode="r").validate()
+
+    def test_indexed_spectral_library_dir_fmt_wrong_shape(self):
+        np.save(os.path.join(self.path, "lsh_order.npy"), self.index.order[:, :2])
+        with self.assertRaisesRegex(ValidationError, r"one column per spectrum \(3\)"):
+            IndexedSpectralLibraryDirFmt(self.path, mode="r").validate(level="min")
+
+    def test_indexed_spectral_library_dir_fmt_other_seed(self):
+        LSHIndex.build(self.library, n_tables=4, n_bits=8, seed=1).save(self.path)
+        with open(os.path.join(self.path, "lsh.json")) as file:
+            metadata = file.read()
+        with open(os.path.join(self.path, "lsh.json"), "w") as file:
+            file.write(metadata.replace('"seed": 1', '"seed": 0'))
+
+        format = IndexedSpectralLibraryDirFmt(self.path, mode="r")
+        format.validate(level="min")
+        with self.assertRaisesRegex(ValidationError, "do not match the hash codes"):
+            format.validate()
+
+    def test_lsh_index_metadata_format_too_many_bits(self):
+        path = os.path.join(self.path, "lsh.json")
+        with open(path, "w") as file:
+            file.write(
+                '{"hash_bin_width": 1.0, "n_tables": 4, "n_bits": 65, "seed": 0}'
+            )
+        with self.assertRaisesRegex(ValidationError, "n_bits must not exceed 64"):
+            LSHIndexMetadataFormat(path, mode="r").validate()
+
+
 class TestMatchedSpectra(TestPluginBase):
     package = "q2_ms.types.tests"
 
@@ -258,12 +556,81 @@ class TestMatchedSpectra(TestPluginBase):
         )
         format.validate()
 
-    def test_matched_spectra_format_validate_positive_min(self):
+    def write_matched_spectra(self, rows, newline="\n"):
+        path = os.path.join(self.temp_dir.name, "matched_spectra.txt")
+        with open(path, "w", newline="") as f:
+            f.write(
+                newline.join(
+                    [".original_query_index\ttarget_spectrum_id\tscore", *rows]
+                )
+                + newline
+            )
+        return MatchedSpectraFormat(path, mode="r")
+
+    def test_matched_spectra_format_validate_negative_min(self):
+        # Small files are validated completely, also at the min level
         format = MatchedSpectraFormat(
             self.get_data_path("MatchedSpectra_invalid/matched_spectra_min.txt"),
             mode="r",
         )
-        format.validate("min")
+        with self.assertRaisesRegex(
+            ValidationError, "Line 52 has a non-numeric score: value"
+        ):
+            format.validate("min")
+
+    def test_matched_spectra_format_validate_chunks(self):
+        format = self.write_matched_spectra(
+            ["1\tMSBNK-1\t0.5"] * 10 + ["1\tMSBNK-1\t-0.5"]
+        )
+
+        with patch("q2_ms.types._format.MATCHED_SPECTRA_CHUNK_BYTES", 7):
+            with self.assertRaisesRegex(
+                ValidationError, "Line 12 has an out-of-range score: -0.5"
+            ):
+                format.validate()
+
+    def test_matched_spectra_format_validate_crlf(self):
+        format = self.write_matched_spectra(["1\tMSBNK-1\t0.5"] * 3, newline="\r\n")
+        format.validate()
+
+    def test_matched_spectra_format_validate_max_errors(self):
+        format = self.write_matched_spectra(["1\tMSBNK-1\t2"] * 25)
+
+        with self.assertRaises(ValidationError) as cm:
+            format.validate()
+
+        message = str(cm.exception)
+        self.assertIn("Line 2 has an out-of-range score: 2.0", message)
+        self.assertIn("Line 21 has", message)
+        self.assertNotIn("Line 22 has", message)
+        self.assertIn("... and 5 more errors.", message)
+
+    def test_matched_spectra_format_validate_min_samples_windows(self):
+        format = self.write_matched_spectra(
+            ["1\tMSBNK-1\t0.5"] * 1000 + ["1\tMSBNK-1\tvalue"]
+        )
+
+        with patch("q2_ms.types._format.MATCHED_SPECTRA_CHUNK_BYTES", 100), patch(
+            "q2_ms.types._format.MATCHED_SPECTRA_SAMPLE_BYTES", 50
+        ):
+            with self.assertRaisesRegex(
+                ValidationError, "Line at byte 14047 has a non-numeric score: value"
+            ):
+                format.validate("min")
+
+    def test_matched_spectra_format_validate_min_skips_unsampled_lines(self):
+        format = self.write_matched_spectra(
+            ["1\tMSBNK-1\t0.5"] * 500
+            + ["1\tMSBNK-1\tvalue"]
+            + ["1\tMSBNK-1\t0.5"] * 500
+        )
+
+        with patch("q2_ms.types._format.MATCHED_SPECTRA_CHUNK_BYTES", 100), patch(
+            "q2_ms.types._format.MATCHED_SPECTRA_SAMPLE_BYTES", 50
+        ), patch("q2_ms.types._format.MATCHED_SPECTRA_SAMPLES", 2):
+            format.validate("min")
+        with self.assertRaisesRegex(ValidationError, "Line 502 has a non-numeric"):
+            format.validate("max")
 
     def test_matched_spectra_format_validate_negative_header(self):
         format = MatchedSpectraFormat(
@@ -312,3 +679,104 @@ class TestMatchedSpectra(TestPluginBase):
             self.get_data_path("MatchedSpectra_valid"), mode="r"
         )
         format.validate()
+
+    def test_matched_spectra_binary_dir_fmt_validate_positive(self):
+        format = MatchedSpectraBinaryDirFmt(
+            self.get_data_path("MatchedSpectraBinary"), mode="r"
+        )
+        format.validate()
+
+    def test_matched_spectra_binary_dir_fmt_validate_negative_target(self):
+        format = MatchedSpectraBinaryDirFmt(
+            self.get_data_path("MatchedSpectraBinary_invalid"), mode="r"
+        )
+        with self.assertRaisesRegex(ValidationError, "one of the 3 target"):
+            format.validate()
+
+    def test_matched_spectra_binary_dir_fmt_validate_negative_length(self):
+        path = os.path.join(self.temp_dir.name, "matched_spectra")
+        shutil.copytree(self.get_data_path("MatchedSpectraBinary"), path)
+        np.save(os.path.join(path, "score.npy"), np.ones(3, dtype=np.float32))
+
+        format = MatchedSpectraBinaryDirFmt(path, mode="r")
+        with self.assertRaisesRegex(ValidationError, "Found 7, 7 and 3 values"):
+            format.validate(level="min")
+
+
+class TestChromatogramsFormats(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def test_chromatograms_dir_fmt_validate_positive(self):
+        ChromatogramsDirFmt(self.get_data_path("Chromatograms"), mode="r").validate()
+
+    def _write(self, content):
+        path = os.path.join(self.temp_dir.name, "chromatograms.tsv")
+        with open(self.get_data_path("Chromatograms/chromatograms.tsv")) as file:
+            header = file.readline()
+        with open(path, "w") as file:
+            file.write(header + content)
+        return ChromatogramsFormat(path, mode="r")
+
+    def test_chromatograms_format_validate_header(self):
+        path = os.path.join(self.temp_dir.name, "chromatograms.tsv")
+        with open(path, "w") as file:
+            file.write("sample_id\ttic\ns1\t1\n")
+        with self.assertRaisesRegex(ValidationError, "Header does not match"):
+            ChromatogramsFormat(path, mode="r").validate()
+
+    def test_chromatograms_format_validate_missing_tic(self):
+        with self.assertRaisesRegex(ValidationError, "must not be empty"):
+            self._write("s1\t0\t1.0\t\t1\t100\n").validate()
+
+    def test_chromatograms_format_validate_negative_bpc(self):
+        with self.assertRaisesRegex(ValidationError, "must not be negative"):
+            self._write("s1\t0\t1.0\t1\t-1\t100\n").validate()
+
+    def test_chromatograms_format_validate_invalid_value(self):
+        with self.assertRaisesRegex(ValidationError, "invalid values"):
+            self._write("s1\tfirst\t1.0\t1\t1\t100\n").validate()
+
+    def test_ion_chromatograms_dir_fmt_validate_positive(self):
+        IonChromatogramsDirFmt(
+            self.get_data_path("IonChromatograms"), mode="r"
+        ).validate()
+
+    def test_ion_chromatograms_format_validate_negative_intensity(self):
+        path = os.path.join(self.temp_dir.name, "ion_chromatograms.tsv")
+        with open(path, "w") as file:
+            file.write(
+                "sample_id\ttarget_id\tspectrum_index\tretention_time\tintensity\n"
+                "s1\tstd1\t0\t1.0\t-1\n"
+            )
+        with self.assertRaisesRegex(
+            ValidationError, "values in the intensity columns must not be negative"
+        ):
+            IonChromatogramsFormat(path, mode="r").validate()
+
+
+class TestMS1PeakIndexDirFmt(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.temp_dir.name
+        write_ms1_index([self.get_data_path("mzML_valid/tiny.mzML")], self.path)
+
+    def test_ms1_peak_index_dir_fmt_validate_positive(self):
+        MS1PeakIndexDirFmt(self.path, mode="r").validate()
+
+    def test_ms1_peak_index_dir_fmt_missing_array(self):
+        os.remove(os.path.join(self.path, "tiny.ms1_scan.npy"))
+        with self.assertRaisesRegex(ValidationError, "scan array of sample tiny"):
+            MS1PeakIndexDirFmt(self.path, mode="r").validate()
+
+    def test_ms1_peak_index_dir_fmt_wrong_bin(self):
+        path = os.path.join(self.path, "tiny.ms1_mz.npy")
+        mz = np.load(path)
+        mz[0] += 1
+        np.save(path, mz)
+
+        format = MS1PeakIndexDirFmt(self.path, mode="r")
+        format.validate(level="min")
+        with self.assertRaisesRegex(ValidationError, "wrong m/z bin"):
+            format.validate()
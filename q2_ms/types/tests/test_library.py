@@ -0,0 +1,79 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import numpy as np
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types import SpectralLibrary
+from q2_ms.types._library import build_precursor_index
+
+
+class TestPrecursorIndex(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.library = SpectralLibrary.load(self.get_data_path("SpectralLibrary"))
+
+    def test_build_precursor_index(self):
+        order, sorted_mz, partitions = build_precursor_index(
+            np.array([300.0, np.nan, 100.0, 200.0, 150.0]),
+            np.array([1, 1, -1, 1, -1], dtype=np.int8),
+            np.array([b"MS2", b"MS2", b"MS2", b"MS2", b"MS1"]),
+        )
+
+        np.testing.assert_array_equal(order, [4, 2, 3, 0, 1])
+        np.testing.assert_array_equal(sorted_mz, [150.0, 100.0, 200.0, 300.0, np.nan])
+        self.assertEqual(
+            partitions.tolist(),
+            [(-1, b"MS1", 0, 1), (-1, b"MS2", 1, 2), (1, b"MS2", 2, 5)],
+        )
+
+    def test_build_precursor_index_empty(self):
+        order, sorted_mz, partitions = build_precursor_index(
+            np.empty(0), np.empty(0, dtype=np.int8), np.empty(0, dtype="S3")
+        )
+
+        self.assertEqual(len(order), 0)
+        self.assertEqual(len(partitions), 0)
+
+    def test_precursor_candidates(self):
+        np.testing.assert_array_equal(
+            self.library.precursor_candidates(529.27, ppm=10), [2]
+        )
+
+    def test_precursor_candidates_none_in_window(self):
+        self.assertEqual(len(self.library.precursor_candidates(529.27, ppm=1)), 0)
+
+    def test_precursor_candidates_partitions(self):
+        np.testing.assert_array_equal(
+            self.library.precursor_candidates(
+                500, ppm=5e5, ion_mode="positive", spectrum_type="MS2"
+            ),
+            [0, 2, 1],
+        )
+        self.assertEqual(
+            len(self.library.precursor_candidates(529.2692, ion_mode="negative")), 0
+        )
+        self.assertEqual(
+            len(self.library.precursor_candidates(529.2692, spectrum_type="MS1")), 0
+        )
+
+
+class TestSpectralLibraryFromMzML(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def test_from_mzml(self):
+        library = SpectralLibrary.from_mzml(
+            [self.get_data_path("mzML_valid/tiny.mzML")]
+        )
+
+        self.assertEqual(len(library), 1)
+        np.testing.assert_allclose(library.precursor_mz, [445.34])
+        np.testing.assert_array_equal(library.ion_mode, [1])
+        self.assertEqual(library.spectrum_id(0), "tiny:20")
+        np.testing.assert_allclose(library.peaks(0)[0], np.arange(0, 20, 2))
@@ -0,0 +1,85 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import numpy as np
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types._library import SpectralLibrary
+from q2_ms.types._lsh import LSHIndex, _signs, hash_codes
+
+
+def _library(mz, intensity):
+    n_spectra, n_peaks = mz.shape
+    return SpectralLibrary(
+        mz=mz.ravel(),
+        intensity=intensity.ravel().astype(np.float32),
+        offsets=np.arange(n_spectra + 1) * n_peaks,
+        name=np.array([b"s"] * n_spectra),
+        precursor_mz=np.full(n_spectra, 500.0),
+        ion_mode=np.ones(n_spectra, dtype=np.int8),
+        spectrum_type=np.array([b"MS2"] * n_spectra),
+        inchikey=np.array([b""] * n_spectra),
+        db_id=np.array([b"s"] * n_spectra),
+    )
+
+
+class TestLSHIndex(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.mz = rng.uniform(50, 1000, (500, 20))
+        self.intensity = rng.uniform(1, 100, (500, 20))
+        self.library = _library(self.mz, self.intensity)
+        # Noisy copies of the first 50 library spectra
+        self.query = _library(
+            self.mz[:50] + rng.normal(0, 0.002, (50, 20)),
+            self.intensity[:50] * rng.uniform(0.8, 1.2, (50, 20)),
+        )
+
+    def test_signs(self):
+        signs = _signs(np.arange(1000), 8, seed=0)
+
+        self.assertEqual(signs.shape, (1000, 8))
+        self.assertEqual(set(np.unique(signs)), {-1.0, 1.0})
+        self.assertLess(abs(signs.mean()), 0.05)
+        np.testing.assert_array_equal(_signs(np.arange(10, 20), 8, 0), signs[10:20])
+        self.assertFalse(np.array_equal(_signs(np.arange(1000), 8, 1), signs))
+
+    def test_hash_codes(self):
+        codes = hash_codes(self.library, 1.0, n_tables=4, n_bits=12, seed=0)
+
+        self.assertEqual(codes.shape, (500, 4))
+        self.assertEqual(codes.dtype, np.uint64)
+        self.assertLess(codes.max(), 1 << 12)
+        # Codes do not depend on the other spectra hashed with a spectrum
+        first = _library(self.mz[:1], self.intensity[:1])
+        np.testing.assert_array_equal(hash_codes(first, 1.0, 4, 12, 0), codes[:1])
+
+    def test_candidates(self):
+        index = LSHIndex.build(self.library)
+        queries, targets = index.candidates(index.hash(self.query))
+
+        found = [q in targets[queries == q] for q in range(50)]
+        self.assertGreaterEqual(np.mean(found), 0.95)
+        # Few unrelated spectra share a bucket with the queries
+        self.assertLess(len(queries), 50 * 50)
+        pairs = queries * 500 + targets
+        np.testing.assert_array_equal(pairs, np.unique(pairs))
+
+    def test_save_load(self):
+        index = LSHIndex.build(self.library, n_tables=3, n_bits=8, seed=5)
+        index.save(self.temp_dir.name)
+        obs = LSHIndex.load(self.temp_dir.name)
+
+        self.assertEqual(
+            (obs.n_tables, obs.n_bits, obs.seed, obs.hash_bin_width), (3, 8, 5, 1.0)
+        )
+        np.testing.assert_array_equal(obs.keys, index.keys)
+        np.testing.assert_array_equal(obs.order, index.order)
+        np.testing.assert_array_equal(obs.hash(self.query), index.hash(self.query))
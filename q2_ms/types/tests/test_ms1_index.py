@@ -0,0 +1,116 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+import numpy as np
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types._ms1_index import (
+    MS1PeakIndex,
+    open_ms1_index,
+    save_ms1_index,
+    write_ms1_index,
+    write_peak_store_ms1_index,
+)
+from q2_ms.types._peaks import write_peak_store
+
+
+class TestMS1PeakIndex(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.rt = rng.permutation(np.arange(50) * 2.0)
+        self.peaks = [
+            (np.sort(rng.uniform(100, 110, n)), rng.uniform(1, 100, n))
+            for n in rng.integers(0, 40, len(self.rt))
+        ]
+        save_ms1_index(
+            self.temp_dir.name,
+            "sample",
+            self.rt,
+            np.arange(len(self.rt)),
+            self.peaks,
+            mz_bin_width=0.5,
+        )
+        self.index = MS1PeakIndex(self.temp_dir.name, "sample", mz_bin_width=0.5)
+
+    def brute_force(self, mz_min, mz_max, rt_min, rt_max):
+        hits = []
+        for rt, (mz, intensity) in zip(self.rt, self.peaks):
+            if rt_min <= rt <= rt_max:
+                keep = (mz >= mz_min) & (mz <= mz_max)
+                hits.extend(zip([rt] * keep.sum(), mz[keep], intensity[keep]))
+        return sorted(hits)
+
+    def test_query(self):
+        for window in (
+            (101.2, 101.3, 10, 40),
+            (100.9, 102.1, -np.inf, np.inf),
+            (105.0, 105.0, 0, 0),
+            (90, 95, 0, 100),
+            (109.9, 200, 50, 60),
+        ):
+            scans, mz, intensity = self.index.query(*window)
+            obs = sorted(zip(self.index.rt[scans], mz, intensity.astype(np.float64)))
+            exp = self.brute_force(*window)
+            self.assertEqual(len(obs), len(exp))
+            np.testing.assert_allclose(
+                np.array(obs).reshape(-1, 3), np.array(exp).reshape(-1, 3), rtol=1e-6
+            )
+
+    def test_xic(self):
+        scans, values = self.index.xic(101.0, 101.5, 10, 20)
+
+        np.testing.assert_array_equal(self.index.rt[scans], [10, 12, 14, 16, 18, 20])
+        for scan, value in zip(scans, values):
+            mz, intensity = self.peaks[
+                int(np.flatnonzero(self.rt == self.index.rt[scan])[0])
+            ]
+            keep = (mz >= 101.0) & (mz <= 101.5)
+            self.assertAlmostEqual(value, intensity[keep].astype(np.float32).sum(), 3)
+
+        _, maxima = self.index.xic(101.0, 101.5, 10, 20, aggregation="max")
+        self.assertTrue(np.all(maxima <= values))
+
+    def test_write_ms1_index(self):
+        write_ms1_index(
+            [self.get_data_path("mzML_valid/tiny.mzML")], self.temp_dir.name
+        )
+        index = open_ms1_index(self.temp_dir.name)["tiny"]
+
+        # MS1 spectra in retention time order, the one without at the end
+        np.testing.assert_array_equal(index.rt[:2], [42.05, 353.43])
+        self.assertTrue(np.isnan(index.rt[2]))
+        np.testing.assert_array_equal(index.spectrum_index, [3, 0, 2])
+
+        scans, values = index.xic(4.99, 5.01)
+        np.testing.assert_array_equal(index.spectrum_index[scans], [3, 0])
+        np.testing.assert_array_equal(values, [10.0, 10.0])
+
+    def test_write_peak_store_ms1_index(self):
+        path = self.get_data_path("mzML_valid/tiny.mzML")
+        store, exp, obs = (
+            os.path.join(self.temp_dir.name, name) for name in ("store", "exp", "obs")
+        )
+        for directory in (store, exp, obs):
+            os.mkdir(directory)
+        write_peak_store([path], store)
+        write_ms1_index([path], exp)
+        write_peak_store_ms1_index(store, obs)
+
+        exp_index = open_ms1_index(exp)["tiny"]
+        obs_index = open_ms1_index(obs)["tiny"]
+        np.testing.assert_array_equal(obs_index.rt, exp_index.rt)
+        np.testing.assert_array_equal(
+            obs_index.spectrum_index, exp_index.spectrum_index
+        )
+        np.testing.assert_array_equal(
+            obs_index.xic(4.99, 5.01)[1], exp_index.xic(4.99, 5.01)[1]
+        )
@@ -0,0 +1,42 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types import MSPFormat
+from q2_ms.types._msp import MSPRecord, iter_msp, write_msp
+
+
+class TestWriteMSP(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def test_write_msp_round_trip(self):
+        path = os.path.join(self.temp_dir.name, "library.msp")
+        records = list(iter_msp(self.get_data_path("MSP_valid/valid.msp")))
+
+        self.assertEqual(write_msp(records, path), len(records))
+
+        MSPFormat(path, mode="r").validate()
+        self.assertEqual(list(iter_msp(path)), records)
+
+    def test_write_msp_num_peaks(self):
+        path = os.path.join(self.temp_dir.name, "library.msp")
+        records = [
+            MSPRecord([("Name", "a"), ("Num Peaks", "3")], [1.0], [0.00001]),
+            MSPRecord([("Name", "b")], [1.5, 2.25], [10.0, 20.0]),
+        ]
+
+        write_msp(records, path)
+
+        with open(path) as file:
+            self.assertEqual(
+                file.read(),
+                "Name: a\nNum Peaks: 1\n1 0.00001\n\n"
+                "Name: b\nNum Peaks: 2\n1.5 10\n2.25 20\n",
+            )
@@ -0,0 +1,60 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+
+import numpy as np
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types._mzml import (
+    build_offset_index,
+    offset_index_path,
+    open_mzml,
+    write_offset_index,
+)
+
+
+class TestOffsetIndex(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.temp_dir.name, "tiny.mzML")
+        shutil.copyfile(self.get_data_path("mzML_unindexed/tiny.mzML"), self.path)
+
+    def test_build_offset_index(self):
+        index = build_offset_index(self.path)
+
+        np.testing.assert_array_equal(
+            index["id"],
+            [
+                b"scan=19",
+                b"scan=20",
+                b"scan=21",
+                b"sample=1 period=1 cycle=22 experiment=1",
+            ],
+        )
+        np.testing.assert_array_equal(index["scan"], [19, 20, 21, -1])
+        np.testing.assert_array_equal(index["offset"], [6455, 9920, 14791, 16270])
+        with open(self.path, "rb") as file:
+            content = file.read()
+        for offset in index["offset"]:
+            self.assertTrue(content[offset:].startswith(b"<spectrum "))
+
+    def test_build_offset_index_empty(self):
+        open(self.path, "w").close()
+        self.assertEqual(len(build_offset_index(self.path)), 0)
+
+    def test_open_mzml_offset_index(self):
+        write_offset_index(self.path)
+        self.assertTrue(os.path.exists(offset_index_path(self.path)))
+
+        reader = open_mzml(self.path)
+        self.assertEqual(reader[21].ID, 21)
+        self.assertEqual(reader[20].ID, 20)
+        self.assertEqual(reader["scan=19"].ID, 19)
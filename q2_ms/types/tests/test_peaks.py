@@ -0,0 +1,103 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+
+import numpy as np
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types._library import SpectralLibrary
+from q2_ms.types._mzml import open_mzml
+from q2_ms.types._peaks import (
+    SamplePeaks,
+    open_peak_store,
+    peak_store_library,
+    write_peak_store,
+    write_sample_peaks,
+)
+
+
+class TestPeakStore(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.mzml_path = self.get_data_path("mzML_valid/tiny.mzML")
+        self.expected = [
+            (spectrum.mz.copy(), spectrum.i.copy())
+            for spectrum in open_mzml(self.mzml_path)
+        ]
+
+    def assert_peaks(self, sample):
+        self.assertEqual(len(sample), len(self.expected))
+        for (mz, intensity), (exp_mz, exp_intensity) in zip(sample, self.expected):
+            np.testing.assert_array_equal(mz, exp_mz)
+            np.testing.assert_array_equal(intensity, exp_intensity.astype("f4"))
+
+    def test_write_sample_peaks(self):
+        write_sample_peaks(self.mzml_path, self.temp_dir.name, "tiny")
+        sample = SamplePeaks(self.temp_dir.name, "tiny")
+
+        self.assertEqual(len(sample.chunks), 1)
+        self.assert_peaks(sample)
+        np.testing.assert_array_equal(
+            sample.spectra["id"],
+            [
+                b"scan=19",
+                b"scan=20",
+                b"scan=21",
+                b"sample=1 period=1 cycle=22 experiment=1",
+            ],
+        )
+        np.testing.assert_array_equal(sample.spectra["scan"], [19, 20, 21, -1])
+        np.testing.assert_array_equal(sample.spectra["ms_level"], [1, 2, 1, 1])
+        np.testing.assert_allclose(
+            sample.spectra["retention_time"][:2], [353.43, 359.43]
+        )
+        np.testing.assert_array_equal(sample.spectra["precursor_mz"][1], 445.34)
+        self.assertTrue(np.isnan(sample.spectra["precursor_mz"][0]))
+
+    def test_write_sample_peaks_chunks(self):
+        write_sample_peaks(self.mzml_path, self.temp_dir.name, "tiny", chunk_peaks=20)
+        sample = SamplePeaks(self.temp_dir.name, "tiny")
+
+        self.assertGreater(len(sample.chunks), 1)
+        self.assert_peaks(sample)
+        # Random access inflates the chunk of the spectrum
+        for index in (3, 0, 2, 1):
+            np.testing.assert_array_equal(
+                sample.peaks(index)[0], self.expected[index][0]
+            )
+        with self.assertRaises(IndexError):
+            sample.peaks(4)
+
+    def test_write_peak_store(self):
+        paths = []
+        for sample_id in ("sample1", "sample2"):
+            paths.append(os.path.join(self.temp_dir.name, f"{sample_id}.mzML"))
+            shutil.copyfile(self.mzml_path, paths[-1])
+        write_peak_store(paths, self.temp_dir.name, max_workers=2)
+        store = open_peak_store(self.temp_dir.name)
+
+        self.assertEqual(list(store), ["sample1", "sample2"])
+        for sample in store.values():
+            self.assert_peaks(sample)
+
+    def test_peak_store_library(self):
+        # Samples are ordered by name, as in mzMLDirFmt
+        paths = [self.get_data_path("mzML_mixed/sample1.mzML"), self.mzml_path]
+        write_peak_store(paths, self.temp_dir.name)
+
+        for ms_level in (1, 2):
+            obs = peak_store_library(self.temp_dir.name, ms_level=ms_level)
+            exp = SpectralLibrary.from_mzml(paths, ms_level=ms_level)
+            self.assertEqual(len(obs), len(exp))
+            for name in exp.arrays:
+                np.testing.assert_array_equal(
+                    getattr(obs, name), getattr(exp, name), err_msg=name
+                )
@@ -0,0 +1,435 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import filecmp
+import os
+import shutil
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types import (
+    BinnedSpectralLibraryDirFmt,
+    ChromatogramsFormat,
+    FeaturePeakIndex,
+    IndexedSpectralLibraryDirFmt,
+    IonChromatogramsFormat,
+    LSHIndex,
+    MatchedSpectraBinaryDirFmt,
+    MatchedSpectraDirFmt,
+    MS1PeakIndexDirFmt,
+    MSBackendDataFormat,
+    MSExperimentSampleDataFormat,
+    MSExperimentSampleDataLinksSpectra,
+    MSPDirFmt,
+    SpectralLibrary,
+    SpectralLibraryDirFmt,
+    XCMSExperimentChromPeakDataFormat,
+    XCMSExperimentChromPeaksFormat,
+    XCMSExperimentColumnarDirFmt,
+    XCMSExperimentDirFmt,
+    XCMSExperimentFeatureDefinitionsFormat,
+    XCMSExperimentFeaturePeakIndexFormat,
+    mzMLDirFmt,
+    mzMLPeaksDirFmt,
+    read_xcms_table,
+)
+from q2_ms.types._binned import bin_spectra, save_binned
+from q2_ms.types._columnar import load_columnar_table
+from q2_ms.types._matched import open_matches
+from q2_ms.types._ms1_index import open_ms1_index
+from q2_ms.types._peaks import open_peak_store
+
+
+class TestSpectralLibraryTransformers(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def assert_valid_msp_library(self, library):
+        self.assertEqual(len(library), 3)
+        np.testing.assert_array_equal(library.offsets, [0, 4, 5, 14])
+        np.testing.assert_allclose(
+            library.peaks(0)[0], [273.0393, 287.055, 311.0914, 329.102]
+        )
+        np.testing.assert_allclose(library.peaks(1)[1], [999])
+        np.testing.assert_allclose(library.precursor_mz, [329.1014, 690.4054, 529.2692])
+        np.testing.assert_array_equal(library.ion_mode, [1, 1, 1])
+        np.testing.assert_array_equal(library.spectrum_type, [b"MS2"] * 3)
+        np.testing.assert_array_equal(library.precursor_order, [0, 2, 1])
+        self.assertEqual(library.name[2], b"Chaetoglobosin A")
+        self.assertEqual(library.inchikey[0], b"MYDJDVOVZVSVIE-ZETCQYMHSA-N")
+        self.assertEqual(library.spectrum_id(1), "MSBNK-AAFC-AC000658")
+
+    def test_msp_dir_fmt_to_spectral_library_dir_fmt(self):
+        transformer = self.get_transformer(MSPDirFmt, SpectralLibraryDirFmt)
+        obs = transformer(MSPDirFmt(self.get_data_path("MSP_valid"), mode="r"))
+
+        obs.validate()
+        self.assert_valid_msp_library(SpectralLibrary.load(str(obs)))
+
+    def test_spectral_library_dir_fmt_to_spectral_library(self):
+        transformer = self.get_transformer(SpectralLibraryDirFmt, SpectralLibrary)
+        obs = transformer(
+            SpectralLibraryDirFmt(self.get_data_path("SpectralLibrary"), mode="r")
+        )
+
+        self.assertIsInstance(obs.mz, np.memmap)
+        self.assert_valid_msp_library(obs)
+
+    def test_msp_dir_fmt_to_spectral_library(self):
+        transformer = self.get_transformer(MSPDirFmt, SpectralLibrary)
+        obs = transformer(MSPDirFmt(self.get_data_path("MSP_valid"), mode="r"))
+
+        self.assert_valid_msp_library(obs)
+
+    def test_binned_spectral_library_dir_fmt_to_spectral_library(self):
+        path = os.path.join(self.temp_dir.name, "binned")
+        shutil.copytree(self.get_data_path("SpectralLibrary"), path)
+        exp = bin_spectra(SpectralLibrary.load(path), 1.0)
+        save_binned(exp, 1.0, path)
+
+        transformer = self.get_transformer(BinnedSpectralLibraryDirFmt, SpectralLibrary)
+        obs = transformer(BinnedSpectralLibraryDirFmt(path, mode="r"))
+
+        self.assert_valid_msp_library(obs)
+        bin_width, matrix = obs.binned
+        self.assertEqual(bin_width, 1.0)
+        self.assertEqual(matrix.shape, exp.shape)
+        np.testing.assert_allclose(matrix.toarray(), exp.toarray())
+
+    def test_indexed_spectral_library_dir_fmt_to_spectral_library(self):
+        path = os.path.join(self.temp_dir.name, "indexed")
+        shutil.copytree(self.get_data_path("SpectralLibrary"), path)
+        library = SpectralLibrary.load(path)
+        save_binned(bin_spectra(library, 1.0), 1.0, path)
+        LSHIndex.build(library, n_tables=2, n_bits=4).save(path)
+
+        transformer = self.get_transformer(
+            IndexedSpectralLibraryDirFmt, SpectralLibrary
+        )
+        obs = transformer(IndexedSpectralLibraryDirFmt(path, mode="r"))
+
+        self.assert_valid_msp_library(obs)
+        self.assertEqual(obs.binned[0], 1.0)
+        self.assertEqual(obs.lsh.keys.shape, (2, 3))
+        np.testing.assert_array_equal(obs.lsh.hash(library), obs.lsh.hash(obs))
+
+    def test_mzml_dir_fmt_to_spectral_library(self):
+        transformer = self.get_transformer(mzMLDirFmt, SpectralLibrary)
+        obs = transformer(mzMLDirFmt(self.get_data_path("mzML_valid"), mode="r"))
+
+        self.assertEqual(len(obs), 1)
+        self.assertEqual(obs.spectrum_id(0), "tiny:20")
+
+    def test_mzml_dir_fmt_to_mzml_peaks_dir_fmt(self):
+        transformer = self.get_transformer(mzMLDirFmt, mzMLPeaksDirFmt)
+        obs = transformer(mzMLDirFmt(self.get_data_path("mzML_valid"), mode="r"))
+
+        obs.validate()
+        sample = open_peak_store(str(obs))["tiny"]
+        self.assertEqual(len(sample), 4)
+        np.testing.assert_array_equal(sample.spectra["ms_level"], [1, 2, 1, 1])
+        self.assertEqual(len(sample.peaks(1)[0]), 10)
+
+
+class TestXCMSTableTransformers(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def transform(self, fmt, filename):
+        transformer = self.get_transformer(fmt, pd.DataFrame)
+        return transformer(
+            fmt(self.get_data_path(os.path.join("XCMSExperiment", filename)), "r")
+        )
+
+    def test_ms_backend_data_to_dataframe(self):
+        obs = self.transform(MSBackendDataFormat, "ms_backend_data.txt")
+
+        self.assertEqual(obs.shape, (2, 26))
+        self.assertEqual(obs.index.tolist(), [1, 2])
+        self.assertEqual(obs.index.dtype, np.int32)
+        self.assertEqual(obs["rtime"].tolist(), [2551.457, 2553.022])
+        self.assertEqual(obs["msLevel"].dtype, "Int8")
+        self.assertEqual(obs["acquisitionNum"].tolist(), [33, 34])
+        self.assertEqual(obs["totIonCurrent"].dtype, np.float32)
+        self.assertIsInstance(obs["dataOrigin"].dtype, pd.CategoricalDtype)
+        self.assertEqual(len(obs["dataStorage"].cat.categories), 1)
+        self.assertEqual(obs["spectrumId"].tolist(), ["scan=33", "scan=34"])
+
+    def test_sample_data_to_dataframe(self):
+        obs = self.transform(
+            MSExperimentSampleDataFormat, "ms_experiment_sample_data.txt"
+        )
+
+        self.assertEqual(obs.shape, (8, 3))
+        self.assertEqual(obs.loc[1, "sample_name"], "ko15")
+        self.assertIsInstance(obs["spectraOrigin"].dtype, pd.CategoricalDtype)
+
+    def test_sample_data_links_spectra_to_dataframe(self):
+        obs = self.transform(
+            MSExperimentSampleDataLinksSpectra,
+            "ms_experiment_sample_data_links_spectra.txt",
+        )
+
+        self.assertEqual(obs.columns.tolist(), ["sample_index", "spectrum_index"])
+        self.assertEqual(obs["spectrum_index"].tolist(), [1, 2, 3, 4])
+        self.assertEqual(obs["sample_index"].dtype, np.int32)
+
+    def test_chrom_peak_data_to_dataframe(self):
+        obs = self.transform(
+            XCMSExperimentChromPeakDataFormat, "xcms_experiment_chrom_peak_data.txt"
+        )
+
+        self.assertEqual(obs.index[0], "CP0001")
+        self.assertEqual(obs["ms_level"].dtype, np.int8)
+        self.assertFalse(obs["is_filled"].any())
+
+    def test_chrom_peaks_to_dataframe(self):
+        obs = self.transform(
+            XCMSExperimentChromPeaksFormat, "xcms_experiment_chrom_peaks.txt"
+        )
+
+        self.assertEqual(obs.shape, (4, 11))
+        self.assertEqual(obs.loc["CP0001", "rt"], 2601.535)
+        self.assertEqual(obs["into"].dtype, np.float32)
+        self.assertAlmostEqual(obs.loc["CP0001", "into"], 161042.173, places=1)
+        self.assertEqual(obs["sample"].dtype, np.int32)
+
+    def test_feature_definitions_to_dataframe(self):
+        obs = self.transform(
+            XCMSExperimentFeatureDefinitionsFormat,
+            "xcms_experiment_feature_definitions.txt",
+        )
+
+        self.assertEqual(obs.index[0], "FT001")
+        self.assertEqual(obs.loc["FT002", "npeaks"], 8)
+        self.assertEqual(obs["npeaks"].dtype, np.int32)
+        self.assertIn("KO", obs.columns)
+
+    def test_feature_peak_index_to_dataframe(self):
+        obs = self.transform(
+            XCMSExperimentFeaturePeakIndexFormat,
+            "xcms_experiment_feature_peak_index.txt",
+        )
+
+        self.assertEqual(obs.columns.tolist(), ["feature_index", "peak_index"])
+        self.assertEqual(obs["peak_index"].tolist()[:3], [458, 1161, 44])
+        self.assertEqual(obs["peak_index"].dtype, np.int32)
+
+    def test_feature_peak_index_to_feature_peak_index(self):
+        transformer = self.get_transformer(
+            XCMSExperimentFeaturePeakIndexFormat, FeaturePeakIndex
+        )
+        obs = transformer(
+            XCMSExperimentFeaturePeakIndexFormat(
+                self.get_data_path(
+                    "XCMSExperiment/xcms_experiment_feature_peak_index.txt"
+                ),
+                "r",
+            )
+        )
+
+        # Indices are 0-based, the edge list is 1-based
+        self.assertIn(457, obs.peaks(0).tolist())
+        self.assertEqual(obs.feature_peaks.dtype, np.int64)
+        self.assertEqual(len(obs), len(obs.peak_features))
+
+    def test_read_xcms_table_columns(self):
+        fmt = MSBackendDataFormat(
+            self.get_data_path("XCMSExperiment/ms_backend_data.txt"), "r"
+        )
+
+        obs = read_xcms_table(fmt, columns=["scanIndex", "rtime"])
+
+        self.assertEqual(obs.columns.tolist(), ["scanIndex", "rtime"])
+        self.assertEqual(obs["scanIndex"].tolist(), [33, 34])
+
+    def test_read_xcms_table_missing_columns(self):
+        fmt = MSBackendDataFormat(
+            self.get_data_path("XCMSExperiment/ms_backend_data.txt"), "r"
+        )
+
+        with self.assertRaisesRegex(ValueError, "foo are not present"):
+            read_xcms_table(fmt, columns=["rtime", "foo"])
+
+    def test_read_xcms_table_chunks(self):
+        fmt = MSBackendDataFormat(
+            self.get_data_path("XCMSExperiment/ms_backend_data.txt"), "r"
+        )
+        exp = read_xcms_table(fmt)
+
+        with patch("q2_ms.types._tables.CHUNK_ROWS", 1):
+            obs = read_xcms_table(fmt)
+
+        pd.testing.assert_frame_equal(obs, exp)
+
+
+class TestXCMSExperimentColumnarTransformers(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def test_xcms_experiment_to_columnar(self):
+        transformer = self.get_transformer(
+            XCMSExperimentDirFmt, XCMSExperimentColumnarDirFmt
+        )
+        obs = transformer(
+            XCMSExperimentDirFmt(self.get_data_path("XCMSExperiment"), mode="r")
+        )
+
+        obs.validate()
+        peaks = load_columnar_table(
+            os.path.join(str(obs), "xcms_experiment_chrom_peaks"), mmap_mode=None
+        )
+        exp = read_xcms_table(
+            XCMSExperimentChromPeaksFormat(
+                self.get_data_path("XCMSExperiment/xcms_experiment_chrom_peaks.txt"),
+                mode="r",
+            ),
+            compact=False,
+        )
+        pd.testing.assert_frame_equal(peaks, exp)
+        self.assertTrue(os.path.exists(os.path.join(str(obs), "spectra_slots.txt")))
+
+    def test_columnar_to_xcms_experiment(self):
+        transformer = self.get_transformer(
+            XCMSExperimentColumnarDirFmt, XCMSExperimentDirFmt
+        )
+        obs = transformer(
+            XCMSExperimentColumnarDirFmt(
+                self.get_data_path("XCMSExperimentColumnar"), mode="r"
+            )
+        )
+
+        obs.validate()
+        exp = self.get_data_path("XCMSExperiment")
+        for name in os.listdir(exp):
+            self.assertTrue(
+                filecmp.cmp(
+                    os.path.join(exp, name),
+                    os.path.join(str(obs), name),
+                    shallow=False,
+                ),
+                name,
+            )
+
+    def test_load_columnar_table_columns(self):
+        obs = load_columnar_table(
+            self.get_data_path("XCMSExperimentColumnar/ms_backend_data"),
+            columns=["rtime", "dataOrigin", "msLevel", "spectrumId"],
+        )
+
+        self.assertEqual(
+            obs.columns.tolist(), ["rtime", "dataOrigin", "msLevel", "spectrumId"]
+        )
+        self.assertEqual(obs.index.tolist(), [1, 2])
+        self.assertEqual(obs["rtime"].tolist(), [2551.457, 2553.022])
+        # Numeric columns are views of the memory-mapped files
+        base = obs["rtime"].to_numpy()
+        while base.base is not None and not isinstance(base, np.memmap):
+            base = base.base
+        self.assertIsInstance(base, np.memmap)
+        self.assertIsInstance(obs["dataOrigin"].dtype, pd.CategoricalDtype)
+        self.assertEqual(obs["msLevel"].dtype, "Int8")
+        self.assertEqual(obs["spectrumId"].tolist(), ["scan=33", "scan=34"])
+
+    def test_load_columnar_table_missing_columns(self):
+        with self.assertRaisesRegex(ValueError, "foo are not present"):
+            load_columnar_table(
+                self.get_data_path("XCMSExperimentColumnar/ms_backend_data"),
+                columns=["foo"],
+            )
+
+
+class TestMatchedSpectraTransformers(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def test_matched_spectra_to_binary(self):
+        transformer = self.get_transformer(
+            MatchedSpectraDirFmt, MatchedSpectraBinaryDirFmt
+        )
+        obs = transformer(
+            MatchedSpectraDirFmt(self.get_data_path("MatchedSpectraText"), mode="r")
+        )
+
+        obs.validate()
+        query, target, score, target_ids = open_matches(str(obs))
+        np.testing.assert_array_equal(query, [1, 1, 2, 2, 3, 3, 3])
+        np.testing.assert_array_equal(target, [0, 1, 2, 0, 1, 2, 0])
+        np.testing.assert_allclose(
+            score, [0.982345, 0.75, 0.913, 0.700001, 1, 0.812, 0.5], rtol=1e-6
+        )
+        np.testing.assert_array_equal(
+            np.char.decode(target_ids, "utf-8"),
+            ["MSBNK-RIKEN-PR100001", "MSBNK-RIKEN-PR100002", "MSBNK-Eawag-EA000101"],
+        )
+
+    @patch("q2_ms.types._matched.CHUNK_ROWS", 3)
+    def test_matched_spectra_to_binary_chunks(self):
+        transformer = self.get_transformer(
+            MatchedSpectraDirFmt, MatchedSpectraBinaryDirFmt
+        )
+        obs = transformer(
+            MatchedSpectraDirFmt(self.get_data_path("MatchedSpectraText"), mode="r")
+        )
+
+        _, target, _, target_ids = open_matches(str(obs))
+        np.testing.assert_array_equal(target, [0, 1, 2, 0, 1, 2, 0])
+        self.assertEqual(len(target_ids), 3)
+
+    def test_binary_to_matched_spectra(self):
+        transformer = self.get_transformer(
+            MatchedSpectraBinaryDirFmt, MatchedSpectraDirFmt
+        )
+        obs = transformer(
+            MatchedSpectraBinaryDirFmt(
+                self.get_data_path("MatchedSpectraBinary"), mode="r"
+            )
+        )
+
+        obs.validate()
+        self.assertTrue(
+            filecmp.cmp(
+                self.get_data_path("MatchedSpectraText/matched_spectra.txt"),
+                os.path.join(str(obs), "matched_spectra.txt"),
+                shallow=False,
+            )
+        )
+
+
+class TestChromatogramsTransformers(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def test_chromatograms_format_to_dataframe_and_back(self):
+        path = self.get_data_path("Chromatograms/chromatograms.tsv")
+        transformer = self.get_transformer(ChromatogramsFormat, pd.DataFrame)
+        obs = transformer(ChromatogramsFormat(path, mode="r"))
+
+        self.assertEqual(obs.shape, (3, 6))
+        self.assertEqual(obs["spectrum_index"].dtype, np.int64)
+        self.assertTrue(np.isnan(obs["retention_time"][1]))
+
+        transformer = self.get_transformer(pd.DataFrame, ChromatogramsFormat)
+        self.assertTrue(filecmp.cmp(str(transformer(obs)), path, shallow=False))
+
+    def test_ion_chromatograms_format_to_dataframe_and_back(self):
+        path = self.get_data_path("IonChromatograms/ion_chromatograms.tsv")
+        transformer = self.get_transformer(IonChromatogramsFormat, pd.DataFrame)
+        obs = transformer(IonChromatogramsFormat(path, mode="r"))
+
+        self.assertEqual(obs.shape, (3, 5))
+        self.assertEqual(obs["target_id"].tolist(), ["std1", "std1", "std2"])
+
+        transformer = self.get_transformer(pd.DataFrame, IonChromatogramsFormat)
+        self.assertTrue(filecmp.cmp(str(transformer(obs)), path, shallow=False))
+
+    def test_mzml_dir_fmt_to_ms1_peak_index_dir_fmt(self):
+        transformer = self.get_transformer(mzMLDirFmt, MS1PeakIndexDirFmt)
+        obs = transformer(mzMLDirFmt(self.get_data_path("mzML_valid"), mode="r"))
+
+        obs.validate()
+        index = open_ms1_index(str(obs))["tiny"]
+        self.assertEqual(len(index), 3)
+        self.assertEqual(len(index.mz), 30)
@@ -0,0 +1,107 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+from unittest.mock import patch
+
+from qiime2.core.exceptions import ValidationError
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types._format import MSPFormat, mzMLDirFmt
+from q2_ms.types._validation import ValidationCache, fingerprint
+
+
+class TestValidationCache(TestPluginBase):
+    package = "q2_ms.types.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+        env = patch.dict(
+            os.environ,
+            {"Q2_MS_CACHE_DIR": self.cache_dir, "Q2_MS_VALIDATION_CACHE": "1"},
+        )
+        env.start()
+        self.addCleanup(env.stop)
+
+        self.msp = os.path.join(self.temp_dir.name, "valid.msp")
+        shutil.copy(self.get_data_path("MSP_valid/valid.msp"), self.msp)
+
+    def validate_msp(self, path, level="max"):
+        with patch.object(
+            MSPFormat, "_validate", autospec=True, side_effect=MSPFormat._validate
+        ) as validate:
+            MSPFormat(path, mode="r").validate(level=level)
+        return validate.call_count
+
+    def test_unchanged_file_is_not_validated_again(self):
+        self.assertEqual(self.validate_msp(self.msp), 1)
+        self.assertEqual(self.validate_msp(self.msp), 0)
+        # Each level is cached separately
+        self.assertEqual(self.validate_msp(self.msp, level="min"), 1)
+
+    def test_changed_file_is_validated_again(self):
+        self.validate_msp(self.msp)
+        with open(self.msp, "a") as file:
+            file.write("\n")
+
+        self.assertEqual(self.validate_msp(self.msp), 1)
+
+    def test_failed_validation_is_not_cached(self):
+        path = self.get_data_path("MSP_invalid/invalid.msp")
+        for _ in range(2):
+            with self.assertRaises(ValidationError):
+                self.validate_msp(path)
+
+    def test_cache_disabled(self):
+        with patch.dict(os.environ, {"Q2_MS_VALIDATION_CACHE": ""}):
+            self.assertEqual(self.validate_msp(self.msp), 1)
+            self.assertEqual(self.validate_msp(self.msp), 1)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_mzml_dir_fmt_skips_cached_files(self):
+        # A second directory with one more sample only validates the new sample
+        path = os.path.join(self.temp_dir.name, "mzML")
+        shutil.copytree(self.get_data_path("mzML_valid"), path)
+        with patch(
+            "q2_ms.types._format._validate_mzml_files",
+            side_effect=lambda paths: [None] * len(paths),
+        ) as validate:
+            mzMLDirFmt(path, mode="r").validate()
+            shutil.copy2(
+                self.get_data_path("mzML_unindexed/tiny.mzML"),
+                os.path.join(path, "other.mzML"),
+            )
+            mzMLDirFmt(path, mode="r").validate()
+
+        self.assertEqual(
+            [
+                [os.path.basename(p) for p in call.args[0]]
+                for call in validate.call_args_list
+            ],
+            [["tiny.mzML"], ["other.mzML"]],
+        )
+
+    def test_evict(self):
+        cache = ValidationCache(self.cache_dir, max_entries=3)
+        for key in ("a", "b", "c"):
+            cache.add(key)
+            os.utime(os.path.join(cache.path, key), ns=(0, ord(key) * 10**9))
+        cache.hit("a")
+        cache.add("d")
+
+        self.assertEqual(sorted(os.listdir(cache.path)), ["a", "c", "d"])
+
+    def test_fingerprint_directory(self):
+        path = os.path.join(self.temp_dir.name, "MSP")
+        shutil.copytree(self.get_data_path("MSP_valid"), path)
+        before = fingerprint(path)
+        self.assertEqual(fingerprint(path), before)
+
+        os.rename(os.path.join(path, "valid.msp"), os.path.join(path, "other.msp"))
+        self.assertNotEqual(fingerprint(path), before)
@@ -0,0 +1,140 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import json
+import os
+import tempfile
+
+from q2_ms._cache import default_cache_dir
+
+CACHE_SIZE_ENV = "Q2_MS_CACHE_SIZE"
+DEFAULT_CACHE_SIZE = 2 * 1024**3
+
+
+def default_cache_size():
+    """Returns the maximum cache size in bytes from Q2_MS_CACHE_SIZE."""
+    size = os.environ.get(CACHE_SIZE_ENV, "")
+    return int(size) if size.isdigit() else DEFAULT_CACHE_SIZE
+
+
+class ReleaseCache:
+    """
+    Content-addressed cache of downloaded library files.
+
+    Files are stored under their SHA-256 digest in `blobs/`. `refs.json` maps
+    release tags to digests and remembers the tag and ETag of the latest release
+    seen, so that unchanged releases can be detected with conditional requests.
+    The least recently used files are evicted once the cache exceeds `max_size`
+    bytes.
+    """
+
+    def __init__(self, name, path=None, max_size=None):
+        self.path = os.path.join(path or default_cache_dir(), name)
+        self.max_size = default_cache_size() if max_size is None else max_size
+        self.blob_dir = os.path.join(self.path, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    @property
+    def _refs_path(self):
+        return os.path.join(self.path, "refs.json")
+
+    def _read_refs(self):
+        try:
+            with open(self._refs_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {"latest": None, "tags": {}}
+
+    def _write_refs(self, refs):
+        # Written atomically since several runs may share the cache
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            json.dump(refs, file, indent=2)
+        os.replace(tmp, self._refs_path)
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blob_dir, sha256)
+
+    def latest(self):
+        """Returns the reference of the latest release seen or None."""
+        return self._read_refs()["latest"]
+
+    def get(self, sha256):
+        """Returns the path of a cached file, marking it as recently used."""
+        if sha256 is None or not os.path.exists(self.blob_path(sha256)):
+            return None
+        os.utime(self.blob_path(sha256))
+        return self.blob_path(sha256)
+
+    def newest(self):
+        """Returns the path of the most recently used cached file or None."""
+        blobs = [entry for entry in os.scandir(self.blob_dir) if entry.is_file()]
+        if not blobs:
+            return None
+        return self.get(max(blobs, key=lambda entry: entry.stat().st_mtime).name)
+
+    def lookup(self, tag):
+        """Returns the digest of the cached file of a release tag or None."""
+        sha256 = self._read_refs()["tags"].get(tag)
+        if sha256 is None or not os.path.exists(self.blob_path(sha256)):
+            return None
+        return sha256
+
+    def tag(self, sha256):
+        """Returns the release tag of a cached file or None if it has none."""
+        tags = self._read_refs()["tags"]
+        return next((tag for tag, digest in tags.items() if digest == sha256), None)
+
+    def temp_path(self):
+        """Returns a path in the cache to download a new file to."""
+        fd, path = tempfile.mkstemp(dir=self.path, suffix=".part")
+        os.close(fd)
+        return path
+
+    def add(self, temp_path, sha256, tag=None, etag=None):
+        """Moves a downloaded file into the cache and returns its new path."""
+        os.replace(temp_path, self.blob_path(sha256))
+        self.set_latest(sha256, tag=tag, etag=etag)
+        self.evict(keep=sha256)
+        return self.blob_path(sha256)
+
+    def set_latest(self, sha256, tag=None, etag=None):
+        refs = self._read_refs()
+        refs["latest"] = {"sha256": sha256, "tag": tag, "etag": etag}
+        if tag is not None:
+            refs["tags"][tag] = sha256
+        self._write_refs(refs)
+
+    def evict(self, keep=None):
+        """Deletes least recently used files until the cache fits `max_size`."""
+        blobs = [
+            (entry.stat().st_mtime, entry.stat().st_size, entry.name)
+            for entry in os.scandir(self.blob_dir)
+            if entry.is_file()
+        ]
+        total = sum(size for _, size, _ in blobs)
+
+        evicted = set()
+        for _, size, sha256 in sorted(blobs):
+            if total <= self.max_size:
+                break
+            if sha256 == keep:
+                continue
+            os.remove(self.blob_path(sha256))
+            evicted.add(sha256)
+            total -= size
+
+        if evicted:
+            refs = self._read_refs()
+            refs["tags"] = {
+                tag: sha256
+                for tag, sha256 in refs["tags"].items()
+                if sha256 not in evicted
+            }
+            if refs["latest"] and refs["latest"]["sha256"] in evicted:
+                refs["latest"] = None
+            self._write_refs(refs)
@@ -0,0 +1,23 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+from q2_ms.types import XCMSExperimentColumnarDirFmt, XCMSExperimentDirFmt
+from q2_ms.types._experiment import write_columnar_experiment
+
+
+def convert_xcms_experiment(
+    xcms_experiment: XCMSExperimentDirFmt,
+) -> XCMSExperimentColumnarDirFmt:
+    """
+    Stores the MS backend data and the chromatographic peak tables of an
+    XCMSExperiment as memory-mapped columns (see q2_ms.types._columnar), so
+    that actions taking the converted experiment read only the columns they
+    need without parsing the text tables.
+    """
+    columnar = XCMSExperimentColumnarDirFmt()
+    write_columnar_experiment(str(xcms_experiment), str(columnar))
+    return columnar
@@ -5,29 +5,339 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+import hashlib
 import os
+import shutil
+import time
+import warnings
+from typing import NamedTuple
 
+import pandas as pd
+import qiime2
 import requests
 
+from q2_ms._metrics import count, measure
 from q2_ms.types import MSPDirFmt
+from q2_ms.types._msp import iter_msp
+from q2_ms.xcms._cache import ReleaseCache
 
+MASSBANK_RELEASE_URL = (
+    "https://api.github.com/repos/MassBank/MassBank-data/releases/latest"
+)
+MASSBANK_DOWNLOAD_URL = (
+    "https://github.com/MassBank/MassBank-data/releases/latest/download"
+    "/MassBank_NIST.msp"
+)
+MASSBANK_FILE = "MassBank_NIST.msp"
 
-def fetch_massbank() -> MSPDirFmt:
+CHUNK_SIZE = 1024 * 1024
+TIMEOUT = 60
+RETRIES = 5
+BACKOFF = 1.0
+
+
+class _IncompleteDownload(Exception):
+    pass
+
+
+class _Release(NamedTuple):
+    url: str
+    sha256: str = None
+    tag: str = None
+    etag: str = None
+
+
+def _get_release(etag=None):
+    """
+    Returns the download URL, SHA-256 digest, tag and ETag of the MSP file of the
+    latest MassBank release. If `etag` is given, the release metadata is requested
+    conditionally and None is returned if the latest release is still the one
+    with this ETag. The generic latest download URL is returned if the release
+    metadata cannot be retrieved.
+    """
+    headers = {"Accept": "application/vnd.github+json"}
+    if etag:
+        headers["If-None-Match"] = etag
+
+    try:
+        response = requests.get(MASSBANK_RELEASE_URL, headers=headers, timeout=TIMEOUT)
+        if response.status_code == 304:
+            return None
+        if response.status_code == 200:
+            release = response.json()
+            for asset in release.get("assets", []):
+                if asset.get("name") == MASSBANK_FILE:
+                    digest = asset.get("digest") or ""
+                    return _Release(
+                        url=asset["browser_download_url"],
+                        sha256=digest[7:] if digest.startswith("sha256:") else None,
+                        tag=release.get("tag_name"),
+                        etag=response.headers.get("ETag"),
+                    )
+    except (requests.RequestException, ValueError, KeyError):
+        pass
+
+    return _Release(url=MASSBANK_DOWNLOAD_URL)
+
+
+def _download(
+    url,
+    path,
+    sha256=None,
+    chunk_size=CHUNK_SIZE,
+    timeout=TIMEOUT,
+    retries=RETRIES,
+    backoff=BACKOFF,
+):
+    """
+    Streams `url` to `path` in chunks of `chunk_size` bytes, so memory use does
+    not depend on the file size. Interrupted transfers are resumed with HTTP
+    range requests and retried up to `retries` times with exponential backoff.
+    The size is checked against the announced length and, if `sha256` is given,
+    the content against the checksum. Returns the SHA-256 digest of the file.
+    """
+    digest = hashlib.sha256()
+    written, total, attempt = 0, None, 0
+
+    with open(path, "wb") as file:
+        while True:
+            headers = {"Accept-Encoding": "identity"}
+            if written:
+                headers["Range"] = f"bytes={written}-"
+
+            try:
+                with requests.get(
+                    url, headers=headers, stream=True, timeout=timeout
+                ) as response:
+                    if response.status_code == 200 and written:
+                        # The server ignored the range request, start over
+                        file.seek(0)
+                        file.truncate()
+                        digest, written = hashlib.sha256(), 0
+                    elif response.status_code not in (200, 206):
+                        raise requests.HTTPError(
+                            f"Failed to download file. Code: {response.status_code}",
+                            response=response,
+                        )
+
+                    if total is None:
+                        total = _total_size(response)
+
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        file.write(chunk)
+                        digest.update(chunk)
+                        written += len(chunk)
+                        count(bytes_downloaded=len(chunk))
+
+                if total is not None and written < total:
+                    raise _IncompleteDownload(
+                        f"Connection closed after {written} of {total} bytes."
+                    )
+                break
+
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+                requests.HTTPError,
+                _IncompleteDownload,
+            ) as e:
+                response = getattr(e, "response", None)
+                status = getattr(response, "status_code", None)
+                if (status is not None and status < 500) or attempt >= retries:
+                    raise ValueError(str(e)) from e
+
+                attempt += 1
+                time.sleep(backoff * 2 ** (attempt - 1))
+
+    if total is not None and written != total:
+        raise ValueError(f"Downloaded {written} bytes but expected {total}.")
+    if sha256 is not None and digest.hexdigest() != sha256.lower():
+        raise ValueError(
+            f"Checksum mismatch for {url}. Expected SHA-256 {sha256}, got "
+            f"{digest.hexdigest()}."
+        )
+    return digest.hexdigest()
+
+
+def _total_size(response):
+    """Returns the full size of the requested file or None if it is unknown."""
+    content_range = response.headers.get("Content-Range", "")
+    if response.status_code == 206 and "/" in content_range:
+        size = content_range.rsplit("/", 1)[1]
+        return int(size) if size.isdigit() else None
+
+    length = response.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+def _cached_release(cache, offline=False):
+    """
+    Returns the path of the MSP file of the latest MassBank release in `cache`,
+    downloading it only if the release changed since the last call. With
+    `offline`, the most recently fetched release is returned without any request.
+    If the release metadata cannot be retrieved, the cached release is returned
+    with a warning, as it may be outdated.
+    """
+    latest = cache.latest()
+    if offline:
+        path = cache.get(latest["sha256"]) if latest else None
+        if path is None:
+            raise ValueError(
+                "No MassBank release is available in the cache at "
+                f"{cache.path}. Fetch it once without offline mode first."
+            )
+        return path
+
+    release = _get_release(etag=latest["etag"] if latest else None)
+    if release is None:
+        path = cache.get(latest["sha256"])
+        if path is not None:
+            return path
+        release = _get_release()
+
+    if release.tag is None:
+        # The release metadata could not be retrieved, so it is unknown whether
+        # the cached release is still the latest one
+        path = (cache.get(latest["sha256"]) if latest else None) or cache.newest()
+        if path is not None:
+            tag = cache.tag(os.path.basename(path))
+            warnings.warn(
+                "The latest MassBank release could not be retrieved. Using the "
+                f"cached release {tag or 'of unknown version'} instead, which may "
+                "be outdated. Use offline mode to skip the check.",
+                stacklevel=2,
+            )
+            return path
+
+    sha256 = cache.lookup(release.tag) if release.tag else None
+    if sha256 is not None:
+        cache.set_latest(sha256, tag=release.tag, etag=release.etag)
+        return cache.get(sha256)
+
+    temp_path = cache.temp_path()
+    try:
+        sha256 = _download(release.url, temp_path, sha256=release.sha256)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return cache.add(temp_path, sha256, tag=release.tag, etag=release.etag)
+
+
+def fetch_massbank(offline: bool = False) -> MSPDirFmt:
     """
     Downloads the MassBank_NIST.msp file from the latest release of the MassBank-data
     GitHub repository.
+
+    Releases are kept in a local cache (Q2_MS_CACHE_DIR, limited to
+    Q2_MS_CACHE_SIZE bytes) and only downloaded again if the latest release
+    changed. If the release metadata cannot be retrieved, the most recently
+    fetched release is used. With `offline`, the cached copy of the most
+    recently fetched release is used without network access.
     """
     massbank = MSPDirFmt()
 
-    response = requests.get(
-        "https://github.com/MassBank/MassBank-data/releases/latest/download"
-        "/MassBank_NIST.msp"
-    )
+    with measure("fetch_massbank", offline=offline):
+        path = _cached_release(ReleaseCache("massbank"), offline=offline)
+        # Copied rather than linked, since marking a cached file as recently
+        # used would change the modification time of the artifact's file
+        shutil.copyfile(path, os.path.join(str(massbank), MASSBANK_FILE))
+
+    return massbank
+
+
+def _digest(data):
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def _record_digests(path):
+    """
+    Returns the name, Splash and digests of the peaks and of the metadata of
+    each record of an MSP file by its DB# accession. Records without accession
+    are skipped, of duplicate accessions the last record is kept.
+    """
+    records = {}
+    for record in iter_msp(path):
+        accession = record.get("DB#")
+        if not accession:
+            count(records_without_accession=1)
+            continue
+
+        records[accession] = (
+            record.get("Name", ""),
+            record.get("Splash", ""),
+            _digest(repr((record.mz, record.intensity))),
+            _digest(repr(record.metadata)),
+        )
+    return records
 
-    if response.status_code == 200:
-        with open(os.path.join(str(massbank), "MassBank_NIST.msp"), "wb") as file:
-            file.write(response.content)
+
+def _change(old, new):
+    if old is None:
+        return "added"
+    if new is None:
+        return "removed"
+
+    _, old_splash, old_peaks, old_metadata = old
+    _, new_splash, new_peaks, new_metadata = new
+    if old_splash and new_splash:
+        peaks_changed = old_splash != new_splash
     else:
-        raise ValueError(f"Failed to download file. Code: {response.status_code}")
+        # The Splash identifies the peaks, without it their digests are compared
+        peaks_changed = old_peaks != new_peaks
 
-    return massbank
+    if peaks_changed:
+        return "spectrum"
+    if old_metadata != new_metadata:
+        return "metadata"
+    return "unchanged"
+
+
+def diff_libraries(old_path, new_path):
+    """
+    Compares two MSP libraries record by record, matched by DB# accession.
+    Returns one row per accession of either library with its name, the Splash
+    of both versions and the change: "added", "removed", "spectrum" if the
+    peaks changed, "metadata" if only other fields changed, or "unchanged".
+    """
+    old, new = _record_digests(old_path), _record_digests(new_path)
+
+    rows = []
+    for accession in sorted(old.keys() | new.keys()):
+        old_record, new_record = old.get(accession), new.get(accession)
+        change = _change(old_record, new_record)
+        count(**{change: 1})
+        rows.append(
+            (
+                accession,
+                change,
+                (new_record or old_record)[0],
+                old_record[1] if old_record else "",
+                new_record[1] if new_record else "",
+            )
+        )
+
+    return pd.DataFrame(
+        rows, columns=["id", "change", "name", "old_splash", "new_splash"]
+    ).set_index("id")
+
+
+def update_massbank(
+    library: MSPDirFmt, offline: bool = False
+) -> (MSPDirFmt, qiime2.Metadata):
+    """
+    Fetches the latest MassBank release like fetch_massbank and compares it
+    with an existing library by DB# accession and Splash, so that results
+    derived from the library can be refreshed for the changed records only.
+    """
+    massbank = fetch_massbank(offline=offline)
+
+    with measure("update_massbank"):
+        changes = diff_libraries(
+            str(next(library.path.glob("*.msp"))),
+            os.path.join(str(massbank), MASSBANK_FILE),
+        )
+
+    if changes.empty:
+        raise ValueError("Neither library has records with a DB# accession.")
+    return massbank, qiime2.Metadata(changes)
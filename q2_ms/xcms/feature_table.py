@@ -0,0 +1,113 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+import biom
+import numpy as np
+from scipy import sparse
+
+from q2_ms.types import XCMSExperimentView
+from q2_ms.types._experiment import EXPERIMENT_TABLES
+
+
+def feature_matrix(
+    features, samples, values, intensities, n_features, n_samples, method="maxint"
+):
+    """
+    Aggregates peak values into a sparse features x samples CSR matrix.
+
+    `features`, `samples`, `values` and `intensities` hold one entry per
+    feature-peak assignment. With "maxint", each cell holds the value of the peak
+    with the highest intensity of the feature in the sample, with "sum" the sum
+    of the values of all its peaks. Missing values are ignored.
+    """
+    keep = ~np.isnan(values)
+    keys = features[keep] * n_samples + samples[keep]
+    values, intensities = values[keep], intensities[keep]
+    if len(keys) == 0:
+        return sparse.csr_matrix((n_features, n_samples))
+
+    # Group the peaks of each feature-sample cell, in row-major order of the cells
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.diff(keys, prepend=-1))
+
+    if method == "maxint":
+        intensities = np.nan_to_num(intensities[order], nan=-np.inf)
+        counts = np.diff(np.append(starts, len(keys)))
+        top = np.flatnonzero(
+            intensities == np.repeat(np.maximum.reduceat(intensities, starts), counts)
+        )
+        # Ties are resolved in favour of the first peak
+        group = np.repeat(np.arange(len(starts)), counts)[top]
+        cell_values = values[order[top[np.flatnonzero(np.diff(group, prepend=-1))]]]
+    else:
+        cell_values = np.add.reduceat(values[order], starts)
+
+    cells = keys[starts]
+    indptr = np.zeros(n_features + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cells // n_samples, minlength=n_features), out=indptr[1:])
+    matrix = sparse.csr_matrix(
+        (cell_values, cells % n_samples, indptr), shape=(n_features, n_samples)
+    )
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def _sample_ids(experiment):
+    origins = experiment.table("sample_data", columns=["spectraOrigin"])[
+        "spectraOrigin"
+    ]
+    return [os.path.splitext(os.path.basename(str(path)))[0] for path in origins]
+
+
+def build_feature_table(
+    xcms_experiment: XCMSExperimentView,
+    value: str = "into",
+    method: str = "maxint",
+) -> biom.Table:
+    """
+    Builds a feature table from the grouped chromatographic peaks of an
+    XCMSExperiment. Each cell holds the `value` ("into" or "maxo") of the peak
+    with the highest maximum intensity of the feature in the sample, or with
+    `method="sum"` the sum over all its peaks. Samples are named after their
+    raw data files. The feature peak index arrays stored by
+    index_xcms_experiment are used if present, as are the columns of an
+    experiment in the columnar layout.
+    """
+    # Reopened to read text tables with full precision
+    experiment = XCMSExperimentView(xcms_experiment.path, compact=False)
+    for name in ("features", "feature_peak_index", "chrom_peaks"):
+        if not experiment.has_table(name):
+            raise ValueError(
+                "The XCMSExperiment does not contain grouped features. Detect and "
+                f"group chromatographic peaks first ({EXPERIMENT_TABLES[name][0]} "
+                "is missing)."
+            )
+
+    # Only the feature names and the peak columns used are read
+    feature_ids = experiment.table("features", columns=[]).index
+    index = experiment.feature_peaks
+    peaks = experiment.table(
+        "chrom_peaks", columns=list(dict.fromkeys(["sample", "maxo", value]))
+    )
+    sample_ids = _sample_ids(experiment)
+
+    # Sample indices are 1-based in R
+    features, peak_rows = index.edges()
+    matrix = feature_matrix(
+        features=features,
+        samples=peaks["sample"].to_numpy(dtype=np.int64)[peak_rows] - 1,
+        values=peaks[value].to_numpy(dtype=np.float64)[peak_rows],
+        intensities=peaks["maxo"].to_numpy(dtype=np.float64)[peak_rows],
+        n_features=len(feature_ids),
+        n_samples=len(sample_ids),
+        method=method,
+    )
+
+    return biom.Table(matrix, observation_ids=feature_ids, sample_ids=sample_ids)
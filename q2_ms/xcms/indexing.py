@@ -0,0 +1,50 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+
+from q2_ms.types import XCMSExperimentDirFmt
+from q2_ms.types._feature_peaks import (
+    FEATURE_PEAK_INDEX,
+    feature_peak_index_paths,
+    write_feature_peak_index,
+)
+
+
+def index_xcms_experiment(
+    xcms_experiment: XCMSExperimentDirFmt,
+) -> XCMSExperimentDirFmt:
+    """
+    Stores the feature peak assignments of an XCMSExperiment as CSR arrays
+    next to its edge list (see q2_ms.types._feature_peaks), so that the peaks
+    of a feature and the features of a peak are sliced without scanning the
+    edge list. The files of the experiment are hard-linked into the result if
+    possible.
+    """
+    if not os.path.exists(
+        os.path.join(str(xcms_experiment), f"{FEATURE_PEAK_INDEX}.txt")
+    ):
+        raise ValueError(
+            "The XCMSExperiment does not contain grouped features. Detect and "
+            f"group chromatographic peaks first ({FEATURE_PEAK_INDEX}.txt is "
+            "missing)."
+        )
+
+    indexed = XCMSExperimentDirFmt()
+    stale = set(feature_peak_index_paths(str(xcms_experiment)).values())
+    for path in xcms_experiment.path.iterdir():
+        if not path.is_file() or str(path) in stale:
+            continue
+        try:
+            # The files are not modified, so they can be shared
+            os.link(path, indexed.path / path.name)
+        except OSError:
+            shutil.copyfile(path, indexed.path / path.name)
+
+    write_feature_peak_index(str(indexed))
+    return indexed
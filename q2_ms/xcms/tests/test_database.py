@@ -5,46 +5,467 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+import hashlib
+import json
 import os
+import threading
+import tracemalloc
 import unittest
-from unittest.mock import Mock, patch
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
 
+import pandas as pd
 from qiime2.plugin.testing import TestPluginBase
 
 from q2_ms.types import MSPDirFmt
-from q2_ms.xcms.database import fetch_massbank
+from q2_ms.xcms._cache import ReleaseCache
+from q2_ms.xcms.database import (
+    _download,
+    diff_libraries,
+    fetch_massbank,
+    update_massbank,
+)
 
+CONTENT = b"Name: Spectrum 1\nPrecursorMZ: 100.1\nNum Peaks: 1\n50.5 999\n" * 500
 
-class TestFetchMassbank(TestPluginBase):
+
+def _msp(*records):
+    return "\n".join(
+        f"Name: {name}\nDB#: {accession}\n"
+        + (f"Splash: {splash}\n" if splash else "")
+        + f"Comment: {comment}\nNum Peaks: 1\n{peak} 999\n"
+        for accession, name, splash, comment, peak in records
+    ).encode()
+
+
+OLD_LIBRARY = _msp(
+    ("MSBNK-1", "Alanine", "splash10-a", "old", 50.5),
+    ("MSBNK-2", "Glycine", "splash10-b", "old", 60.5),
+    ("MSBNK-3", "Serine", "splash10-c", "old", 70.5),
+    ("MSBNK-4", "Valine", "splash10-d", "old", 80.5),
+    ("MSBNK-6", "Proline", None, "old", 90.5),
+)
+NEW_LIBRARY = _msp(
+    ("MSBNK-1", "Alanine", "splash10-a", "old", 50.5),
+    ("MSBNK-2", "Glycine", "splash10-x", "old", 61.5),
+    ("MSBNK-3", "Serine", "splash10-c", "new", 70.5),
+    ("MSBNK-5", "Leucine", "splash10-e", "new", 85.5),
+    ("MSBNK-6", "Proline", None, "old", 91.5),
+)
+
+
+class _MassBankHandler(BaseHTTPRequestHandler):
+    """Serves a release JSON and the MSP file with range request support."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.headers.get("Range")))
+
+        if self.path == "/release":
+            etag = f'"{server.tag}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+
+            body = json.dumps(
+                {
+                    "tag_name": server.tag,
+                    "assets": [
+                        {
+                            "name": "MassBank_NIST.msp",
+                            "browser_download_url": f"{server.url}/MassBank_NIST.msp",
+                            "digest": f"sha256:{server.sha256}",
+                        }
+                    ],
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if server.errors:
+            self.send_response(server.errors.pop(0))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start = 0
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"][len("bytes=") : -1])
+        body = server.content[start:]
+
+        self.send_response(206 if start else 200)
+        if start:
+            self.send_header(
+                "Content-Range",
+                f"bytes {start}-{len(server.content) - 1}/{len(server.content)}",
+            )
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if server.drop_after is not None:
+            # Simulate an interrupted transfer
+            self.wfile.write(body[: server.drop_after])
+            server.drop_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class _MassBankServerTestCase(TestPluginBase):
     package = "q2_ms.xcms.tests"
 
-    @patch("q2_ms.xcms.database.requests.get")
-    def test_fetch_massbank(self, mock_get):
-        # Mock the response object
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.content = b""
-        mock_get.return_value = mock_response
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _MassBankHandler)
+        self.server.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.server.tag = "2024.11"
+        self.server.content = CONTENT
+        self.server.sha256 = hashlib.sha256(CONTENT).hexdigest()
+        self.server.drop_after = None
+        self.server.errors = []
+        self.server.requests = []
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        ).start()
+
+        self.release_url = patch(
+            "q2_ms.xcms.database.MASSBANK_RELEASE_URL", f"{self.server.url}/release"
+        )
+        self.release_url.start()
+        self.sleep = patch("q2_ms.xcms.database.time.sleep")
+        self.sleep.start()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+        self.env = patch.dict(os.environ, {"Q2_MS_CACHE_DIR": self.cache_dir})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.sleep.stop()
+        self.release_url.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def read_result(self, result):
+        with open(os.path.join(str(result), "MassBank_NIST.msp"), "rb") as file:
+            return file.read()
 
-        # Call the function
+
+class TestFetchMassbank(_MassBankServerTestCase):
+    def test_fetch_massbank(self):
         result = fetch_massbank()
 
-        # Check if the file exists
-        file_path = os.path.join(str(result), "MassBank_NIST.msp")
-        self.assertTrue(os.path.exists(file_path))
         self.assertIsInstance(result, MSPDirFmt)
+        self.assertEqual(self.read_result(result), CONTENT)
+
+    def test_fetch_massbank_metrics(self):
+        path = os.path.join(self.temp_dir.name, "metrics.jsonl")
+        with patch.dict(os.environ, {"Q2_MS_METRICS": path}):
+            fetch_massbank()
+            fetch_massbank()
+        tracemalloc.stop()
+
+        with open(path) as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual([r["name"] for r in records], ["fetch_massbank"] * 2)
+        self.assertEqual(records[0]["counts"], {"bytes_downloaded": len(CONTENT)})
+        # The second call is served from the cache
+        self.assertEqual(records[1]["counts"], {})
+
+    def test_fetch_massbank_interrupted(self):
+        self.server.drop_after = 1000
 
-    @patch("q2_ms.xcms.database.requests.get")
-    def test_fetch_massbank_error(self, mock_get):
-        # Mock the response object
-        mock_response = Mock()
-        mock_response.status_code = 502
-        mock_response.content = b""
-        mock_get.return_value = mock_response
+        result = fetch_massbank()
+
+        self.assertEqual(self.read_result(result), CONTENT)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_download_resume(self):
+        self.server.drop_after = 1000
+        path = os.path.join(self.temp_dir.name, "MassBank_NIST.msp")
+
+        _download(f"{self.server.url}/MassBank_NIST.msp", path, chunk_size=100)
+
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), CONTENT)
+        self.assertEqual(
+            self.server.requests,
+            [("/MassBank_NIST.msp", None), ("/MassBank_NIST.msp", "bytes=1000-")],
+        )
+
+    def test_fetch_massbank_retry(self):
+        self.server.errors = [503, 502]
+
+        result = fetch_massbank()
+
+        self.assertEqual(self.read_result(result), CONTENT)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_fetch_massbank_error(self):
+        self.server.errors = [502] * 10
 
         with self.assertRaisesRegex(ValueError, "502"):
             fetch_massbank()
 
+    def test_fetch_massbank_client_error_not_retried(self):
+        self.server.errors = [404]
+
+        with self.assertRaisesRegex(ValueError, "404"):
+            fetch_massbank()
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_fetch_massbank_checksum_mismatch(self):
+        self.server.sha256 = "0" * 64
+
+        with self.assertRaisesRegex(ValueError, "Checksum mismatch"):
+            fetch_massbank()
+
+    def test_fetch_massbank_without_release_metadata(self):
+        with patch(
+            "q2_ms.xcms.database.MASSBANK_RELEASE_URL", f"{self.server.url}/missing"
+        ), patch(
+            "q2_ms.xcms.database.MASSBANK_DOWNLOAD_URL",
+            f"{self.server.url}/MassBank_NIST.msp",
+        ):
+            result = fetch_massbank()
+
+        self.assertEqual(self.read_result(result), CONTENT)
+
+    def test_fetch_massbank_without_release_metadata_cached(self):
+        fetch_massbank()
+        self.server.requests.clear()
+
+        with patch(
+            "q2_ms.xcms.database.MASSBANK_RELEASE_URL", f"{self.server.url}/missing"
+        ), self.assertWarnsRegex(UserWarning, "cached release 2024.11"):
+            result = fetch_massbank()
+
+        self.assertEqual(self.read_result(result), CONTENT)
+        self.assertEqual(self.server.requests, [("/missing", None)])
+
+    def test_fetch_massbank_without_release_metadata_untagged(self):
+        # Releases downloaded without metadata are cached without a tag
+        with patch(
+            "q2_ms.xcms.database.MASSBANK_RELEASE_URL", f"{self.server.url}/missing"
+        ), patch(
+            "q2_ms.xcms.database.MASSBANK_DOWNLOAD_URL",
+            f"{self.server.url}/MassBank_NIST.msp",
+        ):
+            fetch_massbank()
+            self.server.requests.clear()
+            with self.assertWarnsRegex(UserWarning, "of unknown version"):
+                result = fetch_massbank()
+
+        self.assertEqual(self.read_result(result), CONTENT)
+        self.assertEqual(self.server.requests, [("/missing", None)])
+
+    def test_fetch_massbank_copies_cached_file(self):
+        result = fetch_massbank()
+        cache = ReleaseCache("massbank")
+        target = os.path.join(str(result), "MassBank_NIST.msp")
+        os.utime(target, (0, 0))
+
+        # Marking the cached file as recently used leaves the artifact as is
+        path = cache.get(cache.latest()["sha256"])
+
+        self.assertFalse(os.path.samefile(target, path))
+        self.assertEqual(os.stat(target).st_mtime, 0)
+
+    def test_fetch_massbank_cached(self):
+        fetch_massbank()
+        self.server.requests.clear()
+
+        result = fetch_massbank()
+
+        self.assertEqual(self.read_result(result), CONTENT)
+        self.assertEqual(self.server.requests, [("/release", None)])
+
+    def test_fetch_massbank_new_release(self):
+        fetch_massbank()
+        self.server.tag = "2025.05"
+        self.server.content = CONTENT * 2
+        self.server.sha256 = hashlib.sha256(CONTENT * 2).hexdigest()
+        self.server.requests.clear()
+
+        result = fetch_massbank()
+
+        self.assertEqual(self.read_result(result), CONTENT * 2)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(
+            len(os.listdir(os.path.join(self.cache_dir, "massbank", "blobs"))), 2
+        )
+
+    def test_fetch_massbank_offline(self):
+        fetch_massbank()
+        self.server.requests.clear()
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            result = fetch_massbank(offline=True)
+
+        self.assertEqual(self.read_result(result), CONTENT)
+        self.assertEqual(self.server.requests, [])
+
+    def test_fetch_massbank_offline_empty_cache(self):
+        with self.assertRaisesRegex(ValueError, "No MassBank release"):
+            fetch_massbank(offline=True)
+        self.assertEqual(self.server.requests, [])
+
+    def test_fetch_massbank_failed_download_not_cached(self):
+        self.server.sha256 = "0" * 64
+
+        with self.assertRaisesRegex(ValueError, "Checksum mismatch"):
+            fetch_massbank()
+
+        cache = ReleaseCache("massbank")
+        self.assertEqual(os.listdir(cache.blob_dir), [])
+        self.assertIsNone(cache.latest())
+        self.assertEqual(
+            [name for name in os.listdir(cache.path) if name.endswith(".part")], []
+        )
+
+    def test_download_chunked(self):
+        path = os.path.join(self.temp_dir.name, "MassBank_NIST.msp")
+
+        _download(f"{self.server.url}/MassBank_NIST.msp", path, chunk_size=7)
+
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), CONTENT)
+
+
+class TestReleaseCache(TestPluginBase):
+    package = "q2_ms.xcms.tests"
+
+    def add(self, cache, content, tag):
+        path = cache.temp_path()
+        with open(path, "wb") as file:
+            file.write(content)
+        return cache.add(path, hashlib.sha256(content).hexdigest(), tag=tag)
+
+    def test_newest(self):
+        cache = ReleaseCache("massbank", path=self.temp_dir.name)
+        self.assertIsNone(cache.newest())
+
+        first = self.add(cache, b"a" * 100, "v1")
+        second = self.add(cache, b"b" * 100, None)
+        os.utime(second, (0, 0))
+
+        self.assertEqual(cache.newest(), first)
+        self.assertEqual(cache.tag(os.path.basename(first)), "v1")
+        self.assertIsNone(cache.tag(os.path.basename(second)))
+
+    def test_eviction(self):
+        cache = ReleaseCache("massbank", path=self.temp_dir.name, max_size=150)
+        first = self.add(cache, b"a" * 100, "v1")
+        os.utime(first, (0, 0))
+
+        second = self.add(cache, b"b" * 100, "v2")
+
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.exists(second))
+        self.assertIsNone(cache.lookup("v1"))
+        self.assertEqual(cache.lookup("v2"), hashlib.sha256(b"b" * 100).hexdigest())
+
+    def test_eviction_keeps_recently_used(self):
+        cache = ReleaseCache("massbank", path=self.temp_dir.name, max_size=250)
+        first = self.add(cache, b"a" * 100, "v1")
+        second = self.add(cache, b"b" * 100, "v2")
+        os.utime(first, (0, 0))
+        os.utime(second, (1, 1))
+        cache.get(cache.lookup("v1"))
+
+        self.add(cache, b"c" * 100, "v3")
+
+        self.assertTrue(os.path.exists(first))
+        self.assertFalse(os.path.exists(second))
+        self.assertEqual(cache.latest()["tag"], "v3")
+
+
+class TestUpdateMassbank(_MassBankServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server.content = NEW_LIBRARY
+        self.server.sha256 = hashlib.sha256(NEW_LIBRARY).hexdigest()
+
+        self.library = MSPDirFmt()
+        with open(os.path.join(str(self.library), "MassBank_NIST.msp"), "wb") as f:
+            f.write(OLD_LIBRARY)
+
+    def test_diff_libraries(self):
+        new_path = os.path.join(self.temp_dir.name, "new.msp")
+        with open(new_path, "wb") as file:
+            file.write(NEW_LIBRARY)
+
+        obs = diff_libraries(
+            os.path.join(str(self.library), "MassBank_NIST.msp"), new_path
+        )
+
+        exp = pd.DataFrame(
+            {
+                "change": [
+                    "unchanged",
+                    "spectrum",
+                    "metadata",
+                    "removed",
+                    "added",
+                    "spectrum",
+                ],
+                "name": [
+                    "Alanine",
+                    "Glycine",
+                    "Serine",
+                    "Valine",
+                    "Leucine",
+                    "Proline",
+                ],
+                "old_splash": [
+                    "splash10-a",
+                    "splash10-b",
+                    "splash10-c",
+                    "splash10-d",
+                    "",
+                    "",
+                ],
+                "new_splash": [
+                    "splash10-a",
+                    "splash10-x",
+                    "splash10-c",
+                    "",
+                    "splash10-e",
+                    "",
+                ],
+            },
+            index=pd.Index([f"MSBNK-{i}" for i in range(1, 7)], name="id"),
+        )
+        pd.testing.assert_frame_equal(obs, exp)
+
+    def test_update_massbank(self):
+        massbank, changes = update_massbank(self.library)
+
+        self.assertEqual(self.read_result(massbank), NEW_LIBRARY)
+        changes = changes.to_dataframe()
+        self.assertEqual(
+            changes["change"].value_counts().to_dict(),
+            {"spectrum": 2, "unchanged": 1, "metadata": 1, "removed": 1, "added": 1},
+        )
+
+    def test_update_massbank_same_release(self):
+        with open(os.path.join(str(self.library), "MassBank_NIST.msp"), "wb") as f:
+            f.write(NEW_LIBRARY)
+
+        _, changes = update_massbank(self.library)
+
+        self.assertEqual(set(changes.to_dataframe()["change"]), {"unchanged"})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,103 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+import unittest
+
+import numpy as np
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types import XCMSExperimentDirFmt, XCMSExperimentView
+from q2_ms.xcms.columnar import convert_xcms_experiment
+from q2_ms.xcms.feature_table import build_feature_table, feature_matrix
+
+
+class TestBuildFeatureTable(TestPluginBase):
+    package = "q2_ms.xcms.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.experiment = XCMSExperimentView(
+            self.get_data_path("XCMSExperiment_features")
+        )
+
+    def test_build_feature_table_maxint_into(self):
+        obs = build_feature_table(self.experiment)
+
+        self.assertEqual(
+            list(obs.ids(axis="observation")), ["FT1", "FT2", "FT3", "FT4"]
+        )
+        self.assertEqual(list(obs.ids()), ["ko15", "ko16", "wt15"])
+        np.testing.assert_array_equal(
+            obs.matrix_data.toarray(),
+            [[1000, 2000, 0], [4000, 0, 5000], [0, 7000, 0], [0, 0, 0]],
+        )
+
+    def test_build_feature_table_maxint_maxo(self):
+        obs = build_feature_table(self.experiment, value="maxo")
+
+        np.testing.assert_array_equal(
+            obs.matrix_data.toarray(),
+            [[100, 200, 0], [400, 0, 500], [0, 700, 0], [0, 0, 0]],
+        )
+
+    def test_build_feature_table_sum(self):
+        obs = build_feature_table(self.experiment, method="sum")
+
+        np.testing.assert_array_equal(
+            obs.matrix_data.toarray(),
+            [[4000, 2000, 0], [4000, 0, 5000], [0, 13000, 0], [0, 0, 0]],
+        )
+
+    def test_build_feature_table_columnar(self):
+        columnar = convert_xcms_experiment(
+            XCMSExperimentDirFmt(self.get_data_path("XCMSExperiment_features"), "r")
+        )
+        columnar.validate()
+
+        self.assertTrue(
+            os.path.isdir(os.path.join(str(columnar), "xcms_experiment_chrom_peaks"))
+        )
+        self.assertEqual(
+            build_feature_table(XCMSExperimentView(str(columnar)), method="sum"),
+            build_feature_table(self.experiment, method="sum"),
+        )
+
+    def test_build_feature_table_no_features(self):
+        path = os.path.join(self.temp_dir.name, "experiment")
+        shutil.copytree(self.get_data_path("XCMSExperiment_features"), path)
+        os.remove(os.path.join(path, "xcms_experiment_feature_definitions.txt"))
+
+        with self.assertRaisesRegex(ValueError, "does not contain grouped features"):
+            build_feature_table(XCMSExperimentView(path))
+
+    def test_feature_matrix_sparse(self):
+        rng = np.random.default_rng(0)
+        n_features, n_samples, n_peaks = 100_000, 1_000, 300_000
+        features = rng.integers(0, n_features, n_peaks)
+        samples = rng.integers(0, n_samples, n_peaks)
+        values = rng.random(n_peaks)
+        values[:10] = np.nan
+
+        obs = feature_matrix(features, samples, values, values, n_features, n_samples)
+
+        self.assertEqual(obs.shape, (n_features, n_samples))
+        self.assertLessEqual(obs.nnz, n_peaks - 10)
+        # Each cell holds the maximum of its peaks
+        keep = ~np.isnan(values)
+        exp = np.zeros(n_features * n_samples)
+        np.maximum.at(exp, features[keep] * n_samples + samples[keep], values[keep])
+        coo = obs.tocoo()
+        np.testing.assert_array_equal(
+            coo.data, exp[coo.row.astype(np.int64) * n_samples + coo.col]
+        )
+        self.assertEqual(obs.nnz, np.count_nonzero(exp))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2025, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+
+import numpy as np
+from qiime2.core.exceptions import ValidationError
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_ms.types import XCMSExperimentDirFmt, XCMSExperimentView
+from q2_ms.types._feature_peaks import (
+    build_feature_peak_index,
+    feature_peak_index_paths,
+    load_feature_peak_index,
+)
+from q2_ms.xcms.feature_table import build_feature_table
+from q2_ms.xcms.indexing import index_xcms_experiment
+
+
+class TestIndexXCMSExperiment(TestPluginBase):
+    package = "q2_ms.xcms.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.experiment = XCMSExperimentDirFmt(
+            self.get_data_path("XCMSExperiment_features"), mode="r"
+        )
+
+    def copy_experiment(self):
+        path = os.path.join(self.temp_dir.name, "experiment")
+        shutil.copytree(str(self.experiment), path)
+        return path
+
+    def test_build_feature_peak_index(self):
+        index = build_feature_peak_index(str(self.experiment))
+
+        self.assertEqual((index.n_features, index.n_peaks, len(index)), (4, 7, 7))
+        self.assertEqual(
+            [index.peaks(f).tolist() for f in range(4)], [[0, 1, 2], [3, 4], [5, 6], []]
+        )
+        self.assertEqual(index.features(3).tolist(), [1])
+
+    def test_index_xcms_experiment(self):
+        indexed = index_xcms_experiment(self.experiment)
+        indexed.validate(level="max")
+
+        for path in feature_peak_index_paths(str(indexed)).values():
+            self.assertTrue(os.path.isfile(path))
+        obs = load_feature_peak_index(str(indexed))
+        exp = build_feature_peak_index(str(self.experiment))
+        self.assertIsInstance(obs.feature_peaks, np.memmap)
+        for name in ("feature_indptr", "feature_peaks", "peak_indptr"):
+            np.testing.assert_array_equal(getattr(obs, name), getattr(exp, name))
+
+    def test_index_xcms_experiment_feature_table(self):
+        indexed = index_xcms_experiment(self.experiment)
+
+        self.assertEqual(
+            build_feature_table(XCMSExperimentView(str(indexed)), method="sum"),
+            build_feature_table(XCMSExperimentView(str(self.experiment)), method="sum"),
+        )
+
+    def test_index_xcms_experiment_no_features(self):
+        path = self.copy_experiment()
+        os.remove(os.path.join(path, "xcms_experiment_feature_peak_index.txt"))
+
+        with self.assertRaisesRegex(ValueError, "does not contain grouped features"):
+            index_xcms_experiment(XCMSExperimentDirFmt(path, mode="r"))
+
+    def test_index_xcms_experiment_reindex(self):
+        indexed = index_xcms_experiment(self.experiment)
+        reindexed = index_xcms_experiment(indexed)
+
+        self.assertEqual(len(load_feature_peak_index(str(reindexed))), 7)
+        reindexed.validate(level="max")
+
+    def test_validate_missing_array(self):
+        path = self.copy_experiment()
+        build_feature_peak_index(path).save(path)
+        os.remove(feature_peak_index_paths(path)["peak_features"])
+
+        with self.assertRaisesRegex(ValidationError, "peak_features are missing"):
+            XCMSExperimentDirFmt(path, mode="r").validate()
+
+    def test_validate_out_of_date(self):
+        path = self.copy_experiment()
+        build_feature_peak_index(path).save(path)
+        edge_list = os.path.join(path, "xcms_experiment_feature_peak_index.txt")
+        with open(edge_list) as file:
+            lines = file.readlines()
+        with open(edge_list, "w") as file:
+            file.writelines(lines[:-1])
+
+        # The arrays are only compared with the edge list at level max
+        XCMSExperimentDirFmt(path, mode="r").validate(level="min")
+        with self.assertRaisesRegex(ValidationError, "out of date"):
+            XCMSExperimentDirFmt(path, mode="r").validate(level="max")
+
+    def test_validate_invalid_indptr(self):
+        path = self.copy_experiment()
+        build_feature_peak_index(path).save(path)
+        np.save(feature_peak_index_paths(path)["feature_indptr"], [0, 3, 2, 7, 7])
+
+        with self.assertRaisesRegex(ValidationError, "feature_indptr must be"):
+            XCMSExperimentDirFmt(path, mode="r").validate()